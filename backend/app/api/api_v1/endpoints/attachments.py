@@ -1,49 +1,172 @@
-from typing import Any
+import mimetypes
+from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from app import crud, models, schemas
 from app.api import deps
-from app.utils.storage import disk_path_from_attachment_value
+from app.core.file_deletion import file_deletion_worker
+from app.utils.downloads import (
+    DOWNLOAD_CACHE_CONTROL,
+    FileRangeResponse,
+    content_disposition,
+    http_date,
+    is_not_modified,
+    parse_range,
+)
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.storage import disk_path_from_attachment_value, get_storage, stored_relative_path
 
 
 router = APIRouter()
 
 
 @router.get("/my-files/", tags=["attachments"])
-def list_user_files(
-    current_user: models.User = Depends(deps.get_current_user),
-    db: Session = Depends(deps.get_db)
+async def list_user_files(
+    request: Request,
+    response: Response,
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    current_user: schemas.User = Depends(deps.get_current_user),
+    db: AsyncSession = Depends(deps.get_read_db)
 ):
-    """List current user's attachments"""
-    attachments = crud.attachment.get_multi(db=db)  # أو filter by user/tasks
+    """
+    Listet die Anhänge des aktuellen Benutzers (inkl. noch nicht verknüpfter Uploads).
+
+    Gibt es weitere Einträge, steht der Cursor für die nächste Seite im Header `X-Next-Cursor`.
+    Unveränderte Listen werden per ETag mit 304 beantwortet.
+    """
+    not_modified = await deps.check_list_etag(request, response, db, owner_id=current_user.id)
+    if not_modified is not None:
+        return not_modified
+
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Ungültiger Cursor.")
+
+    attachments = await crud.attachment.get_multi_by_owner(
+        db=db, owner_id=current_user.id, after=after, limit=limit + 1
+    )
+    if len(attachments) > limit:
+        attachments = attachments[:limit]
+        last = attachments[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+
     return [
         {"id": a.id, "filename": a.filename, "url": f"{a.file_path}"}
-        for a in attachments if a.task and a.task.owner_id == current_user.id
+        for a in attachments
     ]
 
+async def _get_own_attachment(db: AsyncSession, *, id: int, user_id: int) -> models.Attachment:
+    found = await crud.attachment.get_with_owner(db=db, id=id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Attachment nicht gefunden.")
+    attachment, owner_id = found
+    if owner_id != user_id:
+        raise HTTPException(status_code=400, detail="Nicht genug Berechtigungen.")
+    return attachment
+
+
 @router.delete("/{id}", response_model=schemas.AttachmentOut)
-def delete_attachment(
-    db: Session = Depends(deps.get_db),
+async def delete_attachment(
+    db: AsyncSession = Depends(deps.get_db),
     id: int = 0,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: schemas.User = Depends(deps.get_current_user),
 ) -> Any:
     """
-    Löscht ein Attachment aus DB und entfernt die Datei von der Platte.
+    Löscht ein Attachment aus der DB; die Datei entfernt der Hintergrund-Worker.
     """
-    attachment = crud.attachment.get(db=db, id=id)
-    if not attachment:
-        raise HTTPException(status_code=404, detail="Attachment nicht gefunden.")
+    attachment = await _get_own_attachment(db, id=id, user_id=current_user.id)
+
+    attachment, unused_files = await crud.attachment.remove_with_files(
+        db=db, db_obj=attachment, owner_id=current_user.id
+    )
+    if unused_files:
+        file_deletion_worker.wake()
+    return attachment
+
+
+@router.api_route("/{id}/download", methods=["GET", "HEAD"], response_class=Response)
+async def download_attachment(
+    request: Request,
+    id: int,
+    db: AsyncSession = Depends(deps.get_read_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> Response:
+    """
+    Liefert die Datei eines Attachments aus (nur für den Besitzer).
+
+    Unterstützt Byte-Bereiche (Range/If-Range), starke ETags auf Basis des SHA-256
+    sowie If-None-Match/If-Modified-Since mit 304-Antworten. Die URL hängt an der ID,
+    die SQLite nach dem Löschen neu vergeben kann; Clients müssen daher revalidieren. Liegt die Datei im
+    Objektspeicher, wird auf eine kurzlebige vorsignierte URL umgeleitet.
+    """
+    attachment = await _get_own_attachment(db, id=id, user_id=current_user.id)
 
-    if attachment.task_id:
-        task = crud.task.get(db=db, id=attachment.task_id)
-        if task and task.owner_id != current_user.id:
-            raise HTTPException(status_code=400, detail="Nicht genug Berechtigungen.")
+    media_type = (
+        attachment.file_type
+        or mimetypes.guess_type(attachment.filename)[0]
+        or "application/octet-stream"
+    )
+    storage = get_storage()
+    if not storage.local:
+        key = stored_relative_path(attachment.file_path)
+        if not key:
+            raise HTTPException(status_code=404, detail="Datei nicht gefunden.")
+        url = storage.presigned_get(key, filename=attachment.filename, content_type=media_type)
+        return RedirectResponse(url, status_code=307, headers={"Cache-Control": "private, no-store"})
 
     disk_path = disk_path_from_attachment_value(attachment.file_path)
-    if disk_path.exists() and disk_path.is_file():
-        disk_path.unlink(missing_ok=True)
+    try:
+        stat = await run_in_threadpool(disk_path.stat)
+    except OSError:
+        raise HTTPException(status_code=404, detail="Datei nicht gefunden.")
 
-    attachment = crud.attachment.remove(db=db, id=id)
-    return attachment
+    last_modified = http_date(stat.st_mtime)
+    if attachment.checksum:
+        etag = f'"{attachment.checksum}"'
+        if_range_validators = (etag, last_modified)
+    else:
+        # Uploads aus der Zeit vor den Prüfsummen (migrate_to_cas ergänzt sie):
+        # schwaches ETag aus Größe und Änderungszeit, für If-Range nur das Datum
+        etag = f'W/"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+        if_range_validators = (last_modified,)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Cache-Control": DOWNLOAD_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    if is_not_modified(request.headers, etag=etag, last_modified=stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range not in if_range_validators:
+        # Datei hat sich seit dem Teil-Download geändert: vollständig ausliefern
+        range_header = None
+
+    size = stat.st_size
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    headers["Content-Disposition"] = content_disposition(attachment.filename)
+
+    if byte_range is None:
+        return FileRangeResponse(
+            disk_path, start=0, end=size - 1, headers=headers, media_type=media_type
+        )
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return FileRangeResponse(
+        disk_path, start=start, end=end, status_code=206, headers=headers, media_type=media_type
+    )
@@ -3,7 +3,7 @@ from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud, schemas
 from app.api import deps
@@ -15,14 +15,21 @@ router = APIRouter()
 
 
 @router.post("/login/access-token", response_model=schemas.Token)
-def login_access_token(
-    db: Session = Depends(deps.get_db),
+async def login_access_token(
+    db: AsyncSession = Depends(deps.get_db),
     form_data: OAuth2PasswordRequestForm = Depends(),
 ) -> Any:
     """
     OAuth2 kompatibler Token-Login.
     """
-    user = crud.user.authenticate(db, email=form_data.username, password=form_data.password)
+    try:
+        user = await crud.user.authenticate(db, email=form_data.username, password=form_data.password)
+    except security.PasswordHashingBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Server ausgelastet, bitte später erneut versuchen.",
+            headers={"Retry-After": "1"},
+        )
     if not user:
         raise HTTPException(status_code=400, detail="E-Mail oder Passwort ist falsch.")
     if not user.is_active:
@@ -1,83 +1,653 @@
+import csv
 import os
-from typing import Any, List
+from typing import Any, AsyncIterator, Dict, List, Literal, NoReturn, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
 
-from app import crud, models, schemas
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app import crud, schemas
 from app.api import deps
-from app.utils.storage import disk_path_from_attachment_value
+from app.core import security
+from app.core.config import settings
+from app.core.events import TaskEvent, broker
+from app.core.file_deletion import file_deletion_worker
+from app.crud.crud_task import AttachmentLinkError
+from app.db.search import search_terms
+from app.db.session import new_session
+from app.utils.pagination import (
+    decode_cursor,
+    decode_search_cursor,
+    decode_sync_token,
+    encode_cursor,
+    encode_search_cursor,
+    encode_sync_token,
+)
+from app.utils.responses import model_response
+from app.utils.sse import SSE_HEARTBEAT, format_sse
+from app.utils.task_io import (
+    MEDIA_TYPES,
+    TaskFileFormat,
+    export_csv,
+    export_csv_header,
+    export_ndjson,
+    iter_import_records,
+    read_batch,
+)
 
 
 router = APIRouter()
 
+# Sortierung der Taskliste; "-" = absteigend
+TaskSort = Literal["created_at", "-created_at"]
+
+
+async def _read_task_page(
+    db: AsyncSession,
+    request: Request,
+    response: Response,
+    *,
+    owner_id: int,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    is_completed: Optional[bool] = None,
+    sort: str = "created_at",
+    lean: bool = False,
+) -> Response:
+    # Gemeinsame Paginierung für die volle und die schlanke Listenansicht; unveränderte
+    # Listen werden per ETag mit 304 beantwortet, bevor die Aufgaben abgefragt werden.
+    # Die Seite wird direkt zu JSON serialisiert (ohne zweite Validierung durch FastAPI)
+    not_modified = await deps.check_list_etag(request, response, db, owner_id=owner_id)
+    if not_modified is not None:
+        return not_modified
+
+    options = dict(is_completed=is_completed, descending=sort.startswith("-"), lean=lean)
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Ungültiger Cursor.")
+        tasks = await crud.task.get_multi_by_owner_after(
+            db=db, owner_id=owner_id, after=after, limit=limit + 1, **options
+        )
+    else:
+        tasks = await crud.task.get_multi_by_owner(
+            db=db, owner_id=owner_id, skip=skip, limit=limit + 1, **options
+        )
+
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        last = tasks[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    schema = schemas.TaskSummary if lean else schemas.Task
+    return model_response(List[schema], tasks, response)
+
 
 @router.get("/", response_model=List[schemas.Task])
-def read_tasks(
-    db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
-    current_user: models.User = Depends(deps.get_current_user),
+async def read_tasks(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    is_completed: Optional[bool] = None,
+    sort: TaskSort = "created_at",
+    current_user: schemas.User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Lädt alle Tasks für den aktuellen Benutzer.
+
+    Mit `cursor` wird per Keyset-Paginierung ab der letzten Position weitergelesen;
+    `skip` bleibt aus Kompatibilitätsgründen erhalten. Gibt es weitere Einträge,
+    steht der Cursor für die nächste Seite im Header `X-Next-Cursor`.
+    `is_completed` filtert nach Status, `sort=-created_at` liefert die neuesten zuerst
+    (der Cursor gilt nur für dieselbe Sortierung).
+
+    Die Antwort trägt einen schwachen ETag; bei passendem If-None-Match folgt 304.
+    """
+    return await _read_task_page(
+        db,
+        request,
+        response,
+        owner_id=current_user.id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        is_completed=is_completed,
+        sort=sort,
+    )
+
+
+@router.get("/summary", response_model=List[schemas.TaskSummary])
+async def read_task_summaries(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    is_completed: Optional[bool] = None,
+    sort: TaskSort = "created_at",
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Schlanke Taskliste: statt der vollen Anhänge wird nur deren Anzahl geliefert.
+    """
+    return await _read_task_page(
+        db,
+        request,
+        response,
+        owner_id=current_user.id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        is_completed=is_completed,
+        sort=sort,
+        lean=True,
+    )
+
+
+@router.get("/stats", response_model=schemas.TaskStats)
+async def read_task_stats(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Anzahl aller, erledigter und offener Aufgaben des aktuellen Benutzers.
+
+    Die Zähler werden bei jeder Änderung fortgeschrieben, hier also nur gelesen.
+    """
+    not_modified = await deps.check_list_etag(request, response, db, owner_id=current_user.id)
+    if not_modified is not None:
+        return not_modified
+
+    stats = await crud.task_stats.get_for_owner(db=db, owner_id=current_user.id)
+    return schemas.TaskStats(
+        total=stats.total, completed=stats.completed, open=stats.total - stats.completed
+    )
+
+
+# Reihenfolge der Quellen innerhalb einer Version im Änderungsstrom; SYNC_END markiert
+# eine vollständig gelesene Version
+SYNC_TASK, SYNC_ATTACHMENT, SYNC_TOMBSTONE, SYNC_END = range(4)
+MAX_ID = 2**63 - 1
+
+
+def _sync_after(kind: int, position: Tuple[int, int, int]) -> Tuple[int, int]:
+    # Keyset (Version, ID) für eine Quelle aus der Position (Version, Art, ID) ableiten:
+    # frühere Arten sind in dieser Version schon gelesen, spätere noch gar nicht
+    version, position_kind, last_id = position
+    if kind < position_kind:
+        return version, MAX_ID
+    if kind > position_kind:
+        return version, 0
+    return version, last_id
+
+
+@router.get("/changes", response_model=schemas.TaskChanges)
+async def read_task_changes(
+    response: Response,
+    since: Optional[str] = None,
+    limit: int = Query(default=500, ge=1, le=1000),
+    db: AsyncSession = Depends(deps.get_read_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Delta-Sync: Aufgaben, Anhänge und Löschungen seit dem Sync-Token `since`.
+
+    Ohne `since` wird der vollständige Bestand geliefert. `next_token` ist beim
+    nächsten Aufruf zu übergeben; solange `has_more` gesetzt ist, sofort weiterlesen.
+    Gelöschte IDs sind nach den geänderten Zeilen anzuwenden. Ist das Token älter als
+    die aufbewahrten Tombstones (SYNC_TOMBSTONE_TTL_DAYS), folgt 410: der Client
+    verwirft seinen Stand und synchronisiert ohne `since` neu.
+    """
+    position = (-1, SYNC_END, 0)
+    if since:
+        try:
+            position = decode_sync_token(since)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Ungültiges Sync-Token.")
+
+    # Nur bis zur gelesenen Version: alle Zeilen bis dahin sind bereits committet
+    until = await crud.task_stats.get_version(db, owner_id=current_user.id)
+    if position[0] > until or (position[0] == until and position[1] == SYNC_END):
+        return {"next_token": since, "has_more": False}
+    # Nur abgeschlossene Stände prüfen: Folgeseiten eines laufenden Syncs, der selbst
+    # gültig begann (z.B. der vollständige ohne `since`), brauchen die alten Tombstones nicht
+    if since and position[1] == SYNC_END:
+        pruned = await crud.tombstone.get_pruned_version(db, owner_id=current_user.id)
+        if position[0] < pruned:
+            raise HTTPException(
+                status_code=410,
+                detail="Sync-Token zu alt, vollständige Synchronisation erforderlich.",
+            )
+
+    options = dict(owner_id=current_user.id, until=until, limit=limit + 1)
+    tasks = await crud.task.get_changed_after(
+        db, after=_sync_after(SYNC_TASK, position), **options
+    )
+    attachments = await crud.attachment.get_changed_after(
+        db, after=_sync_after(SYNC_ATTACHMENT, position), **options
+    )
+    tombstones = await crud.tombstone.get_multi_after(
+        db, after=_sync_after(SYNC_TOMBSTONE, position), **options
+    )
+
+    items = sorted(
+        [(t.sync_version, SYNC_TASK, t.id, t) for t in tasks]
+        + [(a.sync_version, SYNC_ATTACHMENT, a.id, a) for a in attachments]
+        + [(x.version, SYNC_TOMBSTONE, x.id, x) for x in tombstones],
+        key=lambda item: item[:3],
+    )
+    has_more = len(items) > limit
+    items = items[:limit]
+
+    changes: Dict[str, Any] = {
+        "tasks": [],
+        "attachments": [],
+        "deleted_task_ids": [],
+        "deleted_attachment_ids": [],
+        "next_token": (
+            encode_sync_token(*items[-1][:3]) if has_more
+            else encode_sync_token(until, SYNC_END, 0)
+        ),
+        "has_more": has_more,
+    }
+    # Später neu angelegte Zeilen mit derselben ID (SQLite kann IDs wiederverwenden)
+    # dürfen nicht durch ältere Tombstones gelöscht werden
+    latest: Dict[Tuple[int, int], int] = {}
+    for version, kind, id, row in items:
+        if kind == SYNC_TASK:
+            changes["tasks"].append(row)
+            latest[(SYNC_TASK, id)] = version
+        elif kind == SYNC_ATTACHMENT:
+            changes["attachments"].append(row)
+            latest[(SYNC_ATTACHMENT, id)] = version
+    for version, kind, _, row in items:
+        if kind != SYNC_TOMBSTONE:
+            continue
+        entity_kind = SYNC_TASK if row.entity == "task" else SYNC_ATTACHMENT
+        if latest.get((entity_kind, row.entity_id), -1) > version:
+            continue
+        key = "deleted_task_ids" if entity_kind == SYNC_TASK else "deleted_attachment_ids"
+        changes[key].append(row.entity_id)
+    return model_response(schemas.TaskChanges, changes, response)
+
+
+def _event_message(event: TaskEvent) -> str:
+    return format_sse(
+        {"version": event.version, "changes": event.changes}, event="changes", id=event.version
+    )
+
+
+@router.post("/events/ticket", response_model=schemas.StreamTicket)
+async def create_events_ticket(
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Kurzlebiges Ticket für GET /tasks/events?ticket=... (EventSource kann keine
+    Authorization-Header senden).
+    """
+    return {
+        "ticket": security.create_stream_ticket(current_user.id),
+        "expires_in": settings.EVENTS_TICKET_SECONDS,
+    }
+
+
+@router.get("/events", response_class=StreamingResponse)
+async def task_events(
+    last_event_id: Optional[int] = Header(default=None),
+    since: Optional[int] = Query(default=None),
+    current_user: schemas.User = Depends(deps.get_stream_user),
+) -> StreamingResponse:
+    """
+    Server-Sent Events mit den Änderungen an Aufgaben und Anhängen des Benutzers.
+
+    Jede Nachricht (`event: changes`) trägt die Listenversion als ID. Nach einem
+    Verbindungsabbruch wird ab `Last-Event-ID` (oder `since`) fortgesetzt; reicht der
+    Verlauf dafür nicht aus oder kommt der Client nicht hinterher, folgt `event: reset`
+    und der Client lädt die Liste neu. Alle EVENTS_HEARTBEAT_SECONDS wird ein
+    Kommentar als Heartbeat gesendet.
+    """
+    owner_id = current_user.id
+    resume_from = last_event_id if last_event_id is not None else since
+
+    # Erst abonnieren, dann die aktuelle Version lesen: so geht dazwischen nichts verloren
+    subscription = broker.subscribe(owner_id)
+    try:
+        db = new_session(read_only=True)
+        try:
+            current = await crud.task_stats.get_version(db, owner_id=owner_id)
+        finally:
+            await db.close()
+    except Exception:
+        broker.unsubscribe(subscription)
+        raise
+
+    async def stream() -> AsyncIterator[str]:
+        try:
+            yield "retry: 3000\n\n"
+            last = current
+            replay = None
+            if resume_from is not None:
+                replay = broker.replay(owner_id, after=resume_from, current=current)
+            if resume_from is not None and replay is None:
+                yield format_sse({"version": current}, event="reset", id=current)
+            elif replay:
+                for event in replay:
+                    yield _event_message(event)
+                last = max(current, replay[-1].version)
+            else:
+                yield format_sse({"version": current}, event="ready", id=current)
+
+            while True:
+                event = await subscription.next(settings.EVENTS_HEARTBEAT_SECONDS)
+                if subscription.overflowed:
+                    subscription.overflowed = False
+                    yield format_sse({"version": last}, event="reset")
+                    continue
+                if event is None:
+                    yield SSE_HEARTBEAT
+                    continue
+                if event.version <= last:
+                    continue
+                last = event.version
+                yield _event_message(event)
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/search", response_model=List[schemas.Task])
+async def search_tasks(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(deps.get_read_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Volltextsuche in Titel und Beschreibung der eigenen Aufgaben.
+
+    Jeder Suchbegriff wird als Präfix gesucht, alle Begriffe müssen vorkommen.
+    Die Treffer sind nach Relevanz sortiert; der Cursor für die nächste Seite
+    steht im Header `X-Next-Cursor`.
+    """
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Kein gültiger Suchbegriff.")
+
+    after = None
+    if cursor:
+        try:
+            after = decode_search_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Ungültiger Cursor.")
+
+    hits = await crud.task.search_by_owner(
+        db=db, owner_id=current_user.id, terms=terms, after=after, limit=limit + 1
+    )
+    if len(hits) > limit:
+        hits = hits[:limit]
+        last_task, last_rank = hits[-1]
+        response.headers["X-Next-Cursor"] = encode_search_cursor(last_rank, last_task.id)
+    return model_response(List[schemas.Task], [task for task, _ in hits], response)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_tasks(
+    file_format: TaskFileFormat = Query(default="ndjson", alias="format"),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> StreamingResponse:
+    """
+    Exportiert alle Aufgaben des Benutzers als NDJSON (eine Aufgabe pro Zeile) oder CSV.
+
+    Die Aufgaben werden blockweise aus der Datenbank gelesen und sofort gesendet;
+    Anhänge sind nicht enthalten.
     """
-    tasks = crud.task.get_multi_by_owner(db=db, owner_id=current_user.id, skip=skip, limit=limit)
-    return tasks
+    owner_id = current_user.id
+    encode = export_csv if file_format == "csv" else export_ndjson
+
+    async def stream() -> AsyncIterator[bytes]:
+        # Eigene Sitzung: die Request-Sitzung ist beim Streamen bereits geschlossen
+        db = new_session(read_only=True)
+        try:
+            if file_format == "csv":
+                yield export_csv_header()
+            async for rows in crud.task.stream_by_owner(
+                db, owner_id=owner_id, batch_size=settings.TASK_EXPORT_BATCH_SIZE
+            ):
+                yield encode(rows)
+        finally:
+            await db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type=MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{file_format}"'},
+    )
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'Zeile'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+@router.post("/import", response_model=schemas.TaskImportResult)
+async def import_tasks(
+    file: UploadFile = File(...),
+    file_format: TaskFileFormat = Query(default="ndjson", alias="format"),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Importiert Aufgaben aus NDJSON oder CSV (Format wie beim Export; `id` wird ignoriert).
+
+    Die Datei wird zeilenweise gelesen und in Blöcken zu TASK_IMPORT_BATCH_SIZE per
+    Bulk-INSERT geschrieben, alles in einer Transaktion: bei einem Fehler wird nichts
+    übernommen. Ungültige Zeilen werden übersprungen und mit Zeilennummer gemeldet.
+    """
+    records = iter_import_records(file.file, file_format)
+    imported = 0
+    failed = 0
+    errors: List[schemas.TaskImportError] = []
+    try:
+        while True:
+            batch = await run_in_threadpool(read_batch, records, settings.TASK_IMPORT_BATCH_SIZE)
+            if not batch:
+                break
+            tasks_in = []
+            for line, record in batch:
+                try:
+                    if isinstance(record, str):
+                        tasks_in.append(schemas.TaskImport.model_validate_json(record))
+                    else:
+                        tasks_in.append(schemas.TaskImport.model_validate(record))
+                except ValidationError as exc:
+                    failed += 1
+                    if len(errors) < settings.TASK_IMPORT_MAX_ERRORS:
+                        errors.append(
+                            schemas.TaskImportError(line=line, error=_validation_message(exc))
+                        )
+            await crud.task.create_many(
+                db=db, objs_in=tasks_in, owner_id=current_user.id, commit=False
+            )
+            imported += len(tasks_in)
+        await db.commit()
+    except (UnicodeDecodeError, csv.Error) as exc:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"Datei nicht lesbar: {exc}")
+    except Exception:
+        # Alles oder nichts: keine bereits geschriebenen Blöcke übernehmen
+        await db.rollback()
+        raise
+    finally:
+        records.close()
+
+    return schemas.TaskImportResult(imported=imported, failed=failed, errors=errors)
+
+
+async def _reject_attachments(db: AsyncSession) -> NoReturn:
+    # Nichts von der halb geschriebenen Transaktion übernehmen
+    await db.rollback()
+    raise HTTPException(
+        status_code=400,
+        detail="Anhänge gehören nicht zum Benutzer oder sind bereits verknüpft.",
+    )
 
 
 @router.post("/", response_model=schemas.Task)
-def create_task(
-    db: Session = Depends(deps.get_db),
+async def create_task(
+    db: AsyncSession = Depends(deps.get_db),
     task_in: schemas.TaskCreate = None,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: schemas.User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Erstellt eine neue Aufgabe.
     """
-    task = crud.task.create_with_owner(db=db, obj_in=task_in, owner_id=current_user.id)
+    try:
+        task = await crud.task.create_with_owner(db=db, obj_in=task_in, owner_id=current_user.id)
+    except AttachmentLinkError:
+        await _reject_attachments(db)
     return task
 
 
+def _check_batch_size(size: int) -> None:
+    if size > settings.TASK_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Zu viele Elemente (maximal {settings.TASK_BATCH_MAX_SIZE}).",
+        )
+
+
+@router.post("/batch", response_model=List[schemas.TaskBatchResult])
+async def create_tasks_batch(
+    db: AsyncSession = Depends(deps.get_db),
+    tasks_in: List[schemas.TaskCreate] = Body(...),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Erstellt viele Aufgaben in einer Transaktion.
+    """
+    _check_batch_size(len(tasks_in))
+    try:
+        ids = await crud.task.create_many(db=db, objs_in=tasks_in, owner_id=current_user.id)
+    except AttachmentLinkError:
+        await _reject_attachments(db)
+    return [
+        schemas.TaskBatchResult(index=index, id=task_id, status="created")
+        for index, task_id in enumerate(ids)
+    ]
+
+
+@router.patch("/batch", response_model=List[schemas.TaskBatchResult])
+async def update_tasks_batch(
+    db: AsyncSession = Depends(deps.get_db),
+    tasks_in: List[schemas.TaskBatchUpdate] = Body(...),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Aktualisiert viele Aufgaben in einer Transaktion. Fremde oder unbekannte IDs
+    werden übersprungen und im Ergebnis gemeldet.
+    """
+    _check_batch_size(len(tasks_in))
+    try:
+        statuses = await crud.task.update_many(db=db, objs_in=tasks_in, owner_id=current_user.id)
+    except AttachmentLinkError:
+        await _reject_attachments(db)
+    return [
+        schemas.TaskBatchResult(index=index, id=task_in.id, status=statuses[task_in.id])
+        for index, task_in in enumerate(tasks_in)
+    ]
+
+
+@router.delete("/batch", response_model=List[schemas.TaskBatchResult])
+async def delete_tasks_batch(
+    db: AsyncSession = Depends(deps.get_db),
+    batch_in: schemas.TaskBatchDelete = Body(...),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Löscht viele Aufgaben in einer Transaktion; die nicht mehr benötigten Dateien
+    entfernt der Hintergrund-Worker.
+    """
+    _check_batch_size(len(batch_in.ids))
+    statuses, unused_files = await crud.task.remove_many(
+        db=db, ids=batch_in.ids, owner_id=current_user.id
+    )
+    if unused_files:
+        file_deletion_worker.wake()
+    return [
+        schemas.TaskBatchResult(index=index, id=task_id, status=statuses[task_id])
+        for index, task_id in enumerate(batch_in.ids)
+    ]
+
+
 @router.put("/{id}", response_model=schemas.Task)
-def update_task(
-    db: Session = Depends(deps.get_db),
+async def update_task(
+    db: AsyncSession = Depends(deps.get_db),
     id: int = 0,
     task_in: schemas.TaskUpdate = None,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: schemas.User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Aktualisiert eine Aufgabe.
     """
-    task = crud.task.get(db=db, id=id)
+    task = await crud.task.get(db=db, id=id)
     if not task:
         raise HTTPException(status_code=404, detail="Task nicht gefunden.")
     if task.owner_id != current_user.id:
         raise HTTPException(status_code=400, detail="Nicht genug Berechtigungen.")
 
-    task = crud.task.update(db=db, db_obj=task, obj_in=task_in)
+    try:
+        task = await crud.task.update(db=db, db_obj=task, obj_in=task_in)
+    except AttachmentLinkError:
+        await _reject_attachments(db)
     return task
 
 
 @router.delete("/{id}", response_model=schemas.Task)
-def delete_task(
-    db: Session = Depends(deps.get_db),
+async def delete_task(
+    db: AsyncSession = Depends(deps.get_db),
     id: int = 0,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: schemas.User = Depends(deps.get_current_user),
 ) -> Any:
     """
-    Löscht eine Aufgabe und entfernt alle zugehörigen Dateien von der Platte.
+    Löscht eine Aufgabe; die zugehörigen Dateien entfernt der Hintergrund-Worker.
     """
-    task = crud.task.get(db=db, id=id)
+    task = await crud.task.get(db=db, id=id)
     if not task:
         raise HTTPException(status_code=404, detail="Task nicht gefunden.")
     if task.owner_id != current_user.id:
         raise HTTPException(status_code=400, detail="Nicht genug Berechtigungen.")
 
-    for attachment in task.attachments:
-        disk_path = disk_path_from_attachment_value(attachment.file_path)
-        if disk_path.exists() and disk_path.is_file():
-            disk_path.unlink(missing_ok=True)
-
-    task = crud.task.remove(db=db, id=id)
+    task, unused_files = await crud.task.remove_with_files(db=db, db_obj=task)
+    if unused_files:
+        file_deletion_worker.wake()
     return task
@@ -1,36 +1,52 @@
+import base64
+import hashlib
+import mimetypes
 import secrets
 import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Dict, Optional, Tuple
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Request, Response, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
 
+from app import crud, schemas
 from app.api import deps
 from app.core.config import settings
 from app.models.attachment import Attachment
-from app.models.user import User
-from app.utils.storage import build_public_url, ensure_upload_dir, sanitize_filename
+from app.models.upload_session import UploadSession
+from app.schemas.user import User
+from app.utils.downloads import http_date, sha256_file
+from app.utils.storage import (
+    INCOMING_DIR,
+    build_public_url,
+    cas_relative_path,
+    ensure_upload_dir,
+    get_storage,
+    incoming_dir,
+    sanitize_filename,
+    sharded_relative_path,
+    upload_part_path,
+)
 
 
 router = APIRouter()
 
+# Puffergröße, ab der Daten in einem Schritt im Threadpool geschrieben werden
+WRITE_BUFFER_SIZE = 1024 * 1024
 
-@router.post("/", response_model=dict)
-def upload_file(
-    file: UploadFile = File(...),
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
-) -> Any:
-    """
-    Datei hochladen und Attachment-Eintrag in der DB erstellen.
-    """
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="Dateiname fehlt.")
+# Unterstützte Version des tus-Protokolls (fortsetzbare Uploads)
+TUS_VERSION = "1.0.0"
 
-    ensure_upload_dir()
 
-    original_name = sanitize_filename(file.filename)
+def _new_stored_filename(filename: Optional[str], user_id: int) -> Tuple[str, str]:
+    # Dateinamen prüfen und eindeutigen Speichernamen vergeben: (Originalname, Speichername)
+    if not filename:
+        raise HTTPException(status_code=400, detail="Dateiname fehlt.")
+
+    original_name = sanitize_filename(filename)
     ext = Path(original_name).suffix.lower()
 
     allowed = {e.lower() for e in settings.UPLOAD_ALLOWED_EXTENSIONS}
@@ -39,13 +55,125 @@ def upload_file(
 
     ts = int(time.time())
     rnd = secrets.token_hex(8)
-    stored_filename = f"{current_user.id}_{ts}_{rnd}_{original_name}"
+    return original_name, f"{user_id}_{ts}_{rnd}_{original_name}"
 
-    disk_path = (settings.upload_dir_abs / stored_filename).resolve()
-    max_size = int(settings.UPLOAD_MAX_SIZE_MB * 1024 * 1024)
 
-    total = 0
+def _prepare_target(filename: Optional[str], user_id: int) -> Tuple[str, str, Path]:
+    # Speicherort festlegen: (Originalname, Schlüssel relativ zum Upload-Verzeichnis,
+    # Disk-Pfad zum Schreiben)
+    ensure_upload_dir()
+    original_name, stored_filename = _new_stored_filename(filename, user_id)
+
+    # Im CAS-Modus steht der endgültige Pfad erst nach dem Hashen fest
+    if settings.UPLOAD_STORAGE_MODE == "cas":
+        return original_name, stored_filename, (incoming_dir() / stored_filename).resolve()
+
+    # Lokal direkt an den Zielort, sonst erst lokal und danach in den Speicher
+    stored_path = sharded_relative_path(stored_filename)
+    disk_path = get_storage().local_path(stored_path) or (incoming_dir() / stored_filename).resolve()
+    disk_path.parent.mkdir(parents=True, exist_ok=True)
+    return original_name, stored_path, disk_path
+
+
+def _max_upload_size() -> int:
+    return int(settings.UPLOAD_MAX_SIZE_MB * 1024 * 1024)
+
+
+async def _insert_attachment(
+    db: AsyncSession,
+    *,
+    file_path: str,
+    original_name: str,
+    content_type: Optional[str],
+    uploader_id: int,
+    checksum: Optional[str],
+    size: int,
+    blob_id: Optional[int] = None,
+) -> Attachment:
+    version = await crud.task_stats.touch(db, owner_id=uploader_id)
+    db_attachment = Attachment(
+        filename=original_name,
+        file_path=file_path,
+        file_type=content_type,
+        uploader_id=uploader_id,
+        checksum=checksum,
+        file_size=size,
+        blob_id=blob_id,
+        sync_version=version,
+    )
+    db.add(db_attachment)
+    await db.flush()
+    crud.task_stats.record(
+        db, owner_id=uploader_id, changes={"attachment.created": [db_attachment.id]}
+    )
+    await db.commit()
+    await db.refresh(db_attachment)
+    return db_attachment
+
+
+async def _save_attachment(
+    db: AsyncSession,
+    *,
+    disk_path: Path,
+    original_name: str,
+    stored_path: str,
+    content_type: Optional[str],
+    uploader_id: int,
+    checksum: str,
+    size: int,
+) -> Attachment:
+    storage = get_storage()
+    file_path = build_public_url(stored_path)
+    blob_id = None
+
     try:
+        if settings.UPLOAD_STORAGE_MODE == "cas":
+            # Gleicher Inhalt -> gleicher Blob; die Datei wird nur beim ersten Mal abgelegt
+            relative = cas_relative_path(checksum, Path(original_name).suffix)
+            blob, _ = await crud.blob.acquire(
+                db, sha256=checksum, size=size, file_path=build_public_url(relative)
+            )
+            await run_in_threadpool(storage.save, relative, disk_path)
+            file_path, blob_id = blob.file_path, blob.id
+        else:
+            await run_in_threadpool(storage.save, stored_path, disk_path)
+
+        db_attachment = await _insert_attachment(
+            db,
+            file_path=file_path,
+            original_name=original_name,
+            content_type=content_type,
+            uploader_id=uploader_id,
+            checksum=checksum,
+            size=size,
+            blob_id=blob_id,
+        )
+    except Exception:
+        if disk_path.exists():
+            disk_path.unlink(missing_ok=True)
+        if settings.UPLOAD_STORAGE_MODE != "cas":
+            await run_in_threadpool(storage.delete, stored_path)
+        raise HTTPException(status_code=500, detail="Datenbankfehler beim Speichern.")
+
+    return db_attachment
+
+
+@router.post("/", response_model=dict)
+async def upload_file(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Datei hochladen und Attachment-Eintrag in der DB erstellen.
+    """
+    original_name, stored_path, disk_path = _prepare_target(file.filename, current_user.id)
+    max_size = _max_upload_size()
+    hasher = hashlib.sha256()
+
+    def _copy_to_disk() -> int:
+        # Blockierende Datei-I/O läuft im Threadpool, nicht im Event-Loop
+        total = 0
         with disk_path.open("wb") as out:
             while True:
                 chunk = file.file.read(1024 * 1024)
@@ -54,7 +182,12 @@ def upload_file(
                 total += len(chunk)
                 if total > max_size:
                     raise HTTPException(status_code=413, detail="Datei ist zu groß.")
+                hasher.update(chunk)
                 out.write(chunk)
+        return total
+
+    try:
+        total = await run_in_threadpool(_copy_to_disk)
     except HTTPException:
         if disk_path.exists():
             disk_path.unlink(missing_ok=True)
@@ -69,21 +202,423 @@ def upload_file(
         except Exception:
             pass
 
-    public_url = build_public_url(stored_filename)
+    db_attachment = await _save_attachment(
+        db,
+        disk_path=disk_path,
+        original_name=original_name,
+        stored_path=stored_path,
+        content_type=file.content_type,
+        uploader_id=current_user.id,
+        checksum=hasher.hexdigest(),
+        size=total,
+    )
 
-    db_attachment = Attachment(
-        filename=original_name,
-        file_path=public_url,
-        file_type=file.content_type,
+    return {"id": db_attachment.id, "url": db_attachment.file_path, "filename": db_attachment.filename}
+
+
+@router.post("/stream", response_model=dict)
+async def upload_file_stream(
+    request: Request,
+    filename: str = Query(...),
+    content_type: Optional[str] = Header(default=None),
+    content_length: Optional[int] = Header(default=None),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Datei als rohen Request-Body hochladen (ohne multipart).
+
+    Der Body wird direkt in die Zieldatei geschrieben, ohne Zwischenspeicherung in
+    einer temporären Datei (im CAS-Modus danach nur noch umbenannt). Größenlimit und
+    SHA-256 werden im selben Durchlauf geprüft.
+    """
+    original_name, stored_path, disk_path = _prepare_target(filename, current_user.id)
+    max_size = _max_upload_size()
+    if content_length is not None and content_length > max_size:
+        raise HTTPException(status_code=413, detail="Datei ist zu groß.")
+
+    hasher = hashlib.sha256()
+
+    def _write(out: BinaryIO, data: bytes) -> None:
+        hasher.update(data)
+        out.write(data)
+
+    total = 0
+    out: Optional[BinaryIO] = None
+    try:
+        out = await run_in_threadpool(disk_path.open, "wb")
+        buffer = bytearray()
+        async for chunk in request.stream():
+            total += len(chunk)
+            if total > max_size:
+                raise HTTPException(status_code=413, detail="Datei ist zu groß.")
+            buffer += chunk
+            if len(buffer) >= WRITE_BUFFER_SIZE:
+                await run_in_threadpool(_write, out, bytes(buffer))
+                buffer.clear()
+        if buffer:
+            await run_in_threadpool(_write, out, bytes(buffer))
+        await run_in_threadpool(out.close)
+    except HTTPException:
+        if out is not None:
+            out.close()
+        disk_path.unlink(missing_ok=True)
+        raise
+    except Exception:
+        if out is not None:
+            out.close()
+        disk_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=500, detail="Upload fehlgeschlagen.")
+
+    if total == 0:
+        disk_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail="Leere Datei.")
+
+    db_attachment = await _save_attachment(
+        db,
+        disk_path=disk_path,
+        original_name=original_name,
+        stored_path=stored_path,
+        content_type=content_type,
+        uploader_id=current_user.id,
+        checksum=hasher.hexdigest(),
+        size=total,
     )
 
+    return {
+        "id": db_attachment.id,
+        "url": db_attachment.file_path,
+        "filename": db_attachment.filename,
+        "size": total,
+        "sha256": db_attachment.checksum,
+    }
+
+
+@router.post("/direct", response_model=schemas.DirectUpload)
+async def create_direct_upload(
+    payload: schemas.DirectUploadCreate,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Vorsignierte URL für einen direkten Upload in den Objektspeicher (STORAGE_BACKEND="s3").
+
+    Der Client sendet die Datei mit `method`, `url` und `headers` direkt an den Speicher
+    und meldet den Abschluss per POST /upload/direct/complete. Direkte Uploads werden
+    nicht dedupliziert (auch nicht im CAS-Modus); nie abgeschlossene Uploads bleiben
+    unter ".incoming/" liegen und sollten per Lifecycle-Regel des Buckets verfallen.
+    """
+    storage = get_storage()
+    if storage.local:
+        raise HTTPException(status_code=400, detail="Direkte Uploads werden vom Speicher nicht unterstützt.")
+    if payload.size > _max_upload_size():
+        raise HTTPException(status_code=413, detail="Datei ist zu groß.")
+
+    _, stored_filename = _new_stored_filename(payload.filename, current_user.id)
+    request = storage.presigned_put(
+        f"{INCOMING_DIR}/{stored_filename}", content_type=payload.content_type, size=payload.size
+    )
+    return {
+        "upload_id": stored_filename,
+        "expires_in": settings.S3_PRESIGN_EXPIRES_SECONDS,
+        **request,
+    }
+
+
+@router.post("/direct/complete", response_model=dict)
+async def complete_direct_upload(
+    payload: schemas.DirectUploadComplete,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Schließt einen direkten Upload ab: prüft Größe und Besitz, verschiebt das Objekt
+    serverseitig an seinen endgültigen Schlüssel und legt das Attachment an.
+    """
+    storage = get_storage()
+    upload_id = payload.upload_id
+    parts = upload_id.split("_", 3)
+    if (
+        storage.local
+        or len(parts) != 4
+        or parts[0] != str(current_user.id)
+        or sanitize_filename(upload_id) != upload_id
+    ):
+        raise HTTPException(status_code=400, detail="Ungültige Upload-ID.")
+    original_name = parts[3]
+
+    incoming_key = f"{INCOMING_DIR}/{upload_id}"
+    size = await run_in_threadpool(storage.size, incoming_key)
+    if size is None:
+        raise HTTPException(status_code=404, detail="Upload nicht gefunden.")
+    if size == 0 or size > _max_upload_size():
+        await run_in_threadpool(storage.delete, incoming_key)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Leere Datei.")
+        raise HTTPException(status_code=413, detail="Datei ist zu groß.")
+
+    stored_path = sharded_relative_path(upload_id)
+    await run_in_threadpool(storage.move, incoming_key, stored_path)
     try:
-        db.add(db_attachment)
-        db.commit()
-        db.refresh(db_attachment)
+        db_attachment = await _insert_attachment(
+            db,
+            file_path=build_public_url(stored_path),
+            original_name=original_name,
+            content_type=payload.content_type or mimetypes.guess_type(original_name)[0],
+            uploader_id=current_user.id,
+            checksum=None,
+            size=size,
+        )
     except Exception:
-        if disk_path.exists():
-            disk_path.unlink(missing_ok=True)
+        await run_in_threadpool(storage.delete, stored_path)
         raise HTTPException(status_code=500, detail="Datenbankfehler beim Speichern.")
 
-    return {"id": db_attachment.id, "url": public_url, "filename": db_attachment.filename}
+    return {
+        "id": db_attachment.id,
+        "url": db_attachment.file_path,
+        "filename": db_attachment.filename,
+        "size": size,
+    }
+
+
+def _tus_headers() -> Dict[str, str]:
+    return {"Tus-Resumable": TUS_VERSION, "Cache-Control": "no-store"}
+
+
+def _upload_headers(session: UploadSession) -> Dict[str, str]:
+    headers = _tus_headers()
+    headers["Upload-Offset"] = str(session.upload_offset)
+    headers["Upload-Length"] = str(session.upload_length)
+    headers["Upload-Expires"] = http_date(session.expires_at.replace(tzinfo=timezone.utc).timestamp())
+    if session.attachment_id is not None:
+        headers["X-Attachment-Id"] = str(session.attachment_id)
+    return headers
+
+
+def _parse_metadata(value: Optional[str]) -> Dict[str, str]:
+    # Upload-Metadata: "key base64wert,key2 base64wert2" (Werte optional)
+    metadata = {}
+    for pair in (value or "").split(","):
+        key, _, encoded = pair.strip().partition(" ")
+        if not key:
+            continue
+        try:
+            metadata[key] = base64.b64decode(encoded, validate=True).decode("utf-8")
+        except (ValueError, UnicodeDecodeError):
+            raise HTTPException(status_code=400, detail="Ungültige Upload-Metadata.")
+    return metadata
+
+
+def _max_resumable_size() -> int:
+    return int(settings.UPLOAD_RESUMABLE_MAX_SIZE_MB * 1024 * 1024)
+
+
+def _resumable_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(hours=settings.UPLOAD_RESUMABLE_EXPIRE_HOURS)
+
+
+async def _get_upload_session(db: AsyncSession, id: str, user_id: int) -> UploadSession:
+    session = await crud.upload_session.get_for_user(db, id=id, user_id=user_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload nicht gefunden.", headers=_tus_headers())
+    return session
+
+
+@router.options("/resumable")
+async def resumable_upload_options() -> Response:
+    """
+    tus-Discovery: unterstützte Version, Erweiterungen und maximale Größe.
+    """
+    headers = _tus_headers()
+    headers["Tus-Version"] = TUS_VERSION
+    headers["Tus-Extension"] = "creation,expiration,termination"
+    headers["Tus-Max-Size"] = str(_max_resumable_size())
+    return Response(status_code=204, headers=headers)
+
+
+@router.post("/resumable", status_code=201)
+async def create_resumable_upload(
+    request: Request,
+    upload_length: int = Header(...),
+    upload_metadata: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Response:
+    """
+    Legt einen fortsetzbaren Upload an (tus 1.0, Erweiterung "creation").
+
+    Dateiname und Typ kommen aus Upload-Metadata ("filename", "filetype"). Die Daten
+    werden danach per PATCH in beliebig vielen Teilen gesendet; nach Abbrüchen liefert
+    HEAD den Offset, ab dem fortgesetzt wird. Mit dem letzten Teil entsteht das
+    Attachment (Header X-Attachment-Id).
+    """
+    if upload_length <= 0:
+        raise HTTPException(status_code=400, detail="Leere Datei.")
+    if upload_length > _max_resumable_size():
+        raise HTTPException(status_code=413, detail="Datei ist zu groß.")
+
+    metadata = _parse_metadata(upload_metadata)
+    original_name, stored_filename = _new_stored_filename(metadata.get("filename"), current_user.id)
+    upload_id = secrets.token_hex(16)
+    part_path = upload_part_path(upload_id)
+    await run_in_threadpool(part_path.touch)
+    session = await crud.upload_session.create_limited(
+        db,
+        values={
+            "id": upload_id,
+            "user_id": current_user.id,
+            "filename": original_name,
+            "stored_filename": stored_filename,
+            "content_type": metadata.get("filetype"),
+            "upload_length": upload_length,
+            "upload_offset": 0,
+            "expires_at": _resumable_expiry(),
+        },
+        limit=settings.UPLOAD_RESUMABLE_MAX_SESSIONS,
+    )
+    if session is None:
+        await db.rollback()
+        await run_in_threadpool(part_path.unlink, missing_ok=True)
+        raise HTTPException(status_code=429, detail="Zu viele offene Uploads.")
+    await db.commit()
+
+    headers = _upload_headers(session)
+    headers["Location"] = str(request.url_for("get_resumable_upload", id=upload_id))
+    return Response(status_code=201, headers=headers)
+
+
+@router.head("/resumable/{id}", name="get_resumable_upload")
+async def get_resumable_upload(
+    id: str,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Response:
+    """
+    Stand eines fortsetzbaren Uploads: Upload-Offset ist die Anzahl gespeicherter Bytes.
+    """
+    session = await _get_upload_session(db, id, current_user.id)
+    return Response(status_code=200, headers=_upload_headers(session))
+
+
+@router.patch("/resumable/{id}", status_code=204)
+async def append_resumable_upload(
+    request: Request,
+    id: str,
+    upload_offset: int = Header(...),
+    content_type: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Response:
+    """
+    Hängt einen Teil ab `Upload-Offset` an. Der Offset muss dem gespeicherten Stand
+    entsprechen (sonst 409); je Upload schreibt nur ein Request gleichzeitig, mehrere
+    Uploads laufen unabhängig voneinander. Bei einem Verbindungsabbruch bleiben die
+    bis dahin empfangenen Bytes erhalten.
+    """
+    if (content_type or "").split(";")[0].strip() != "application/offset+octet-stream":
+        raise HTTPException(status_code=415, detail="Content-Type muss application/offset+octet-stream sein.")
+    session = await _get_upload_session(db, id, current_user.id)
+    if upload_offset != session.upload_offset or session.attachment_id is not None:
+        raise HTTPException(status_code=409, detail="Offset stimmt nicht.", headers=_upload_headers(session))
+    lease_seconds = settings.UPLOAD_RESUMABLE_LEASE_SECONDS
+    if not await crud.upload_session.acquire(
+        db, id=id, offset=upload_offset, lease_seconds=lease_seconds
+    ):
+        raise HTTPException(status_code=409, detail="Upload wird gerade geschrieben.", headers=_upload_headers(session))
+
+    part_path = upload_part_path(id)
+    offset = upload_offset
+    renewed = time.monotonic()
+    out: Optional[BinaryIO] = None
+    try:
+        out = await run_in_threadpool(part_path.open, "r+b")
+        # Bytes eines abgebrochenen Schreibers hinter dem Offset verwerfen
+        await run_in_threadpool(out.seek, offset)
+        await run_in_threadpool(out.truncate)
+        buffer = bytearray()
+        try:
+            async for chunk in request.stream():
+                if offset + len(buffer) + len(chunk) > session.upload_length:
+                    raise HTTPException(status_code=413, detail="Mehr Daten als Upload-Length.")
+                buffer += chunk
+                if len(buffer) >= WRITE_BUFFER_SIZE:
+                    await run_in_threadpool(out.write, bytes(buffer))
+                    offset += len(buffer)
+                    buffer.clear()
+                    if time.monotonic() - renewed > lease_seconds / 3:
+                        await crud.upload_session.renew(db, id=id, lease_seconds=lease_seconds)
+                        renewed = time.monotonic()
+        except ClientDisconnect:
+            pass
+        if buffer:
+            await run_in_threadpool(out.write, bytes(buffer))
+            offset += len(buffer)
+        await run_in_threadpool(out.close)
+    except Exception:
+        if out is not None:
+            out.close()
+        await crud.upload_session.release(db, id=id, offset=offset, expires_at=_resumable_expiry())
+        raise
+
+    attachment = None
+    if offset == session.upload_length:
+        # Letzter Teil: Prüfsumme bilden und wie ein normaler Upload ablegen
+        try:
+            checksum = await run_in_threadpool(sha256_file, part_path)
+        except OSError:
+            await crud.upload_session.release(db, id=id, offset=0, expires_at=datetime.utcnow())
+            raise HTTPException(status_code=500, detail="Upload fehlgeschlagen.")
+        try:
+            attachment = await _save_attachment(
+                db,
+                disk_path=part_path,
+                original_name=session.filename,
+                stored_path=sharded_relative_path(session.stored_filename),
+                content_type=session.content_type,
+                uploader_id=current_user.id,
+                checksum=checksum,
+                size=offset,
+            )
+        except HTTPException:
+            # Teildatei ist verworfen: Upload sofort verfallen lassen
+            await crud.upload_session.release(db, id=id, offset=0, expires_at=datetime.utcnow())
+            raise
+
+    await crud.upload_session.release(
+        db,
+        id=id,
+        offset=offset,
+        expires_at=_resumable_expiry(),
+        attachment_id=attachment.id if attachment is not None else None,
+    )
+    headers = _upload_headers(session)
+    headers["Upload-Offset"] = str(offset)
+    if attachment is not None:
+        headers["X-Attachment-Id"] = str(attachment.id)
+        headers["X-Attachment-Url"] = attachment.file_path
+    return Response(status_code=204, headers=headers)
+
+
+@router.delete("/resumable/{id}", status_code=204)
+async def terminate_resumable_upload(
+    id: str,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Response:
+    """
+    Bricht einen fortsetzbaren Upload ab und verwirft die empfangenen Daten
+    (tus-Erweiterung "termination"). Ein abgeschlossener Upload behält sein Attachment.
+    """
+    session = await _get_upload_session(db, id, current_user.id)
+    if session.attachment_id is None and not await crud.upload_session.acquire(
+        db, id=id, offset=session.upload_offset, lease_seconds=settings.UPLOAD_RESUMABLE_LEASE_SECONDS
+    ):
+        raise HTTPException(status_code=409, detail="Upload wird gerade geschrieben.", headers=_tus_headers())
+    await crud.upload_session.release(
+        db,
+        id=id,
+        offset=session.upload_offset,
+        expires_at=datetime.utcnow(),
+        attachment_id=session.attachment_id,
+    )
+    await run_in_threadpool(upload_part_path(id).unlink, missing_ok=True)
+    return Response(status_code=204, headers=_tus_headers())
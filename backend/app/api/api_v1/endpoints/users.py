@@ -2,33 +2,41 @@ from typing import Any, List
 from fastapi import APIRouter, Body, Depends, HTTPException
 from fastapi.encoders import jsonable_encoder
 from pydantic.networks import EmailStr
-from sqlalchemy.orm import Session
-from app import crud, models, schemas
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import crud, schemas
 from app.api import deps
+from app.core.security import PasswordHashingBusy
 
 router = APIRouter()
 
 @router.post("/", response_model=schemas.User)
-def create_user(
+async def create_user(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     user_in: schemas.UserCreate,
 ) -> Any:
     """
     Neuen Benutzer erstellen (Registrierung).
     """
-    user = crud.user.get_by_email(db, email=user_in.email)
+    user = await crud.user.get_by_email(db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this username already exists in the system.",
         )
-    user = crud.user.create(db, obj_in=user_in)
+    try:
+        user = await crud.user.create(db, obj_in=user_in)
+    except PasswordHashingBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Server ausgelastet, bitte später erneut versuchen.",
+            headers={"Retry-After": "1"},
+        )
     return user
 
 @router.get("/me", response_model=schemas.User)
-def read_user_me(
-    current_user: models.User = Depends(deps.get_current_user),
+async def read_user_me(
+    current_user: schemas.User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Aktuellen Benutzer abrufen.
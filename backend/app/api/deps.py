@@ -1,50 +1,161 @@
-from typing import Generator
+import secrets
+import time
+from typing import AsyncGenerator, Optional
 
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi import Depends, HTTPException, Query, Request, Response, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer, OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud, models, schemas
 from app.core import security
+from app.core.cache import auth_user_cache
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.db.session import new_session
+from app.utils.downloads import etag_matches
 
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
 )
+optional_oauth2 = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/login/access-token", auto_error=False
+)
+metrics_bearer = HTTPBearer(auto_error=False)
 
 
-def get_db() -> Generator:
+async def get_db() -> AsyncGenerator:
     """
     Erstellt eine neue Datenbanksitzung für jede Anfrage und schließt sie danach.
     """
+    db = new_session()
     try:
-        db = SessionLocal()
         yield db
     finally:
-        db.close()
+        await db.close()
 
 
-def get_current_user(
-    db: Session = Depends(get_db),
-    token: str = Depends(reusable_oauth2),
-) -> models.User:
+async def get_read_db() -> AsyncGenerator:
     """
-    Holt den aktuellen Benutzer basierend auf dem Token.
+    Wie get_db, aber über die Lese-Engine (schreibgeschützt, falls konfiguriert).
+    Nur für Endpunkte, die ausschließlich lesen.
     """
+    db = new_session(read_only=True)
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+def _invalid_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Token ist ungültig oder abgelaufen.",
+    )
+
+
+async def _user_from_token(
+    db: AsyncSession, token: str, *, token_type: Optional[str] = None
+) -> schemas.User:
+    # token_type: erwarteter "typ"-Claim (None = Access Token, "stream" = Stream-Ticket)
+    cached = auth_user_cache.get(token)
+    if cached is not None:
+        if cached[0].get("typ") != token_type:
+            raise _invalid_token()
+        return cached[1]
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
         token_data = schemas.TokenPayload(**payload)
     except (JWTError, ValidationError):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Token ist ungültig oder abgelaufen.",
-        )
+        raise _invalid_token()
+    if payload.get("typ") != token_type:
+        raise _invalid_token()
 
-    user = crud.user.get(db, id=token_data.sub)
+    user = await crud.user.get(db, id=token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="Benutzer nicht gefunden.")
-    return user
+
+    snapshot = schemas.User.model_validate(user)
+    if "exp" in payload:
+        auth_user_cache.set(token, (payload, snapshot), ttl=payload["exp"] - time.time())
+    return snapshot
+
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(reusable_oauth2),
+) -> schemas.User:
+    """
+    Holt den aktuellen Benutzer basierend auf dem Token.
+
+    Geliefert wird ein von der Sitzung losgelöster Snapshot, der pro Token bis zum
+    Ablauf von AUTH_CACHE_TTL_SECONDS (höchstens bis zum Token-Ablauf) gecacht wird.
+    """
+    return await _user_from_token(db, token)
+
+
+async def get_stream_user(
+    token: Optional[str] = Depends(optional_oauth2),
+    ticket: Optional[str] = Query(default=None),
+) -> schemas.User:
+    """
+    Wie get_current_user, für langlebige Streams (Server-Sent Events).
+
+    Da EventSource keine eigenen Header senden kann, wird alternativ ein kurzlebiges
+    Ticket aus POST /tasks/events/ticket als Query-Parameter `ticket` akzeptiert; das
+    Access Token selbst landet so nie in URLs oder Zugriffsprotokollen. Die
+    Datenbanksitzung wird sofort wieder geschlossen, damit der Stream keine
+    Verbindung blockiert.
+    """
+    if not token and not ticket:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Nicht authentifiziert.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    db = new_session()
+    try:
+        if token:
+            return await _user_from_token(db, token)
+        return await _user_from_token(db, ticket, token_type=security.STREAM_TICKET_TYPE)
+    finally:
+        await db.close()
+
+
+async def check_list_etag(
+    request: Request, response: Response, db: AsyncSession, *, owner_id: int
+) -> Optional[Response]:
+    """
+    Setzt den schwachen ETag (Listenversion des Benutzers) auf die Antwort.
+
+    Passt If-None-Match, wird eine 304-Antwort geliefert, die der Endpunkt direkt
+    zurückgeben soll, ohne die Liste abzufragen.
+    """
+    version = await crud.task_stats.get_version(db, owner_id=owner_id)
+    etag = f'W/"{owner_id}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def verify_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(metrics_bearer),
+) -> None:
+    """
+    Schützt /metrics mit METRICS_TOKEN. Ohne konfiguriertes Token gibt es den
+    Endpunkt nicht (404), damit interne Kennzahlen nie versehentlich offen liegen.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode("utf-8"), settings.METRICS_TOKEN.encode("utf-8")
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Ungültiges Metrik-Token.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
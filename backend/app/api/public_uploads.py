@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app import crud
+from app.api import deps
+from app.utils.storage import build_public_url, get_storage
+
+
+# Öffentliche Datei-URLs (UPLOAD_PUBLIC_PREFIX) bei entfernten Speichern, eingebunden in main.py
+router = APIRouter()
+
+
+@router.get("/{key:path}", include_in_schema=False)
+async def public_upload(key: str, db: AsyncSession = Depends(deps.get_read_db)) -> RedirectResponse:
+    """
+    Leitet auf eine vorsignierte URL weiter; die Daten kommen direkt vom Speicher.
+
+    Nur für gespeicherte Anhänge bzw. Blobs, nie für laufende Uploads (INCOMING_DIR)
+    oder andere Objekte unter dem Schlüsselpräfix.
+    """
+    filename = None
+    if not any(part in ("", "..") or part.startswith(".") for part in key.split("/")):
+        filename = await crud.attachment.stored_filename(db, file_path=build_public_url(key))
+    if filename is None:
+        raise HTTPException(status_code=404, detail="Datei nicht gefunden.")
+    url = await run_in_threadpool(get_storage().presigned_get, key, filename=filename, content_type=None)
+    return RedirectResponse(url, status_code=307, headers={"Cache-Control": "private, no-store"})
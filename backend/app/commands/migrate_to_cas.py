@@ -0,0 +1,168 @@
+"""
+Überführt bestehende Uploads aus dem flachen uploads/-Verzeichnis in den
+inhaltsadressierten Speicher (UPLOAD_STORAGE_MODE="cas").
+
+Aufruf (im backend-Verzeichnis):
+    python -m app.commands.migrate_to_cas [--batch-size 500] [--dry-run]
+
+Der Lauf ist wiederholbar: bereits migrierte Attachments (blob_id gesetzt) werden
+übersprungen, alte Dateien erst nach dem Commit des jeweiligen Batches entfernt.
+"""
+import argparse
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.db.migrations import init_schema
+from app.db.session import SessionLocal, engine
+from app.models.attachment import Attachment
+from app.models.blob import Blob
+from app.models.task import Task
+from app.models.task_stats import TaskStats
+from app.utils.downloads import sha256_file
+from app.utils.storage import (
+    build_public_url,
+    cas_relative_path,
+    disk_path_from_attachment_value,
+    get_storage,
+    store_blob_file,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def _owner_version(owner_id) -> Any:
+    return func.coalesce(
+        select(TaskStats.version).where(TaskStats.owner_id == owner_id).scalar_subquery(), 0
+    )
+
+
+def _attachment_owner() -> Any:
+    # Besitzer eines Anhangs: Besitzer der Aufgabe, sonst der Uploader
+    return func.coalesce(
+        select(Task.owner_id).where(Task.id == Attachment.task_id).scalar_subquery(),
+        Attachment.uploader_id,
+    )
+
+
+def bump_owner_versions(db: Session, attachment_ids: List[int]) -> None:
+    """
+    Erhöht die Listenversion (ETag) nur der Besitzer der übergebenen Anhänge.
+    """
+    owners = select(_attachment_owner()).where(Attachment.id.in_(attachment_ids))
+    db.execute(
+        update(TaskStats)
+        .where(TaskStats.owner_id.in_(owners))
+        .values(version=TaskStats.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def stamp_sync_versions(db: Session, attachment_ids: List[int]) -> None:
+    owner = _attachment_owner()
+    db.execute(
+        update(Attachment)
+        .where(Attachment.id.in_(attachment_ids))
+        .values(sync_version=_owner_version(owner))
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(Task)
+        .where(Task.id.in_(select(Attachment.task_id).where(Attachment.id.in_(attachment_ids))))
+        .values(sync_version=_owner_version(Task.owner_id))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def migrate(*, batch_size: int = 500, dry_run: bool = False) -> Dict[str, int]:
+    init_schema(engine)
+    stats: Counter = Counter()
+    last_id = 0
+
+    if not get_storage().local:
+        logger.warning("Nur für den lokalen Speicher (STORAGE_BACKEND='local').")
+        return dict(stats)
+
+    while True:
+        with SessionLocal() as db:
+            batch = db.scalars(
+                select(Attachment)
+                .where(Attachment.blob_id.is_(None), Attachment.id > last_id)
+                .order_by(Attachment.id)
+                .limit(batch_size)
+            ).all()
+            if not batch:
+                break
+
+            obsolete: List[Path] = []
+            migrated_ids: List[int] = []
+            for attachment in batch:
+                last_id = attachment.id
+                source = disk_path_from_attachment_value(attachment.file_path)
+                if not source.is_file():
+                    stats["missing"] += 1
+                    continue
+
+                sha256 = attachment.checksum or sha256_file(source)
+                relative = cas_relative_path(sha256, source.suffix)
+                blob = db.scalar(select(Blob).where(Blob.sha256 == sha256))
+                stats["deduplicated" if blob is not None else "blobs_created"] += 1
+                stats["migrated"] += 1
+                if dry_run:
+                    continue
+
+                # Quelle bleibt bis zum Commit erhalten (Hardlink bzw. Kopie)
+                target = store_blob_file(source, relative, keep_source=True)
+                if blob is None:
+                    blob = Blob(
+                        sha256=sha256,
+                        size=target.stat().st_size,
+                        file_path=build_public_url(relative),
+                        refcount=0,
+                    )
+                    db.add(blob)
+                    db.flush()
+
+                blob.refcount += 1
+                attachment.blob_id = blob.id
+                attachment.file_path = blob.file_path
+                attachment.checksum = sha256
+                attachment.file_size = blob.size
+                migrated_ids.append(attachment.id)
+                if source != target:
+                    obsolete.append(source)
+
+            if dry_run:
+                continue
+            # Neue Datei-URLs ändern die Listen der Besitzer: deren Listenversionen (ETags)
+            # verwerfen und die betroffenen Zeilen für Delta-Sync-Clients neu stempeln
+            if migrated_ids:
+                bump_owner_versions(db, migrated_ids)
+                stamp_sync_versions(db, migrated_ids)
+            db.commit()
+
+        for path in obsolete:
+            path.unlink(missing_ok=True)
+        logger.info("... bis Attachment #%s: %s", last_id, dict(stats))
+
+    return dict(stats)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Uploads in den CAS-Speicher überführen.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Nur zählen, nichts verändern.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    stats = migrate(batch_size=args.batch_size, dry_run=args.dry_run)
+    logger.info("Fertig: %s", stats)
+
+
+if __name__ == "__main__":
+    main()
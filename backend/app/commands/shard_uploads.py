@@ -0,0 +1,135 @@
+"""
+Verteilt bestehende Uploads aus dem flachen uploads/-Verzeichnis auf das
+verteilte Layout ("ab/cd/<name>", siehe UPLOAD_SHARD_DEPTH) und schreibt
+Attachment.file_path um.
+
+Aufruf (im backend-Verzeichnis):
+    python -m app.commands.shard_uploads [--batch-size 500] [--dry-run]
+
+Der Lauf ist inkrementell und jederzeit wiederholbar: je Batch wird die neue Datei
+zuerst per Hardlink (bzw. Kopie) angelegt, dann die Zeilen committet und erst danach
+die alte Datei entfernt. Bereits verteilte Attachments werden übersprungen; eine nach
+einem Abbruch schon vorhandene Zieldatei wird übernommen. CAS-Attachments (blob_id
+gesetzt) liegen bereits verteilt und bleiben unverändert.
+"""
+import argparse
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+from sqlalchemy import select, update
+
+from app.commands.migrate_to_cas import bump_owner_versions, stamp_sync_versions
+from app.core.config import settings
+from app.db.migrations import init_schema
+from app.db.session import SessionLocal, engine
+from app.models.attachment import Attachment
+from app.utils.storage import (
+    build_public_url,
+    disk_path_from_attachment_value,
+    get_storage,
+    sharded_relative_path,
+    store_blob_file,
+    stored_relative_path,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def migrate(*, batch_size: int = 500, dry_run: bool = False) -> Dict[str, int]:
+    init_schema(engine)
+    stats: Counter = Counter()
+    last_id = 0
+
+    if not get_storage().local:
+        logger.warning("Nur für den lokalen Speicher (STORAGE_BACKEND='local').")
+        return dict(stats)
+
+    if settings.UPLOAD_SHARD_DEPTH == 0:
+        logger.info("UPLOAD_SHARD_DEPTH ist 0: nichts zu tun.")
+        return dict(stats)
+
+    while True:
+        with SessionLocal() as db:
+            rows = db.execute(
+                select(Attachment.id, Attachment.file_path)
+                .where(Attachment.blob_id.is_(None), Attachment.id > last_id)
+                .order_by(Attachment.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            obsolete: List[Path] = []
+            migrated_ids: List[int] = []
+            for attachment_id, file_path in rows:
+                last_id = attachment_id
+                relative = stored_relative_path(file_path)
+                if relative is None:
+                    stats["outside_upload_dir"] += 1
+                    continue
+                if "/" in relative:
+                    stats["already_sharded"] += 1
+                    continue
+
+                source = disk_path_from_attachment_value(file_path)
+                target_relative = sharded_relative_path(relative)
+                target = settings.upload_dir_abs / target_relative
+                if not source.is_file() and not target.is_file():
+                    stats["missing"] += 1
+                    continue
+
+                if dry_run:
+                    stats["migrated"] += 1
+                    continue
+
+                if source.is_file():
+                    # Quelle bleibt bis zum Commit erhalten (Hardlink bzw. Kopie)
+                    store_blob_file(source, target_relative, keep_source=True)
+                # Nur umschreiben, wenn die Zeile zwischenzeitlich nicht geändert oder
+                # gelöscht wurde; sonst gehört die neue Datei niemandem
+                result = db.execute(
+                    update(Attachment)
+                    .where(Attachment.id == attachment_id, Attachment.file_path == file_path)
+                    .values(file_path=build_public_url(target_relative))
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount:
+                    stats["migrated"] += 1
+                    migrated_ids.append(attachment_id)
+                    obsolete.append(source)
+                else:
+                    stats["changed_concurrently"] += 1
+                    target.unlink(missing_ok=True)
+
+            if dry_run:
+                continue
+            if migrated_ids:
+                # Neue Datei-URLs ändern die Listen der Besitzer: deren Listenversionen (ETags)
+                # verwerfen und die betroffenen Zeilen für Delta-Sync-Clients neu stempeln
+                bump_owner_versions(db, migrated_ids)
+                stamp_sync_versions(db, migrated_ids)
+            db.commit()
+
+        for path in obsolete:
+            path.unlink(missing_ok=True)
+        logger.info("... bis Attachment #%s: %s", last_id, dict(stats))
+
+    return dict(stats)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Uploads auf das verteilte Layout umstellen.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Nur zählen, nichts verändern.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    stats = migrate(batch_size=args.batch_size, dry_run=args.dry_run)
+    logger.info("Fertig: %s", stats)
+
+
+if __name__ == "__main__":
+    main()
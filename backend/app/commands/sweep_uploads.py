@@ -0,0 +1,86 @@
+"""
+Entfernt verwaiste Uploads (nie mit einer Aufgabe verknüpft), abgelaufene
+fortsetzbare Uploads sowie alte Tombstones (SYNC_TOMBSTONE_TTL_DAYS) und gleicht
+das Upload-Verzeichnis mit der Datenbank ab.
+
+Aufruf (im backend-Verzeichnis):
+    python -m app.commands.sweep_uploads [--ttl-hours 24] [--batch-size 500]
+        [--max-seconds 300] [--reconcile] [--delete-files] [--dry-run]
+
+Ohne --delete-files werden Dateien ohne Datenbankeintrag nur gezählt, mit werden sie
+über die Löschwarteschlange entfernt. Attachments ohne Datei werden immer nur gemeldet. Mit --dry-run wird nichts verändert.
+"""
+import argparse
+import asyncio
+import logging
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.file_deletion import drain_file_deletions
+from app.core.sweeper import expire_upload_sessions, prune_tombstones, reconcile, sweep_orphans
+from app.db.migrations import init_schema
+from app.db.session import dispose_engines, engine
+
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Verwaiste Uploads aufräumen.")
+    parser.add_argument("--ttl-hours", type=int, default=settings.UPLOAD_ORPHAN_TTL_HOURS)
+    parser.add_argument("--batch-size", type=int, default=settings.UPLOAD_SWEEP_BATCH_SIZE)
+    parser.add_argument("--max-seconds", type=float, default=settings.UPLOAD_SWEEP_MAX_SECONDS)
+    parser.add_argument("--reconcile", action="store_true", help="Verzeichnis und Datenbank abgleichen.")
+    parser.add_argument(
+        "--grace-seconds", type=int, default=settings.UPLOAD_RECONCILE_GRACE_SECONDS
+    )
+    parser.add_argument(
+        "--delete-files", action="store_true", help="Dateien ohne Datenbankeintrag löschen."
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Nur zählen, nichts verändern.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    init_schema(engine)
+
+    async def run() -> None:
+        try:
+            orphans = await sweep_orphans(
+                ttl_hours=args.ttl_hours,
+                batch_size=args.batch_size,
+                max_seconds=args.max_seconds,
+                dry_run=args.dry_run,
+            )
+            expired = pruned = 0
+            if not args.dry_run:
+                expired = await expire_upload_sessions(batch_size=args.batch_size)
+                pruned = await prune_tombstones(
+                    ttl_days=settings.SYNC_TOMBSTONE_TTL_DAYS, batch_size=args.batch_size
+                )
+            stats = None
+            if args.reconcile:
+                stats = await run_in_threadpool(
+                    reconcile,
+                    batch_size=args.batch_size,
+                    max_seconds=args.max_seconds,
+                    grace_seconds=args.grace_seconds,
+                    delete_files=args.delete_files and not args.dry_run,
+                )
+            # Ohne laufenden Server gibt es keinen Worker, der die Dateien entfernt
+            deleted = await drain_file_deletions() if not args.dry_run else {}
+        finally:
+            await dispose_engines()
+        logger.info("Verwaiste Uploads: %s", orphans)
+        logger.info("Abgelaufene fortsetzbare Uploads: %s", expired)
+        logger.info("Entfernte Tombstones: %s", pruned)
+        if stats is not None:
+            logger.info("Abgleich: %s", stats)
+        if deleted:
+            logger.info("Gelöschte Dateien: %s", deleted)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from app.core.config import settings
+
+
+class TTLCache:
+    """
+    Begrenzter LRU-Cache mit Ablaufzeit pro Eintrag und Treffer-/Fehlzählern.
+
+    Mit `group` (Wert -> Gruppenschlüssel) lassen sich alle Einträge einer Gruppe,
+    z.B. alle Tokens eines Benutzers, per discard_group gezielt verwerfen.
+    """
+
+    def __init__(
+        self, maxsize: int, ttl: float, group: Optional[Callable[[Any], Hashable]] = None
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._group = group
+        self._groups: Dict[Hashable, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+
+    def _remove(self, key: Hashable) -> None:
+        # Nur unter self._lock aufrufen
+        item = self._data.pop(key, None)
+        if item is not None and self._group is not None:
+            self._unindex(key, item[1])
+
+    def _unindex(self, key: Hashable, value: Any) -> None:
+        group_key = self._group(value)
+        members = self._groups.get(group_key)
+        if members is not None:
+            members.discard(key)
+            if not members:
+                del self._groups[group_key]
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (time.monotonic() + ttl, value)
+            if self._group is not None:
+                self._groups.setdefault(self._group(value), set()).add(key)
+            while len(self._data) > self.maxsize:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def discard_group(self, group_key: Hashable) -> int:
+        """
+        Entfernt alle Einträge der Gruppe. Gibt die Anzahl zurück.
+        """
+        with self._lock:
+            keys = self._groups.pop(group_key, set())
+            for key in keys:
+                self._data.pop(key, None)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._groups.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+# Cache für authentifizierte Benutzer: Token -> (Token-Payload, Benutzer-Snapshot),
+# gruppiert nach Benutzer-ID
+auth_user_cache = TTLCache(
+    maxsize=settings.AUTH_CACHE_MAX_SIZE,
+    ttl=settings.AUTH_CACHE_TTL_SECONDS,
+    group=lambda entry: entry[1].id,
+)
+
+
+# Version der Task-/Anhangsliste pro Benutzer: owner_id -> Versionszähler
+task_version_cache = TTLCache(
+    maxsize=settings.TASK_VERSION_CACHE_MAX_SIZE,
+    ttl=settings.TASK_VERSION_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """
+    Verwirft alle gecachten Tokens eines Benutzers (z.B. nach Änderung von Rechten oder Passwort).
+    """
+    auth_user_cache.discard_group(user_id)
@@ -0,0 +1,223 @@
+import zlib
+from typing import Iterable, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli ist optional
+    brotli = None
+
+
+# Bereits komprimierte Formate (Bilder, PDF, Office-Dateien als ZIP, Archive) und
+# Server-Sent Events, die ohne Pufferung beim Client ankommen müssen
+EXCLUDED_CONTENT_TYPES = (
+    "image/png",
+    "image/jpeg",
+    "image/gif",
+    "image/webp",
+    "application/pdf",
+    "application/zip",
+    "application/gzip",
+    "application/msword",
+    "application/vnd.openxmlformats-officedocument",
+    "audio/",
+    "video/",
+    "text/event-stream",
+)
+
+
+class _Compressor:
+    """
+    Einheitliche Schnittstelle für gzip und brotli. `chunk` liefert sofort
+    dekodierbare Daten (Sync-Flush), damit gestreamte Antworten nicht gepuffert werden.
+    """
+
+    def __init__(self, encoding: str, *, gzip_level: int, brotli_quality: int) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31: zlib-Stream mit gzip-Header und -Prüfsumme
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH)
+
+
+def _accepted_encodings(accept_encoding: str) -> List[str]:
+    # Kodierungen mit q > 0 aus Accept-Encoding
+    accepted = []
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.append(name.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Komprimiert Antworten mit brotli (falls installiert und vom Client akzeptiert)
+    oder gzip.
+
+    Antworten unter `minimum_size` Bytes, Teilinhalte (206), bereits kodierte und
+    bereits komprimierte Formate bleiben unkomprimiert; komprimierbare Inhalte tragen
+    dabei trotzdem "Vary: Accept-Encoding". Unter `upload_prefix` werden
+    zusätzlich Dateien mit den Endungen aus `excluded_extensions` durchgereicht.
+    Gestreamte Antworten werden Stück für Stück komprimiert, ohne sie zu puffern.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        upload_prefix: str = "",
+        excluded_extensions: Iterable[str] = (),
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.upload_prefix = upload_prefix.rstrip("/")
+        self.excluded_extensions = tuple(ext.lower() for ext in excluded_extensions)
+
+    def _choose_encoding(self, scope: Scope) -> Optional[str]:
+        accepted = _accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and ("br" in accepted or "*" in accepted):
+            return "br"
+        if "gzip" in accepted or "*" in accepted:
+            return "gzip"
+        return None
+
+    def _excluded_path(self, path: str) -> bool:
+        if not self.upload_prefix or not path.startswith(self.upload_prefix + "/"):
+            return False
+        return path.lower().endswith(self.excluded_extensions)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        if self._excluded_path(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        # Auch ohne passende Kodierung durch den Responder: er setzt Vary
+        responder = _CompressionResponder(self, self._choose_encoding(scope), send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(
+        self, middleware: CompressionMiddleware, encoding: Optional[str], send: Send
+    ) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.started = False
+
+    def _negotiable(self, headers: Headers) -> bool:
+        # Komprimierbarer Inhalt: die Darstellung hängt von Accept-Encoding ab, auch
+        # wenn diese Antwort (zu klein, Teilinhalt, Client ohne gzip) unkomprimiert bleibt
+        status = self.start_message["status"]
+        if status < 200 or status in (204, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").lower()
+        return not content_type.startswith(EXCLUDED_CONTENT_TYPES)
+
+    def _compressible(self, headers: Headers, first_body: bytes, more_body: bool) -> bool:
+        if self.encoding is None:
+            return False
+        if self.start_message["status"] == 206 or "content-range" in headers:
+            return False
+        if not more_body:
+            return len(first_body) >= self.middleware.minimum_size
+        # Gestreamt: nur bei bekannter, zu kleiner Länge unkomprimiert lassen
+        content_length = headers.get("content-length")
+        return not (
+            content_length is not None
+            and content_length.isdigit()
+            and int(content_length) < self.middleware.minimum_size
+        )
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Erst mit dem ersten Body-Teil entscheiden, ob komprimiert wird
+            self.start_message = message
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.started:
+            if self.compressor is None or message_type != "http.response.body":
+                await self._send(message)
+                return
+        else:
+            self.started = True
+            headers = MutableHeaders(raw=list(self.start_message["headers"]))
+            self.start_message["headers"] = headers.raw
+            negotiable = self._negotiable(headers)
+            if negotiable:
+                headers.add_vary_header("Accept-Encoding")
+            # Andere Nachrichten (z.B. zerocopysend) tragen keinen Body zum Komprimieren:
+            # den zurückgehaltenen Start vorher unverändert senden
+            if (
+                message_type != "http.response.body"
+                or not negotiable
+                or not self._compressible(headers, body, more_body)
+            ):
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+
+            self.compressor = _Compressor(
+                self.encoding,
+                gzip_level=self.middleware.gzip_level,
+                brotli_quality=self.middleware.brotli_quality,
+            )
+            headers["Content-Encoding"] = self.encoding
+            # Komprimierte Darstellung: Byte-Bereiche und starke ETags gelten nicht mehr
+            if "accept-ranges" in headers:
+                del headers["Accept-Ranges"]
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag
+
+            if not more_body:
+                data = self.compressor.finish(body)
+                headers["Content-Length"] = str(len(data))
+                await self._send(self.start_message)
+                await self._send({"type": "http.response.body", "body": data})
+                return
+
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            await self._send(self.start_message)
+
+        data = self.compressor.chunk(body) if more_body else self.compressor.finish(body)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
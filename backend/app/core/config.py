@@ -1,7 +1,7 @@
 import os
 import json
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -40,8 +40,79 @@ class Settings(BaseSettings):
 
     SECRET_KEY: str = Field(default="CHANGETHISINPRODUCTIONSUPERSECRETKEY")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=60 * 24 * 8)
+    # Cache für authentifizierte Benutzer (0 deaktiviert den Cache). Er gilt pro Prozess:
+    # Änderungen am Benutzer verwerfen ihn nur im eigenen Worker, andere Worker bedienen
+    # den alten Stand bis zu AUTH_CACHE_TTL_SECONDS weiter
+    AUTH_CACHE_TTL_SECONDS: int = Field(default=60)
+    AUTH_CACHE_MAX_SIZE: int = Field(default=1024)
+    # Cache der Listenversion pro Benutzer (ETag); begrenzt die Verzögerung zwischen Workern
+    TASK_VERSION_CACHE_TTL_SECONDS: int = Field(default=5)
+    TASK_VERSION_CACHE_MAX_SIZE: int = Field(default=10000)
+    # Zugang zu /metrics per "Authorization: Bearer <token>"; leer deaktiviert den Endpunkt
+    METRICS_TOKEN: str = Field(default="")
+
+    # Passwort-Hashing: bcrypt-Kostenfaktor und eigener, begrenzter Worker-Pool
+    BCRYPT_ROUNDS: int = Field(default=12)
+    PASSWORD_HASH_WORKERS: int = Field(default=2)
+    PASSWORD_HASH_QUEUE_SIZE: int = Field(default=16)
 
     SQLALCHEMY_DATABASE_URI: str = Field(default="sqlite:///./sql_app.db")
+    # Asynchroner DB-Zugriff (aiosqlite/asyncpg); False nutzt den synchronen Pfad, z.B. für Tests
+    DB_ASYNC: bool = Field(default=True)
+    # Optional explizite Async-URL, sonst aus SQLALCHEMY_DATABASE_URI abgeleitet
+    SQLALCHEMY_ASYNC_DATABASE_URI: Optional[str] = Field(default=None)
+
+    # Datenbank-Profil: Pool-Einstellungen (Postgres bzw. dateibasiertes SQLite)
+    DB_POOL_SIZE: int = Field(default=10)
+    DB_MAX_OVERFLOW: int = Field(default=20)
+    DB_POOL_TIMEOUT: int = Field(default=30)
+    DB_POOL_RECYCLE: int = Field(default=1800)
+    DB_POOL_PRE_PING: bool = Field(default=True)
+
+    # SQLite-Pragmas, werden bei jeder neuen Verbindung gesetzt
+    SQLITE_JOURNAL_MODE: str = Field(default="WAL")
+    SQLITE_SYNCHRONOUS: str = Field(default="NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS: int = Field(default=5000)
+    SQLITE_MMAP_SIZE: int = Field(default=256 * 1024 * 1024)
+    SQLITE_CACHE_SIZE_KB: int = Field(default=64 * 1024)
+
+    # Eigene Engine für lesende Endpunkte: explizite URL (z.B. Replica) oder bei SQLite
+    # eine zweite, schreibgeschützte Verbindung auf dieselbe Datei
+    DB_READ_ENGINE_ENABLED: bool = Field(default=False)
+    SQLALCHEMY_READ_DATABASE_URI: Optional[str] = Field(default=None)
+
+    # Änderungs-Events (/tasks/events): ohne Broker-URL nur innerhalb eines Workers,
+    # mit "redis://..." über Redis Pub/Sub an alle Worker (Paket "redis" erforderlich)
+    EVENTS_BROKER_URL: Optional[str] = Field(default=None)
+    EVENTS_CHANNEL: str = Field(default="task-events")
+    EVENTS_HEARTBEAT_SECONDS: int = Field(default=15)
+    # Gültigkeit der Tickets für EventSource (POST /tasks/events/ticket), statt des
+    # Access Tokens in der URL
+    EVENTS_TICKET_SECONDS: int = Field(default=30)
+    # Maximale Anzahl wartender Events pro Verbindung, danach muss der Client neu laden
+    EVENTS_QUEUE_SIZE: int = Field(default=100)
+    # Verlauf pro Benutzer für Last-Event-ID und Anzahl Benutzer mit Verlauf
+    EVENTS_REPLAY_SIZE: int = Field(default=200)
+    EVENTS_HISTORY_USERS: int = Field(default=10000)
+
+    # Antwortkomprimierung (gzip, brotli falls das Paket "brotli" installiert ist);
+    # kleinere Antworten als COMPRESSION_MINIMUM_SIZE Bytes bleiben unkomprimiert
+    COMPRESSION_ENABLED: bool = Field(default=True)
+    COMPRESSION_MINIMUM_SIZE: int = Field(default=1024)
+    COMPRESSION_GZIP_LEVEL: int = Field(default=6)
+    COMPRESSION_BROTLI_QUALITY: int = Field(default=4)
+    # Endungen unter UPLOAD_PUBLIC_PREFIX, die bereits komprimiert sind
+    COMPRESSION_EXCLUDED_EXTENSIONS: List[str] = Field(
+        default_factory=lambda: [".jpg", ".jpeg", ".png", ".gif", ".pdf", ".docx", ".zip"]
+    )
+
+    # Maximale Anzahl Elemente pro Batch-Anfrage (/tasks/batch)
+    TASK_BATCH_MAX_SIZE: int = Field(default=5000)
+    # Export/Import (/tasks/export, /tasks/import): Zeilen pro Block bzw. Bulk-INSERT
+    # und Anzahl gemeldeter Fehlerzeilen
+    TASK_EXPORT_BATCH_SIZE: int = Field(default=1000)
+    TASK_IMPORT_BATCH_SIZE: int = Field(default=1000)
+    TASK_IMPORT_MAX_ERRORS: int = Field(default=100)
 
     CORS_ORIGINS: List[str] = Field(
         default_factory=lambda: ["http://localhost:5173", "http://127.0.0.1:5173"]
@@ -49,10 +120,64 @@ class Settings(BaseSettings):
 
     UPLOAD_DIR: str = Field(default="uploads")
     UPLOAD_PUBLIC_PREFIX: str = Field(default="/uploads")
+    # Öffentlicher StaticFiles-Mount ohne Berechtigungsprüfung; Downloads laufen sonst
+    # über /attachments/{id}/download
+    UPLOAD_PUBLIC_MOUNT: bool = Field(default=True)
     UPLOAD_ALLOWED_EXTENSIONS: List[str] = Field(
         default_factory=lambda: [".jpg", ".jpeg", ".png", ".gif", ".pdf", ".txt", ".doc", ".docx"]
     )
     UPLOAD_MAX_SIZE_MB: int = Field(default=5)
+    # "flat": eine Datei pro Upload, "cas": inhaltsadressiert und dedupliziert (SHA-256)
+    UPLOAD_STORAGE_MODE: str = Field(default="flat")
+    # Verzeichnisebenen für neue Uploads im flat-Modus ("ab/cd/<name>" bei 2, aus dem
+    # SHA-256 des Dateinamens); 0 = alles direkt in UPLOAD_DIR (bisheriges Layout)
+    UPLOAD_SHARD_DEPTH: int = Field(default=2, ge=0, le=4)
+
+    # Fortsetzbare Uploads (tus, /upload/resumable): eigene Größengrenze, Verfall ohne
+    # Aktivität, gleichzeitig offene Uploads pro Benutzer und Sperrfrist eines PATCH
+    UPLOAD_RESUMABLE_MAX_SIZE_MB: int = Field(default=1024)
+    UPLOAD_RESUMABLE_EXPIRE_HOURS: int = Field(default=24)
+    UPLOAD_RESUMABLE_MAX_SESSIONS: int = Field(default=10)
+    UPLOAD_RESUMABLE_LEASE_SECONDS: int = Field(default=120)
+
+    # Ablage der Dateien: "local" (UPLOAD_DIR) oder "s3" (S3-kompatibel, z.B. MinIO;
+    # erfordert boto3). Mit "s3" übertragen Clients die Daten über vorsignierte URLs
+    # direkt; ohne Zugangsdaten gilt die Standardkette von boto3.
+    STORAGE_BACKEND: str = Field(default="local")
+    S3_BUCKET: Optional[str] = Field(default=None)
+    S3_ENDPOINT_URL: Optional[str] = Field(default=None)
+    S3_REGION: Optional[str] = Field(default=None)
+    S3_ACCESS_KEY_ID: Optional[str] = Field(default=None)
+    S3_SECRET_ACCESS_KEY: Optional[str] = Field(default=None)
+    S3_KEY_PREFIX: str = Field(default="")
+    # "path" für MinIO und andere Server ohne virtuelle Hosts
+    S3_ADDRESSING_STYLE: str = Field(default="auto")
+    S3_PRESIGN_EXPIRES_SECONDS: int = Field(default=900)
+
+    # Warteschlange für Dateilöschungen: Batchgröße, Abfrageintervall, Sperrfrist pro
+    # abgeholtem Auftrag, Basis für das Backoff und maximale Anzahl Versuche
+    FILE_DELETION_BATCH_SIZE: int = Field(default=200)
+    FILE_DELETION_POLL_SECONDS: int = Field(default=30)
+    FILE_DELETION_LEASE_SECONDS: int = Field(default=300)
+    FILE_DELETION_RETRY_SECONDS: int = Field(default=30)
+    FILE_DELETION_MAX_ATTEMPTS: int = Field(default=10)
+
+    # Aufräumen verwaister Uploads (nie verknüpft, älter als UPLOAD_ORPHAN_TTL_HOURS);
+    # läuft alle UPLOAD_SWEEP_INTERVAL_SECONDS im Hintergrund (0 = nur per Kommando)
+    UPLOAD_ORPHAN_TTL_HOURS: int = Field(default=24)
+    UPLOAD_SWEEP_INTERVAL_SECONDS: int = Field(default=3600)
+    UPLOAD_SWEEP_BATCH_SIZE: int = Field(default=500)
+    # Zeitbudget pro Durchlauf; danach wird abgebrochen und beim nächsten Mal weitergemacht
+    UPLOAD_SWEEP_MAX_SECONDS: int = Field(default=300)
+    UPLOAD_SWEEP_DRY_RUN: bool = Field(default=False)
+    # Abgleich Upload-Verzeichnis <-> Datenbank im Hintergrund; Dateien ohne Eintrag kommen
+    # nur mit UPLOAD_RECONCILE_DELETE_FILES und erst nach der Karenzzeit in die Löschwarteschlange
+    UPLOAD_RECONCILE_ENABLED: bool = Field(default=False)
+    UPLOAD_RECONCILE_DELETE_FILES: bool = Field(default=False)
+    UPLOAD_RECONCILE_GRACE_SECONDS: int = Field(default=3600)
+    # Tombstones für Delta-Sync (/tasks/changes) werden nach dieser Zeit vom selben
+    # Hintergrundlauf entfernt; ältere Sync-Tokens erhalten dann 410 (neu synchronisieren)
+    SYNC_TOMBSTONE_TTL_DAYS: int = Field(default=30)
 
     @field_validator("CORS_ORIGINS", mode="before")
     @classmethod
@@ -70,7 +195,7 @@ class Settings(BaseSettings):
             return [item.strip() for item in s.split(",") if item.strip()]
         return v
 
-    @field_validator("UPLOAD_ALLOWED_EXTENSIONS", mode="before")
+    @field_validator("UPLOAD_ALLOWED_EXTENSIONS", "COMPRESSION_EXCLUDED_EXTENSIONS", mode="before")
     @classmethod
     def _parse_upload_extensions(cls, v):
         if v is None:
@@ -87,6 +212,41 @@ class Settings(BaseSettings):
             return [item.lower().strip() for item in s.split(",") if item.strip()]
         return v
 
+    @field_validator("UPLOAD_STORAGE_MODE", mode="before")
+    @classmethod
+    def _parse_storage_mode(cls, v):
+        mode = str(v or "flat").lower().strip()
+        if mode not in {"flat", "cas"}:
+            raise ValueError("UPLOAD_STORAGE_MODE muss 'flat' oder 'cas' sein.")
+        return mode
+
+    @field_validator("STORAGE_BACKEND", mode="before")
+    @classmethod
+    def _parse_storage_backend(cls, v):
+        backend = str(v or "local").lower().strip()
+        if backend not in {"local", "s3"}:
+            raise ValueError("STORAGE_BACKEND muss 'local' oder 's3' sein.")
+        return backend
+
+    @property
+    def async_database_uri(self) -> str:
+        if self.SQLALCHEMY_ASYNC_DATABASE_URI:
+            return self.SQLALCHEMY_ASYNC_DATABASE_URI
+        return self.to_async_uri(self.SQLALCHEMY_DATABASE_URI)
+
+    @staticmethod
+    def to_async_uri(uri: str) -> str:
+        scheme, sep, rest = uri.partition("://")
+        drivers = {
+            "sqlite": "sqlite+aiosqlite",
+            "postgres": "postgresql+asyncpg",
+            "postgresql": "postgresql+asyncpg",
+        }
+        dialect = scheme.split("+", 1)[0]
+        if dialect not in drivers:
+            raise ValueError(f"Kein Async-Treiber für '{scheme}' bekannt.")
+        return f"{drivers[dialect]}{sep}{rest}"
+
     @property
     def upload_dir_abs(self) -> Path:
         return (BASE_DIR / self.UPLOAD_DIR).resolve()
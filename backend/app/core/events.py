@@ -0,0 +1,291 @@
+import asyncio
+import json
+import logging
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Schlüssel in Session.info: Änderungen der laufenden Transaktion pro Benutzer
+PENDING_CHANGES_KEY = "task_events_pending"
+
+# Pause vor dem erneuten Abonnieren nach einem Verbindungsfehler (verdoppelt sich bis zum Maximum)
+BROKER_RETRY_MIN_SECONDS = 1.0
+BROKER_RETRY_MAX_SECONDS = 30.0
+
+
+@dataclass
+class TaskEvent:
+    """
+    Änderungen eines Benutzers aus einer Transaktion.
+
+    `version` ist die Listenversion nach dem Commit und dient als SSE-Event-ID,
+    `previous` die Version davor (eine Transaktion kann mehrere Versionen überspringen).
+    `changes` ordnet jedem Typ (z.B. "task.created") die betroffenen IDs zu.
+    """
+
+    owner_id: int
+    version: int
+    previous: int
+    changes: Dict[str, List[int]] = field(default_factory=dict)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw: str) -> "TaskEvent":
+        return cls(**json.loads(raw))
+
+
+def record_changes(info: Dict[str, Any], owner_id: int, changes: Dict[str, Iterable[int]]) -> None:
+    """
+    Merkt Änderungen in Session.info vor; veröffentlicht werden sie erst nach dem Commit.
+    """
+    pending = info.setdefault(PENDING_CHANGES_KEY, {}).setdefault(owner_id, {})
+    for change_type, ids in changes.items():
+        pending.setdefault(change_type, []).extend(ids)
+
+
+class LocalBackend:
+    """
+    Zustellung innerhalb des Prozesses (ein Worker). Dient auch als Stellvertreter
+    für einen externen Broker in Tests.
+    """
+
+    def __init__(self) -> None:
+        self._deliver: Optional[Callable[[TaskEvent], None]] = None
+
+    async def start(self, deliver: Callable[[TaskEvent], None]) -> None:
+        self._deliver = deliver
+
+    async def stop(self) -> None:
+        self._deliver = None
+
+    def publish_nowait(self, event: TaskEvent) -> None:
+        if self._deliver is not None:
+            self._deliver(event)
+
+
+class RedisBackend:
+    """
+    Verteilt Events über Redis Pub/Sub an alle Worker (benötigt das Paket "redis").
+    Jeder Worker stellt empfangene Events seinen eigenen Abonnenten zu.
+    """
+
+    def __init__(self, url: str, channel: str) -> None:
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError(
+                "EVENTS_BROKER_URL ist gesetzt, aber das Paket 'redis' ist nicht installiert."
+            ) from exc
+        self._client = redis.from_url(url)
+        self._channel = channel
+        self._listener: Optional[asyncio.Task] = None
+        self._pending: Set[asyncio.Task] = set()
+
+    async def start(self, deliver: Callable[[TaskEvent], None]) -> None:
+        self._listener = asyncio.create_task(self._listen(deliver))
+
+    async def _listen(self, deliver: Callable[[TaskEvent], None]) -> None:
+        # Nach Verbindungsfehlern neu abonnieren (mit wachsender Pause), statt still
+        # keine Events mehr zu empfangen
+        delay = BROKER_RETRY_MIN_SECONDS
+        while True:
+            pubsub = self._client.pubsub()
+            try:
+                await pubsub.subscribe(self._channel)
+                delay = BROKER_RETRY_MIN_SECONDS
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        deliver(TaskEvent.from_json(message["data"]))
+                    except Exception:
+                        logger.exception("Ungültiges Event vom Broker verworfen")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning(
+                    "Verbindung zum Event-Broker unterbrochen, neuer Versuch in %s s",
+                    delay,
+                    exc_info=True,
+                )
+            finally:
+                await pubsub.aclose()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, BROKER_RETRY_MAX_SECONDS)
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self._client.aclose()
+
+    def publish_nowait(self, event: TaskEvent) -> None:
+        task = asyncio.get_running_loop().create_task(
+            self._client.publish(self._channel, event.to_json())
+        )
+        # Referenz halten, bis das Senden abgeschlossen ist
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+
+class Subscription:
+    """
+    Begrenzte Warteschlange eines Clients. Läuft sie über (zu langsamer Client),
+    werden die wartenden Events verworfen und `overflowed` gesetzt; der Client
+    muss dann neu synchronisieren.
+    """
+
+    def __init__(self, owner_id: int, maxsize: int) -> None:
+        self.owner_id = owner_id
+        self.queue: "asyncio.Queue[TaskEvent]" = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+        self._wakeup = asyncio.Event()
+
+    def push(self, event: TaskEvent) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.overflowed = True
+        self._wakeup.set()
+
+    async def next(self, timeout: float) -> Optional[TaskEvent]:
+        """
+        Nächstes Event oder None (Timeout bzw. Überlauf, siehe `overflowed`).
+        """
+        if self.queue.empty() and not self.overflowed:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.queue.empty():
+            return None
+        return self.queue.get_nowait()
+
+
+class EventBroker:
+    """
+    Pub/Sub für Task-Änderungen pro Benutzer mit kurzem Verlauf zum Fortsetzen
+    (Last-Event-ID).
+    """
+
+    def __init__(
+        self, backend: Any, *, queue_size: int, replay_size: int, history_users: int
+    ) -> None:
+        self.backend = backend
+        self.queue_size = queue_size
+        self.replay_size = replay_size
+        self.history_users = history_users
+        self._subscribers: Dict[int, Set[Subscription]] = defaultdict(set)
+        # Verlauf nur für die zuletzt aktiven Benutzer (LRU)
+        self._history: "OrderedDict[int, Deque[TaskEvent]]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        await self.backend.start(self._deliver)
+
+    async def stop(self) -> None:
+        self._loop = None
+        await self.backend.stop()
+
+    def publish(self, event: TaskEvent) -> None:
+        """
+        Veröffentlicht ein Event (nicht blockierend). Aus anderen Threads (z.B. Commits
+        im Threadpool) wird es an den Event-Loop des Brokers übergeben; ohne gestarteten
+        Broker, z.B. in Kommandozeilen-Skripten, wird nichts gesendet.
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self.backend.publish_nowait(event)
+        else:
+            try:
+                loop.call_soon_threadsafe(self.backend.publish_nowait, event)
+            except RuntimeError:
+                # Event-Loop wurde inzwischen geschlossen (Herunterfahren)
+                pass
+
+    def _deliver(self, event: TaskEvent) -> None:
+        history = self._history.get(event.owner_id)
+        if history is None:
+            history = self._history[event.owner_id] = deque(maxlen=self.replay_size)
+            while len(self._history) > self.history_users:
+                self._history.popitem(last=False)
+        self._history.move_to_end(event.owner_id)
+        if any(known.version == event.version for known in history):
+            # Doppelte Zustellung
+            return
+        history.append(event)
+        for subscription in list(self._subscribers.get(event.owner_id, ())):
+            subscription.push(event)
+
+    def subscribe(self, owner_id: int) -> Subscription:
+        subscription = Subscription(owner_id, self.queue_size)
+        self._subscribers[owner_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.owner_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.owner_id]
+
+    def replay(self, owner_id: int, *, after: int, current: int) -> Optional[List[TaskEvent]]:
+        """
+        Events mit Version > `after`. None, wenn der Verlauf die Lücke bis zur
+        aktuellen Version nicht mehr abdeckt (Client muss neu laden).
+        """
+        if after >= current:
+            return []
+        history = sorted(
+            (event for event in self._history.get(owner_id, ()) if event.version > after),
+            key=lambda event: event.version,
+        )
+        expected = after
+        for event in history:
+            if event.previous != expected:
+                return None
+            expected = event.version
+        if expected < current:
+            return None
+        return history
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "users": len(self._subscribers),
+        }
+
+
+def _create_backend() -> Any:
+    if settings.EVENTS_BROKER_URL:
+        return RedisBackend(settings.EVENTS_BROKER_URL, settings.EVENTS_CHANNEL)
+    return LocalBackend()
+
+
+broker = EventBroker(
+    _create_backend(),
+    queue_size=settings.EVENTS_QUEUE_SIZE,
+    replay_size=settings.EVENTS_REPLAY_SIZE,
+    history_users=settings.EVENTS_HISTORY_USERS,
+)
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app import crud
+from app.core.config import settings
+from app.db.session import new_session
+from app.utils.storage import remove_stored_file
+
+
+logger = logging.getLogger(__name__)
+
+
+def _remove_files(paths: List[Tuple[int, str]]) -> Dict[int, str]:
+    # Entfernt die Dateien; liefert die Fehler pro Auftrag (fehlende Dateien gelten als erledigt)
+    errors = {}
+    for deletion_id, path in paths:
+        try:
+            remove_stored_file(path)
+        except OSError as exc:
+            errors[deletion_id] = f"{type(exc).__name__}: {exc}"
+    return errors
+
+
+def _retry_at(attempts: int) -> datetime:
+    # Exponentielles Backoff, höchstens eine Stunde
+    delay = min(settings.FILE_DELETION_RETRY_SECONDS * 2 ** max(attempts - 1, 0), 3600)
+    return datetime.utcnow() + timedelta(seconds=delay)
+
+
+async def drain_file_deletions(*, max_batches: int = 0) -> Dict[str, int]:
+    """
+    Arbeitet fällige Löschaufträge in Batches ab (0 = bis die Warteschlange leer ist).
+
+    Pro Batch: Aufträge abholen und sperren (Commit), Dateien im Threadpool löschen,
+    danach erledigte Aufträge entfernen und fehlgeschlagene neu einplanen (Commit).
+    """
+    result = {"removed": 0, "skipped": 0, "failed": 0}
+    batches = 0
+    db = new_session()
+    try:
+        while not max_batches or batches < max_batches:
+            claimed = await crud.file_deletion.claim(
+                db,
+                limit=settings.FILE_DELETION_BATCH_SIZE,
+                lease_seconds=settings.FILE_DELETION_LEASE_SECONDS,
+                max_attempts=settings.FILE_DELETION_MAX_ATTEMPTS,
+            )
+            await db.commit()
+            if not claimed:
+                break
+            batches += 1
+
+            # Wieder referenzierte Pfade (gleicher Inhalt neu hochgeladen) nicht löschen
+            referenced = await crud.file_deletion.referenced_paths(
+                db, paths=[item.file_path for item in claimed]
+            )
+            pending = [(item.id, item.file_path) for item in claimed if item.file_path not in referenced]
+            errors = await run_in_threadpool(_remove_files, pending)
+
+            attempts = {item.id: item.attempts for item in claimed}
+            await crud.file_deletion.complete(
+                db, ids=[item.id for item in claimed if item.id not in errors]
+            )
+            await crud.file_deletion.fail(
+                db,
+                errors=errors,
+                retry_at={deletion_id: _retry_at(attempts[deletion_id]) for deletion_id in errors},
+            )
+            await db.commit()
+
+            for deletion_id, error in errors.items():
+                logger.warning("Datei konnte nicht gelöscht werden (Auftrag %s): %s", deletion_id, error)
+            result["removed"] += len(pending) - len(errors)
+            result["skipped"] += len(claimed) - len(pending)
+            result["failed"] += len(errors)
+    finally:
+        await db.close()
+    return result
+
+
+class FileDeletionWorker:
+    """
+    Hintergrund-Worker für die Löschwarteschlange. Wird nach Löschvorgängen per
+    `wake()` angestoßen und prüft sonst alle FILE_DELETION_POLL_SECONDS (auch für
+    Aufträge anderer Worker oder aus der Zeit vor einem Neustart).
+    """
+
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop_ref: Optional[asyncio.AbstractEventLoop] = None
+        self.removed = 0
+        self.skipped = 0
+        self.failed = 0
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._loop_ref = asyncio.get_running_loop()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self) -> None:
+        # Auch aus anderen Threads bzw. Event-Loops aufrufbar (z.B. Kommandos, Threadpool)
+        if self._wakeup is not None and self._loop_ref is not None:
+            self._loop_ref.call_soon_threadsafe(self._wakeup.set)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.FILE_DELETION_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                result = await drain_file_deletions()
+            except Exception:
+                logger.exception("Abarbeiten der Löschwarteschlange fehlgeschlagen")
+                continue
+            self.removed += result["removed"]
+            self.skipped += result["skipped"]
+            self.failed += result["failed"]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"removed": self.removed, "skipped": self.skipped, "failed": self.failed}
+
+
+file_deletion_worker = FileDeletionWorker()
@@ -1,5 +1,8 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Callable, Optional, Tuple, TypeVar, Union
 
 from jose import jwt
 from passlib.context import CryptContext
@@ -7,9 +10,37 @@ from passlib.context import CryptContext
 from app.core.config import settings
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+T = TypeVar("T")
+
+# min/max_rounds = BCRYPT_ROUNDS: Hashes mit anderem Kostenfaktor gelten als veraltet
+# und werden beim nächsten Login neu erzeugt (needs_update).
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 ALGORITHM = "HS256"
+# Typ-Claim der Stream-Tickets; Access Tokens tragen keinen
+STREAM_TICKET_TYPE = "stream"
+
+# Eigener Pool für bcrypt, damit Login-Spitzen nicht den Threadpool aller Endpunkte blockieren.
+# Die Semaphore begrenzt laufende plus wartende Jobs.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+_hash_slots = threading.BoundedSemaphore(
+    settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE
+)
+
+
+class PasswordHashingBusy(Exception):
+    """
+    Die Warteschlange des Hashing-Pools ist voll.
+    """
 
 
 def create_access_token(
@@ -29,15 +60,42 @@ def create_access_token(
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def create_stream_ticket(subject: Union[str, Any]) -> str:
+    """
+    Erstellt ein kurzlebiges Ticket für Event-Streams (EVENTS_TICKET_SECONDS).
+    Es gilt nur dort, nicht als Access Token.
+    """
+    expire = datetime.utcnow() + timedelta(seconds=settings.EVENTS_TICKET_SECONDS)
+    to_encode = {"exp": expire, "sub": str(subject), "typ": STREAM_TICKET_TYPE}
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+
+
+async def _run_hashing(fn: Callable[..., T], *args: Any) -> T:
+    # Sofort abweisen statt zu warten, wenn Pool und Warteschlange ausgelastet sind
+    if not _hash_slots.acquire(blocking=False):
+        raise PasswordHashingBusy()
+    try:
+        future = _hash_executor.submit(fn, *args)
+    except BaseException:
+        _hash_slots.release()
+        raise
+    # Slot erst freigeben, wenn der Job wirklich fertig ist (auch bei abgebrochener Anfrage)
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return await asyncio.wrap_future(future)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
     """
-    Prüft, ob das eingegebene Passwort mit dem Hash übereinstimmt.
+    Prüft das Passwort im Hashing-Pool. Liefert zusätzlich einen neuen Hash,
+    falls der gespeicherte nicht mehr den aktuellen Einstellungen entspricht.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return await _run_hashing(pwd_context.verify_and_update, plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
+async def hash_password(password: str) -> str:
     """
-    Erstellt einen Hash aus dem Passwort.
+    Erstellt einen Hash aus dem Passwort im Hashing-Pool.
     """
-    return pwd_context.hash(password)
+    return await _run_hashing(pwd_context.hash, password)
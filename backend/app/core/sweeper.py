@@ -0,0 +1,394 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from starlette.concurrency import run_in_threadpool
+
+from app import crud
+from app.core.config import settings
+from app.core.file_deletion import file_deletion_worker
+from app.db.session import ReadSessionLocal, SessionLocal, new_session
+from app.models.attachment import Attachment
+from app.models.blob import Blob
+from app.models.file_deletion import FileDeletion
+from app.utils.storage import (
+    build_public_url,
+    disk_path_from_attachment_value,
+    get_storage,
+    upload_part_path,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Anzahl der IDs fehlender Dateien, die im Ergebnis beispielhaft genannt werden
+MISSING_SAMPLE_SIZE = 20
+
+# Fortsetzungspunkt eines abgebrochenen Abgleichs (versteckt, wird beim Abgleich übersprungen)
+RECONCILE_CURSOR_FILE = ".reconcile_cursor.json"
+
+
+async def sweep_orphans(
+    *,
+    ttl_hours: int,
+    batch_size: int,
+    max_seconds: float,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Löscht nie verknüpfte Uploads, die älter als `ttl_hours` sind, in Batches zu je
+    einer Transaktion; die Dateien landen in der Löschwarteschlange (FileDeletion).
+    Bricht nach `max_seconds` ab (`complete` = False).
+    """
+    created_before = datetime.utcnow() - timedelta(hours=ttl_hours)
+    deadline = time.monotonic() + max_seconds
+    result = {"orphans": 0, "files_queued": 0, "complete": True}
+
+    db = new_session()
+    try:
+        if dry_run:
+            result["orphans"] = await crud.attachment.count_orphans(db, created_before=created_before)
+            return result
+
+        while True:
+            if time.monotonic() > deadline:
+                result["complete"] = False
+                break
+            count, paths = await crud.attachment.remove_orphans(
+                db, created_before=created_before, limit=batch_size
+            )
+            result["orphans"] += count
+            result["files_queued"] += len(paths)
+            if count < batch_size:
+                break
+    finally:
+        await db.close()
+    if result["files_queued"]:
+        file_deletion_worker.wake()
+    return result
+
+
+async def prune_tombstones(*, ttl_days: int, batch_size: int) -> int:
+    """
+    Entfernt Tombstones, die älter als `ttl_days` sind (je Batch ein Commit).
+    """
+    deleted_before = datetime.utcnow() - timedelta(days=ttl_days)
+    pruned = 0
+    db = new_session()
+    try:
+        while True:
+            count = await crud.tombstone.prune(
+                db, deleted_before=deleted_before, limit=batch_size
+            )
+            pruned += count
+            if count < batch_size:
+                break
+    finally:
+        await db.close()
+    return pruned
+
+
+async def expire_upload_sessions(*, batch_size: int) -> int:
+    """
+    Entfernt abgelaufene fortsetzbare Uploads samt Teildateien (je Batch ein Commit).
+    """
+    expired = 0
+    db = new_session()
+    try:
+        while True:
+            ids = await crud.upload_session.remove_expired(db, limit=batch_size)
+            await db.commit()
+            for upload_id in ids:
+                await run_in_threadpool(upload_part_path(upload_id).unlink, missing_ok=True)
+            expired += len(ids)
+            if len(ids) < batch_size:
+                break
+    finally:
+        await db.close()
+    return expired
+
+
+def _iter_files(
+    root: str, after: Tuple[str, ...] = ()
+) -> Iterator[Tuple[Tuple[str, ...], os.DirEntry]]:
+    # Sortiert nach Pfadteilen, damit ein Lauf hinter `after` (zuletzt geprüfte Datei)
+    # fortsetzen kann; Teilbäume vor dem Cursor werden gar nicht erst gelesen. Versteckte
+    # Einträge wie ".incoming" (laufende Uploads) werden übersprungen
+    def walk(path: str, parts: Tuple[str, ...]) -> Iterator[Tuple[Tuple[str, ...], os.DirEntry]]:
+        with os.scandir(path) as entries:
+            visible = sorted(
+                (entry for entry in entries if not entry.name.startswith(".")),
+                key=lambda entry: entry.name,
+            )
+        for entry in visible:
+            entry_parts = parts + (entry.name,)
+            if entry.is_dir(follow_symlinks=False):
+                if entry_parts >= after[: len(entry_parts)]:
+                    yield from walk(entry.path, entry_parts)
+            elif entry.is_file(follow_symlinks=False) and entry_parts > after:
+                yield entry_parts, entry
+
+    yield from walk(root, ())
+
+
+def _load_cursor(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            cursor = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logger.warning("Fortsetzungspunkt %s unlesbar, Abgleich beginnt von vorn", path)
+        return None
+    return cursor if isinstance(cursor, dict) else None
+
+
+def _save_cursor(path: str, cursor: Dict[str, Any]) -> None:
+    # Erst vollständig schreiben, dann ersetzen: ein Abbruch hinterlässt nie halbes JSON
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cursor, f)
+    os.replace(tmp_path, path)
+
+
+def _stored_values(root: str, path: str) -> List[str]:
+    # Mögliche Schreibweisen in file_path: öffentliche URL oder (ältere Einträge)
+    # Pfad relativ zum Elternverzeichnis des Upload-Verzeichnisses
+    relative = os.path.relpath(path, root).replace(os.sep, "/")
+    legacy = f"{os.path.basename(root)}/{relative}"
+    return [build_public_url(relative), legacy, "/" + legacy]
+
+
+def reconcile(
+    *,
+    batch_size: int,
+    max_seconds: float,
+    grace_seconds: int,
+    delete_files: bool = False,
+) -> Dict[str, Any]:
+    """
+    Gleicht das Upload-Verzeichnis mit der Datenbank ab.
+
+    1. Dateien ohne Attachment bzw. Blob (geprüft per IN-Abfrage je Batch); mit
+       `delete_files` kommen sie in die Löschwarteschlange, sofern sie älter als
+       `grace_seconds` und nicht schon vorgemerkt sind.
+    2. Attachments und Blobs, deren Datei fehlt (nur gemeldet, nie gelöscht).
+
+    Gelöscht wird nie direkt: Der Abgleich liest dann von der Haupt-Datenbank und
+    committet die Aufträge je Batch; der Löschworker prüft jeden Pfad unmittelbar
+    vor dem Entfernen erneut (referenced_paths), sodass ein zwischenzeitlich
+    angelegter Blob oder Upload seine Datei behält.
+
+    Bricht nach `max_seconds` ab (`complete` = False) und merkt sich die Position
+    (letzte Datei bzw. letzte ID je Tabelle) in RECONCILE_CURSOR_FILE; der nächste Lauf
+    setzt dort fort, ein vollständiger Lauf entfernt den Fortsetzungspunkt wieder.
+    Nur für den lokalen Speicher; im Objektspeicher übernehmen das Lifecycle-Regeln
+    des Buckets.
+    """
+    root = str(settings.upload_dir_abs)
+    deadline = time.monotonic() + max_seconds
+    cutoff = time.time() - grace_seconds
+    result: Dict[str, Any] = {
+        "files_scanned": 0,
+        "unreferenced_files": 0,
+        "unreferenced_queued": 0,
+        "missing_files": 0,
+        "missing_attachment_ids": [],
+        "missing_blob_ids": [],
+        "resumed": False,
+        "complete": False,
+    }
+    if not get_storage().local or not os.path.isdir(root):
+        result["complete"] = True
+        return result
+
+    cursor_path = os.path.join(root, RECONCILE_CURSOR_FILE)
+    cursor = _load_cursor(cursor_path)
+    result["resumed"] = cursor is not None
+    cursor = cursor or {"phase": "files", "position": ""}
+    phases = ["files", "attachment", "blob"]
+    start_phase = phases.index(cursor["phase"]) if cursor.get("phase") in phases else 0
+
+    def stop(phase: str, position: Any) -> Dict[str, Any]:
+        _save_cursor(cursor_path, {"phase": phase, "position": position})
+        return result
+
+    # Zum Löschen nur gegen die Haupt-Datenbank prüfen (eine Replica kann nachhängen)
+    session_factory = SessionLocal if delete_files else ReadSessionLocal
+    with session_factory() as db:
+
+        def check_files(entries: List[os.DirEntry]) -> None:
+            values = {entry.path: _stored_values(root, entry.path) for entry in entries}
+            candidates = [value for forms in values.values() for value in forms]
+            known = set(
+                db.scalars(select(Attachment.file_path).where(Attachment.file_path.in_(candidates)))
+            )
+            known.update(db.scalars(select(Blob.file_path).where(Blob.file_path.in_(candidates))))
+            if delete_files:
+                known.update(
+                    db.scalars(
+                        select(FileDeletion.file_path).where(FileDeletion.file_path.in_(candidates))
+                    )
+                )
+            queue = []
+            for entry in entries:
+                if known.intersection(values[entry.path]):
+                    continue
+                result["unreferenced_files"] += 1
+                try:
+                    if delete_files and entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                        queue.append({"file_path": values[entry.path][0]})
+                except FileNotFoundError:
+                    pass
+            if queue:
+                db.execute(insert(FileDeletion), queue)
+                db.commit()
+                result["unreferenced_queued"] += len(queue)
+
+        if start_phase == 0:
+            after = tuple(part for part in str(cursor.get("position") or "").split("/") if part)
+            batch: List[os.DirEntry] = []
+            for parts, entry in _iter_files(root, after):
+                result["files_scanned"] += 1
+                batch.append(entry)
+                if len(batch) >= batch_size:
+                    check_files(batch)
+                    batch = []
+                    if time.monotonic() > deadline:
+                        return stop("files", "/".join(parts))
+            if batch:
+                check_files(batch)
+
+        # Zeilen ohne Datei: Keyset über die ID, Blob-Attachments über ihren Blob
+        for phase, model, key, extra in (
+            ("attachment", Attachment, "missing_attachment_ids", Attachment.blob_id.is_(None)),
+            ("blob", Blob, "missing_blob_ids", None),
+        ):
+            if phases.index(phase) < start_phase:
+                continue
+            last_id = int(cursor.get("position") or 0) if phase == cursor.get("phase") else 0
+            while True:
+                stmt = select(model.id, model.file_path).where(model.id > last_id)
+                if extra is not None:
+                    stmt = stmt.where(extra)
+                rows = db.execute(stmt.order_by(model.id).limit(batch_size)).all()
+                for row_id, file_path in rows:
+                    if not disk_path_from_attachment_value(file_path).is_file():
+                        result["missing_files"] += 1
+                        if len(result[key]) < MISSING_SAMPLE_SIZE:
+                            result[key].append(row_id)
+                if len(rows) < batch_size:
+                    break
+                last_id = rows[-1][0]
+                # Erst nach einem Batch prüfen: jeder Lauf kommt mindestens einen Schritt voran
+                if time.monotonic() > deadline:
+                    return stop(phase, last_id)
+
+    try:
+        os.remove(cursor_path)
+    except FileNotFoundError:
+        pass
+    result["complete"] = True
+    return result
+
+
+class UploadSweeper:
+    """
+    Periodischer Hintergrundlauf (alle UPLOAD_SWEEP_INTERVAL_SECONDS): verwaiste und
+    abgelaufene fortsetzbare Uploads, alte Tombstones, optional der Verzeichnisabgleich; mit Kennzahlen
+    für /metrics. Bei mehreren Workern läuft er in jedem; die Löschungen sind dafür
+    bedingt formuliert. Alternativ per Kommando: python -m app.commands.sweep_uploads
+    """
+
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.failures = 0
+        self.orphans_deleted = 0
+        self.files_queued = 0
+        self.upload_sessions_expired = 0
+        self.tombstones_pruned = 0
+        self.last_run: Dict[str, Any] = {}
+
+    async def start(self) -> None:
+        if settings.UPLOAD_SWEEP_INTERVAL_SECONDS > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.UPLOAD_SWEEP_INTERVAL_SECONDS)
+            try:
+                await self.run_once()
+            except Exception:
+                self.failures += 1
+                logger.exception("Aufräumen der Uploads fehlgeschlagen")
+
+    async def run_once(self) -> Dict[str, Any]:
+        started = time.monotonic()
+        dry_run = settings.UPLOAD_SWEEP_DRY_RUN
+        run: Dict[str, Any] = {
+            "dry_run": dry_run,
+            "orphans": await sweep_orphans(
+                ttl_hours=settings.UPLOAD_ORPHAN_TTL_HOURS,
+                batch_size=settings.UPLOAD_SWEEP_BATCH_SIZE,
+                max_seconds=settings.UPLOAD_SWEEP_MAX_SECONDS,
+                dry_run=dry_run,
+            ),
+        }
+        if not dry_run:
+            run["upload_sessions_expired"] = await expire_upload_sessions(
+                batch_size=settings.UPLOAD_SWEEP_BATCH_SIZE
+            )
+            run["tombstones_pruned"] = await prune_tombstones(
+                ttl_days=settings.SYNC_TOMBSTONE_TTL_DAYS,
+                batch_size=settings.UPLOAD_SWEEP_BATCH_SIZE,
+            )
+        if settings.UPLOAD_RECONCILE_ENABLED:
+            run["reconcile"] = await run_in_threadpool(
+                reconcile,
+                batch_size=settings.UPLOAD_SWEEP_BATCH_SIZE,
+                max_seconds=settings.UPLOAD_SWEEP_MAX_SECONDS,
+                grace_seconds=settings.UPLOAD_RECONCILE_GRACE_SECONDS,
+                delete_files=settings.UPLOAD_RECONCILE_DELETE_FILES and not dry_run,
+            )
+            if run["reconcile"]["unreferenced_queued"]:
+                file_deletion_worker.wake()
+        run["duration_seconds"] = round(time.monotonic() - started, 3)
+
+        self.runs += 1
+        if not dry_run:
+            self.orphans_deleted += run["orphans"]["orphans"]
+            self.files_queued += run["orphans"]["files_queued"]
+            self.files_queued += run.get("reconcile", {}).get("unreferenced_queued", 0)
+            self.upload_sessions_expired += run["upload_sessions_expired"]
+            self.tombstones_pruned += run["tombstones_pruned"]
+        self.last_run = run
+        return run
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "orphans_deleted": self.orphans_deleted,
+            "files_queued": self.files_queued,
+            "upload_sessions_expired": self.upload_sessions_expired,
+            "tombstones_pruned": self.tombstones_pruned,
+            "last_run": self.last_run,
+        }
+
+
+upload_sweeper = UploadSweeper()
@@ -1,3 +1,8 @@
 from .crud_user import user
 from .crud_task import task
 from .crud_attachment import attachment
+from .crud_blob import blob
+from .crud_task_stats import task_stats
+from .crud_tombstone import tombstone
+from .crud_file_deletion import file_deletion
+from .crud_upload_session import upload_session
@@ -1,7 +1,7 @@
 from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
-from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.base_class import Base
 
 # Generische Typen definieren
@@ -13,47 +13,108 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
         CRUD-Objekt mit Standard-Methoden zum Erstellen, Lesen, Aktualisieren und Löschen (CRUD).
+
+        Schreibmethoden committen standardmäßig. Mit commit=False wird nur geflusht,
+        sodass mehrere Operationen in einem gemeinsamen Commit landen (Unit of Work).
         """
         self.model = model
+        # Spaltennamen einmal pro Modell bestimmen statt bei jedem Schreibzugriff
+        mapper = inspect(model)
+        self.columns = frozenset(attr.key for attr in mapper.column_attrs)
+        self.primary_key = mapper.primary_key[0]
+
+    def column_values(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Filtert die Daten auf die Spalten des Modells.
+        """
+        return {key: value for key, value in data.items() if key in self.columns}
+
+    @staticmethod
+    def supports_returning(db: AsyncSession) -> bool:
+        dialect = db.get_bind().dialect
+        return bool(dialect.insert_returning and dialect.update_returning)
 
-    def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        return db.query(self.model).filter(self.model.id == id).first()
+    @staticmethod
+    async def finish(db: AsyncSession, commit: bool) -> None:
+        if commit:
+            await db.commit()
+        else:
+            await db.flush()
 
-    def get_multi(self, db: Session, skip: int = 0, limit: int = 100) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+    async def insert_row(self, db: AsyncSession, values: Dict[str, Any]) -> ModelType:
+        """
+        Fügt eine Zeile ein und liefert das Objekt mit allen Spaltenwerten, per RETURNING
+        ohne zusätzliches SELECT (ohne RETURNING-Unterstützung per Flush).
+        """
+        if self.supports_returning(db):
+            result = await db.scalars(insert(self.model).values(**values).returning(self.model))
+            return result.one()
 
-    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)  # type: ignore
+        db_obj = self.model(**values)  # type: ignore
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.flush()
         return db_obj
 
-    def update(
+    async def update_row(
+        self, db: AsyncSession, db_obj: ModelType, values: Dict[str, Any]
+    ) -> ModelType:
+        """
+        Schreibt geänderte Spalten; mit RETURNING wird das Objekt direkt aus der
+        UPDATE-Antwort aktualisiert.
+        """
+        if not values:
+            return db_obj
+
+        if self.supports_returning(db):
+            await db.execute(
+                update(self.model)
+                .where(self.primary_key == getattr(db_obj, self.primary_key.key))
+                .values(**values)
+                .returning(self.model)
+                .execution_options(populate_existing=True)
+            )
+            return db_obj
+
+        for field, value in values.items():
+            setattr(db_obj, field, value)
+        db.add(db_obj)
+        await db.flush()
+        return db_obj
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        return await db.get(self.model, id)
+
+    async def get_multi(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[ModelType]:
+        result = await db.scalars(select(self.model).offset(skip).limit(limit))
+        return list(result.all())
+
+    async def create(
+        self, db: AsyncSession, *, obj_in: CreateSchemaType, commit: bool = True
+    ) -> ModelType:
+        db_obj = await self.insert_row(db, self.column_values(obj_in.model_dump()))
+        await self.finish(db, commit)
+        return db_obj
+
+    async def update(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         db_obj: ModelType,
-        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        commit: bool = True,
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
-            
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+
+        db_obj = await self.update_row(db, db_obj, self.column_values(update_data))
+        await self.finish(db, commit)
         return db_obj
 
-    def remove(self, db: Session, *, id: int) -> ModelType:
-        obj = db.query(self.model).get(id)
-        db.delete(obj)
-        db.commit()
+    async def remove(self, db: AsyncSession, *, id: int, commit: bool = True) -> ModelType:
+        # Task und Attachment überschreiben dies (Zähler, Tombstones für Delta-Sync, Dateien)
+        obj = await db.get(self.model, id)
+        await db.delete(obj)
+        await self.finish(db, commit)
         return obj
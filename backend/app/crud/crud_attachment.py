@@ -1,8 +1,214 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, case, delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.crud.base import CRUDBase
+from app.crud.crud_blob import blob as crud_blob
+from app.crud.crud_file_deletion import file_deletion as crud_file_deletion
+from app.crud.crud_task_stats import task_stats as crud_task_stats
+from app.crud.crud_tombstone import tombstone as crud_tombstone
 from app.models.attachment import Attachment
+from app.models.task import Task
 from app.schemas.task import AttachmentOut # Neu: Importieren des Schemas für die Ausgabe von Attachments
 
 class CRUDAttachment(CRUDBase[Attachment, AttachmentOut, AttachmentOut]):
-    pass
+    def _select_by_owner(self, owner_id: int):
+        # Anhänge der eigenen Tasks plus eigene, noch nicht verknüpfte Uploads –
+        # der Besitzer wird per JOIN in SQL geprüft statt in Python.
+        return (
+            select(self.model)
+            .outerjoin(Task, Attachment.task_id == Task.id)
+            .where(
+                or_(
+                    Task.owner_id == owner_id,
+                    and_(Attachment.task_id.is_(None), Attachment.uploader_id == owner_id),
+                )
+            )
+        )
+
+    async def get_with_owner(
+        self, db: AsyncSession, *, id: int
+    ) -> Optional[Tuple[Attachment, Optional[int]]]:
+        """
+        Lädt ein Attachment samt Besitzer in einer Abfrage: der Besitzer der Aufgabe,
+        bei noch nicht verknüpften Uploads der Hochladende. None, wenn es fehlt.
+        """
+        row = (
+            await db.execute(
+                select(
+                    self.model,
+                    case(
+                        (Attachment.task_id.is_(None), Attachment.uploader_id),
+                        else_=Task.owner_id,
+                    ),
+                )
+                .outerjoin(Task, Attachment.task_id == Task.id)
+                .where(Attachment.id == id)
+            )
+        ).first()
+        return None if row is None else (row[0], row[1])
+
+    async def stored_filename(self, db: AsyncSession, *, file_path: str) -> Optional[str]:
+        """
+        Dateiname für eine gespeicherte Datei-URL: der eines Attachments, sonst (Blob
+        ohne Attachment) der letzte Pfadteil. None, wenn nichts auf die URL verweist.
+        """
+        filename = await db.scalar(
+            select(Attachment.filename).where(Attachment.file_path == file_path).limit(1)
+        )
+        if filename is None and await crud_blob.get_by_file_path(db, file_path=file_path):
+            filename = file_path.rsplit("/", 1)[-1]
+        return filename
+
+    async def get_multi_by_owner(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 100,
+    ) -> List[Attachment]:
+        stmt = self._select_by_owner(owner_id)
+        if after is not None:
+            created_at, last_id = after
+            stmt = stmt.where(
+                or_(
+                    Attachment.created_at > created_at,
+                    and_(Attachment.created_at == created_at, Attachment.id > last_id),
+                )
+            )
+        result = await db.scalars(stmt.order_by(Attachment.created_at, Attachment.id).limit(limit))
+        return list(result.all())
+
+    async def get_changed_after(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        after: Optional[Tuple[int, int]],
+        until: int,
+        limit: int,
+    ) -> List[Attachment]:
+        # Keyset über (sync_version, id) bis einschließlich der Version `until`
+        stmt = self._select_by_owner(owner_id).where(Attachment.sync_version <= until)
+        if after is not None:
+            version, last_id = after
+            stmt = stmt.where(
+                or_(
+                    Attachment.sync_version > version,
+                    and_(Attachment.sync_version == version, Attachment.id > last_id),
+                )
+            )
+        result = await db.scalars(
+            stmt.order_by(Attachment.sync_version, Attachment.id).limit(limit)
+        )
+        return list(result.all())
+
+    @staticmethod
+    def _orphaned(created_before: datetime) -> Any:
+        # Uploads, die nie mit einer Aufgabe verknüpft wurden
+        return and_(Attachment.task_id.is_(None), Attachment.created_at < created_before)
+
+    async def count_orphans(self, db: AsyncSession, *, created_before: datetime) -> int:
+        return await db.scalar(
+            select(func.count(Attachment.id)).where(self._orphaned(created_before))
+        )
+
+    async def remove_orphans(
+        self, db: AsyncSession, *, created_before: datetime, limit: int, commit: bool = True
+    ) -> Tuple[int, List[str]]:
+        """
+        Löscht bis zu `limit` nicht verknüpfte Uploads, die vor `created_before` angelegt
+        wurden. Liefert die Anzahl und die Pfade der danach nicht mehr benötigten Dateien.
+
+        Die Bedingung wird im DELETE erneut geprüft, damit ein gerade verknüpfter
+        Upload nicht mehr gelöscht wird.
+        """
+        orphaned = self._orphaned(created_before)
+        candidates = (
+            select(Attachment.id).where(orphaned).order_by(Attachment.id).limit(limit)
+        ).scalar_subquery()
+        columns = (Attachment.id, Attachment.uploader_id, Attachment.blob_id, Attachment.file_path)
+        stmt = (
+            delete(Attachment)
+            .where(Attachment.id.in_(candidates), orphaned)
+            .execution_options(synchronize_session=False)
+        )
+        if db.get_bind().dialect.delete_returning:
+            rows = (await db.execute(stmt.returning(*columns))).all()
+        else:
+            rows = (await db.execute(select(*columns).where(Attachment.id.in_(candidates)))).all()
+            await db.execute(stmt.where(Attachment.id.in_([row.id for row in rows])))
+        if not rows:
+            return 0, []
+
+        # Pro Besitzer ein Versionssprung samt Tombstones für Delta-Sync-Clients
+        by_owner: Dict[int, List[int]] = defaultdict(list)
+        for row in rows:
+            if row.uploader_id is not None:
+                by_owner[row.uploader_id].append(row.id)
+        for owner_id, ids in by_owner.items():
+            version = await crud_task_stats.touch(
+                db, owner_id=owner_id, changes={"attachment.deleted": ids}
+            )
+            await crud_tombstone.add_many(
+                db, owner_id=owner_id, entity="attachment", ids=ids, version=version
+            )
+
+        paths = await self.release_files(db, rows)
+        await self.finish(db, commit)
+        return len(rows), paths
+
+    async def release_files(
+        self, db: AsyncSession, attachments: Iterable[Any]
+    ) -> List[str]:
+        """
+        Gibt die Dateien bereits gelöschter (geflushter) Attachments frei, ohne Commit.
+        Dateien, auf die nichts mehr verweist, werden in derselben Transaktion zum
+        Löschen vorgemerkt (siehe FileDeletion); zurückgegeben werden ihre Pfade.
+        """
+        attachments = list(attachments)
+        paths = [a.file_path for a in attachments if a.blob_id is None]
+        paths += await crud_blob.release(db, blob_ids=[a.blob_id for a in attachments])
+        await crud_file_deletion.enqueue(db, paths=paths)
+        return paths
+
+    async def remove(self, db: AsyncSession, *, id: int, commit: bool = True) -> Attachment:
+        # Wie remove_with_files (Tombstone, Listenversion, Dateien) mit dem Besitzer aus
+        # Aufgabe bzw. Uploader; die Dateien entfernt der Löschworker beim nächsten Durchlauf
+        db_obj, owner_id = await self.get_with_owner(db, id=id)
+        db_obj, _ = await self.remove_with_files(
+            db, db_obj=db_obj, owner_id=owner_id, commit=commit
+        )
+        return db_obj
+
+    async def remove_with_files(
+        self, db: AsyncSession, *, db_obj: Attachment, owner_id: int, commit: bool = True
+    ) -> Tuple[Attachment, List[str]]:
+        """
+        Löscht das Attachment und liefert die Pfade der zum Löschen vorgemerkten Dateien.
+        Für Delta-Sync-Clients wird ein Tombstone angelegt; eine verknüpfte Aufgabe gilt
+        als geändert, weil sich ihre Anhangsliste ändert.
+        """
+        changes = {"attachment.deleted": [db_obj.id]}
+        if db_obj.task_id:
+            changes["task.updated"] = [db_obj.task_id]
+        version = await crud_task_stats.touch(db, owner_id=owner_id, changes=changes)
+        await crud_tombstone.add_many(
+            db, owner_id=owner_id, entity="attachment", ids=[db_obj.id], version=version
+        )
+        if db_obj.task_id:
+            await db.execute(
+                update(Task)
+                .where(Task.id == db_obj.task_id)
+                .values(sync_version=version)
+                .execution_options(synchronize_session=False)
+            )
+        await db.delete(db_obj)
+        await db.flush()
+        paths = await self.release_files(db, [db_obj])
+        await self.finish(db, commit)
+        return db_obj, paths
 
 attachment = CRUDAttachment(Attachment)
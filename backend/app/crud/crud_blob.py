@@ -0,0 +1,81 @@
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+from app.crud.base import CRUDBase
+from app.models.blob import Blob
+
+# Versuche, wenn parallele Uploads bzw. Löschungen denselben Blob anlegen oder entfernen
+ACQUIRE_ATTEMPTS = 5
+
+
+class CRUDBlob(CRUDBase[Blob, BaseModel, BaseModel]):
+    async def get_by_sha256(self, db: AsyncSession, *, sha256: str) -> Optional[Blob]:
+        result = await db.scalars(select(Blob).where(Blob.sha256 == sha256))
+        return result.first()
+
+    async def get_by_file_path(self, db: AsyncSession, *, file_path: str) -> Optional[Blob]:
+        result = await db.scalars(select(Blob).where(Blob.file_path == file_path))
+        return result.first()
+
+    async def acquire(
+        self, db: AsyncSession, *, sha256: str, size: int, file_path: str
+    ) -> Tuple[Blob, bool]:
+        """
+        Erhöht den Referenzzähler des Blobs oder legt ihn neu an (ohne Commit).
+        Liefert (Blob, neu_angelegt).
+
+        Läuft in der Transaktion des Aufrufers: ein paralleler Upload mit gleichem
+        Inhalt setzt nur den Savepoint zurück, nicht die bereits vorgemerkten Änderungen.
+        """
+        for _ in range(ACQUIRE_ATTEMPTS):
+            blob = await self.get_by_sha256(db, sha256=sha256)
+            if blob is not None:
+                result = await db.execute(
+                    update(Blob).where(Blob.id == blob.id).values(refcount=Blob.refcount + 1)
+                )
+                if result.rowcount == 1:
+                    await db.refresh(blob)
+                    return blob, False
+                # Ein paralleles release hat den Blob gerade gelöscht: neu anlegen
+                db.expunge(blob)
+                continue
+
+            blob = Blob(sha256=sha256, size=size, file_path=file_path, refcount=1)
+            try:
+                async with db.begin_nested():
+                    db.add(blob)
+                return blob, True
+            except IntegrityError:
+                # Parallel-Upload mit gleichem Inhalt hat den Blob bereits angelegt
+                continue
+        raise RuntimeError(f"Blob {sha256} konnte nicht reserviert werden.")
+
+    async def release(self, db: AsyncSession, *, blob_ids: Iterable[int]) -> List[str]:
+        """
+        Verringert die Referenzzähler (ohne Commit). Blobs ohne Referenz werden gelöscht;
+        zurückgegeben werden die Pfade der Dateien, die entfernt werden können.
+        """
+        counts = Counter(b for b in blob_ids if b is not None)
+        if not counts:
+            return []
+
+        for blob_id, n in counts.items():
+            await db.execute(
+                update(Blob).where(Blob.id == blob_id).values(refcount=Blob.refcount - n)
+            )
+
+        result = await db.scalars(
+            select(Blob)
+            .where(Blob.id.in_(list(counts)), Blob.refcount <= 0)
+            .execution_options(populate_existing=True)
+        )
+        paths = []
+        for blob in result.all():
+            paths.append(blob.file_path)
+            await db.delete(blob)
+        return paths
+
+blob = CRUDBlob(Blob)
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+from app.crud.base import CRUDBase
+from app.models.attachment import Attachment
+from app.models.blob import Blob
+from app.models.file_deletion import FileDeletion
+
+class CRUDFileDeletion(CRUDBase[FileDeletion, BaseModel, BaseModel]):
+    async def enqueue(self, db: AsyncSession, *, paths: Iterable[str]) -> None:
+        """
+        Merkt Dateien zum Löschen vor (ein INSERT, ohne Commit). Zusammen mit dem
+        Löschen der Zeilen committet, geht auch bei einem Absturz kein Auftrag verloren.
+        """
+        rows = [{"file_path": path} for path in paths if path]
+        if rows:
+            await db.execute(insert(FileDeletion), rows)
+
+    async def claim(
+        self, db: AsyncSession, *, limit: int, lease_seconds: int, max_attempts: int
+    ) -> List[FileDeletion]:
+        """
+        Holt fällige Aufträge und sperrt sie für `lease_seconds` (ohne Commit).
+
+        Parallele Worker erhalten disjunkte Aufträge (Postgres: SKIP LOCKED, SQLite:
+        ein Schreiber). Stürzt ein Worker ab, werden seine Aufträge nach Ablauf der
+        Sperrfrist erneut vergeben.
+        """
+        now = datetime.utcnow()
+        due = (
+            select(FileDeletion.id)
+            .where(FileDeletion.next_attempt_at <= now, FileDeletion.attempts < max_attempts)
+            .order_by(FileDeletion.next_attempt_at, FileDeletion.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(FileDeletion)
+            .values(
+                next_attempt_at=now + timedelta(seconds=lease_seconds),
+                attempts=FileDeletion.attempts + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if self.supports_returning(db):
+            result = await db.scalars(
+                stmt.where(FileDeletion.id.in_(due.scalar_subquery())).returning(FileDeletion)
+            )
+            return list(result.all())
+
+        ids = list((await db.scalars(due)).all())
+        if not ids:
+            return []
+        await db.execute(stmt.where(FileDeletion.id.in_(ids)))
+        result = await db.scalars(
+            select(FileDeletion)
+            .where(FileDeletion.id.in_(ids))
+            .execution_options(populate_existing=True)
+        )
+        return list(result.all())
+
+    async def referenced_paths(self, db: AsyncSession, *, paths: Iterable[str]) -> set:
+        """
+        Pfade, auf die inzwischen wieder ein Attachment oder Blob verweist (z.B. ein neuer
+        Upload mit gleichem Inhalt im CAS-Modus); diese Dateien dürfen nicht weg.
+        """
+        paths = list(set(paths))
+        if not paths:
+            return set()
+        found = set(
+            await db.scalars(
+                select(Attachment.file_path).where(
+                    Attachment.file_path.in_(paths), Attachment.blob_id.is_(None)
+                )
+            )
+        )
+        found.update(await db.scalars(select(Blob.file_path).where(Blob.file_path.in_(paths))))
+        return found
+
+    async def complete(self, db: AsyncSession, *, ids: Iterable[int]) -> None:
+        ids = list(ids)
+        if ids:
+            await db.execute(
+                delete(FileDeletion)
+                .where(FileDeletion.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+
+    async def fail(
+        self, db: AsyncSession, *, errors: Dict[int, str], retry_at: Dict[int, datetime]
+    ) -> None:
+        # Fehlgeschlagene Aufträge mit Backoff erneut einplanen
+        for deletion_id, error in errors.items():
+            await db.execute(
+                update(FileDeletion)
+                .where(FileDeletion.id == deletion_id)
+                .values(last_error=error[:500], next_attempt_at=retry_at[deletion_id])
+                .execution_options(synchronize_session=False)
+            )
+
+    async def counts(self, db: AsyncSession, *, max_attempts: int) -> Dict[str, int]:
+        pending, failed = (
+            await db.execute(
+                select(
+                    func.count(FileDeletion.id).filter(FileDeletion.attempts < max_attempts),
+                    func.count(FileDeletion.id).filter(FileDeletion.attempts >= max_attempts),
+                )
+            )
+        ).one()
+        return {"pending": pending, "failed": failed}
+
+file_deletion = CRUDFileDeletion(FileDeletion)
@@ -1,84 +1,576 @@
-from typing import List
-from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from sqlalchemy import Float, and_, case, cast, column, delete, func, insert, inspect, literal, literal_column, or_, select, table, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload, with_expression
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql import Select
 from app.crud.base import CRUDBase
+from app.crud.crud_attachment import attachment as crud_attachment
+from app.crud.crud_task_stats import task_stats as crud_task_stats
+from app.crud.crud_tombstone import tombstone as crud_tombstone
+from app.db.search import postgres_match_query, sqlite_match_query
 from app.models.task import Task
-from app.schemas.task import TaskCreate, TaskUpdate
+from app.schemas.task import TaskBatchUpdate, TaskCreate, TaskImport, TaskUpdate
 from app.models.attachment import Attachment
 
+# Spalten für Export und Import (ohne Anhänge, diese hängen an Dateien)
+EXPORT_COLUMNS = (Task.id, Task.title, Task.description, Task.is_completed, Task.created_at)
+
+# Verfügbare Ladestrategien für Task.attachments
+ATTACHMENT_LOADERS = {
+    "selectin": selectinload,
+    "joined": joinedload,
+}
+
+
+class AttachmentLinkError(Exception):
+    """
+    Mindestens ein Anhang existiert nicht, gehört einem anderen Benutzer oder ist
+    bereits mit einer Aufgabe verknüpft.
+    """
+
+
 class CRUDTask(CRUDBase[Task, TaskCreate, TaskUpdate]):
-    def create_with_owner(
-        self, db: Session, *, obj_in: TaskCreate, owner_id: int
+    def __init__(self, model: type[Task], *, attachment_loading: str = "selectin"):
+        """
+        CRUD-Objekt für Tasks. `attachment_loading` legt fest, wie Task.attachments
+        eager geladen wird ("selectin" oder "joined"), um N+1-Abfragen zu vermeiden.
+        """
+        super().__init__(model)
+        if attachment_loading not in ATTACHMENT_LOADERS:
+            raise ValueError(f"Unbekannte Ladestrategie: {attachment_loading}")
+        self.attachment_loading = attachment_loading
+
+    def _select(self, *, loading: Optional[str] = None, lean: bool = False) -> Select:
+        # lean: statt der Anhänge selbst wird nur deren Anzahl als Spalte mitgeladen
+        if lean:
+            attachment_count = (
+                select(func.count(Attachment.id))
+                .where(Attachment.task_id == Task.id)
+                .correlate(Task)
+                .scalar_subquery()
+            )
+            return select(self.model).options(with_expression(Task.attachment_count, attachment_count))
+
+        loader = ATTACHMENT_LOADERS[loading or self.attachment_loading]
+        return select(self.model).options(loader(Task.attachments))
+
+    async def get(self, db: AsyncSession, id: Any, *, loading: Optional[str] = None) -> Optional[Task]:
+        result = await db.execute(self._select(loading=loading).where(Task.id == id))
+        return result.unique().scalars().first()
+
+    async def _load_attachments(self, db: AsyncSession, db_obj: Task) -> Task:
+        # Anhänge in einem SELECT laden und als geladene Collection setzen (kein Lazy-Load)
+        result = await db.scalars(
+            select(Attachment)
+            .where(Attachment.task_id == db_obj.id)
+            .execution_options(populate_existing=True)
+        )
+        set_committed_value(db_obj, "attachments", list(result.all()))
+        return db_obj
+
+    async def create_with_owner(
+        self, db: AsyncSession, *, obj_in: TaskCreate, owner_id: int, commit: bool = True
     ) -> Task:
-        obj_in_data = jsonable_encoder(obj_in)
-        
+        obj_in_data = obj_in.model_dump()
+
         # Attachment-IDs extrahieren und aus den Daten entfernen (da sie nicht im Task-Modell sind)
         attachment_ids = obj_in_data.pop("attachment_ids", [])
-        if "attachment_url" in obj_in_data:
-            del obj_in_data["attachment_url"]
-        db_obj = self.model(**obj_in_data, owner_id=owner_id)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        
-        # Jetzt die Anhänge verknüpfen
+
+        # Zähler fortschreiben und die Version holen, mit der die Zeilen gestempelt werden
+        version = await crud_task_stats.apply(
+            db, owner_id=owner_id, total=1, completed=int(bool(obj_in_data.get("is_completed")))
+        )
+        db_obj = await self.insert_row(
+            db, {**self.column_values(obj_in_data), "owner_id": owner_id, "sync_version": version}
+        )
+        crud_task_stats.record(db, owner_id=owner_id, changes={"task.created": [db_obj.id]})
+
+        # Jetzt die Anhänge verknüpfen (ein UPDATE statt eines pro Anhang)
         if attachment_ids:
-            # Wir suchen alle Attachments mit diesen IDs
-            attachments = db.query(Attachment).filter(Attachment.id.in_(attachment_ids)).all()
-            for attachment in attachments:
-                attachment.task_id = db_obj.id  # Verknüpfung herstellen
-                db.add(attachment)
-            db.commit()
-            db.refresh(db_obj)
-            
+            await self._link_attachments(
+                db,
+                {attachment_id: db_obj.id for attachment_id in attachment_ids},
+                owner_id=owner_id,
+                version=version,
+            )
+            await self._load_attachments(db, db_obj)
+        else:
+            set_committed_value(db_obj, "attachments", [])
+
+        await self.finish(db, commit)
         return db_obj
-    
-    def get_multi_by_owner(
-        self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
+
+    def _select_by_owner(
+        self,
+        *,
+        owner_id: int,
+        is_completed: Optional[bool],
+        loading: Optional[str],
+        lean: bool,
+    ) -> Select:
+        # Filter passen zu den Indizes (owner_id[, is_completed], created_at, id)
+        stmt = self._select(loading=loading, lean=lean).where(Task.owner_id == owner_id)
+        if is_completed is not None:
+            stmt = stmt.where(Task.is_completed == is_completed)
+        return stmt
+
+    @staticmethod
+    def _ordering(descending: bool) -> Tuple[Any, Any]:
+        if descending:
+            return Task.created_at.desc(), Task.id.desc()
+        return Task.created_at, Task.id
+
+    async def get_multi_by_owner(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        is_completed: Optional[bool] = None,
+        descending: bool = False,
+        loading: Optional[str] = None,
+        lean: bool = False,
     ) -> List[Task]:
-        return (
-            db.query(self.model)
-            .filter(Task.owner_id == owner_id)
+        result = await db.execute(
+            self._select_by_owner(
+                owner_id=owner_id, is_completed=is_completed, loading=loading, lean=lean
+            )
+            .order_by(*self._ordering(descending))
             .offset(skip)
             .limit(limit)
-            .all()
         )
+        return list(result.unique().scalars().all())
+
+    async def get_multi_by_owner_after(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 100,
+        is_completed: Optional[bool] = None,
+        descending: bool = False,
+        loading: Optional[str] = None,
+        lean: bool = False,
+    ) -> List[Task]:
+        # Keyset-Paginierung: statt OFFSET wird ab der letzten Position (created_at, id)
+        # weitergelesen, damit tiefe Seiten über den Index genauso schnell bleiben.
+        stmt = self._select_by_owner(
+            owner_id=owner_id, is_completed=is_completed, loading=loading, lean=lean
+        )
+        if after is not None:
+            created_at, last_id = after
+            if descending:
+                stmt = stmt.where(
+                    or_(
+                        Task.created_at < created_at,
+                        and_(Task.created_at == created_at, Task.id < last_id),
+                    )
+                )
+            else:
+                stmt = stmt.where(
+                    or_(
+                        Task.created_at > created_at,
+                        and_(Task.created_at == created_at, Task.id > last_id),
+                    )
+                )
+        result = await db.execute(stmt.order_by(*self._ordering(descending)).limit(limit))
+        return list(result.unique().scalars().all())
+
+    async def stream_by_owner(
+        self, db: AsyncSession, *, owner_id: int, batch_size: int = 1000
+    ) -> AsyncIterator[Sequence[Any]]:
+        """
+        Liefert alle Aufgaben des Besitzers als Zeilen (EXPORT_COLUMNS) in Blöcken zu
+        `batch_size`. Per yield_per wird serverseitig gelesen (Postgres: Cursor), der
+        Speicherbedarf bleibt unabhängig von der Anzahl der Aufgaben konstant.
+        """
+        result = await db.stream(
+            select(*EXPORT_COLUMNS)
+            .where(Task.owner_id == owner_id)
+            .order_by(*self._ordering(False))
+            .execution_options(yield_per=batch_size)
+        )
+        async for partition in result.partitions():
+            yield partition
+
+    async def get_changed_after(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        after: Optional[Tuple[int, int]],
+        until: int,
+        limit: int,
+    ) -> List[Task]:
+        # Keyset über (sync_version, id) bis einschließlich der Version `until`
+        stmt = self._select().where(Task.owner_id == owner_id, Task.sync_version <= until)
+        if after is not None:
+            version, last_id = after
+            stmt = stmt.where(
+                or_(
+                    Task.sync_version > version,
+                    and_(Task.sync_version == version, Task.id > last_id),
+                )
+            )
+        result = await db.execute(stmt.order_by(Task.sync_version, Task.id).limit(limit))
+        return list(result.unique().scalars().all())
 
-    def update(
+    async def search_by_owner(
         self,
-        db: Session,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        terms: List[str],
+        after: Optional[Tuple[float, int]] = None,
+        limit: int = 100,
+        loading: Optional[str] = None,
+    ) -> List[Tuple[Task, float]]:
+        """
+        Volltextsuche in Titel und Beschreibung, sortiert nach Relevanz.
+
+        Liefert (Task, rank)-Paare; ein kleinerer rank ist relevanter. Mit `after`
+        wird per Keyset (rank, id) hinter dem letzten Treffer weitergelesen.
+        """
+        dialect = db.get_bind().dialect.name
+        if dialect == "sqlite":
+            fts = table("task_fts", column("rowid"), column("rank"))
+            # Schon im FTS-Teil auf den Besitzer einschränken, damit Rang und Limit
+            # nicht über die Aufgaben aller Benutzer laufen
+            matches = (
+                select(fts.c.rowid.label("id"), cast(fts.c.rank, Float).label("rank"))
+                .join(Task, Task.id == fts.c.rowid)
+                .where(
+                    literal_column("task_fts").op("MATCH")(sqlite_match_query(terms)),
+                    Task.owner_id == owner_id,
+                )
+                .subquery()
+            )
+        elif dialect == "postgresql":
+            tsquery = func.to_tsquery("simple", postgres_match_query(terms))
+            search_vector = literal_column("task.search_vector")
+            matches = (
+                select(
+                    Task.id.label("id"),
+                    # ts_rank_cd: größer ist besser, daher negiert wie bei bm25
+                    (-cast(func.ts_rank_cd(search_vector, tsquery), Float)).label("rank"),
+                )
+                .where(search_vector.op("@@")(tsquery), Task.owner_id == owner_id)
+                .subquery()
+            )
+        else:
+            # Ohne Volltextindex: jeder Term als Teilstring in Titel oder Beschreibung,
+            # ohne Relevanz (gleicher Rang, sortiert nach ID)
+            matches = (
+                select(Task.id.label("id"), literal(0.0, Float).label("rank"))
+                .where(
+                    Task.owner_id == owner_id,
+                    *(
+                        or_(
+                            Task.title.icontains(term, autoescape=True),
+                            Task.description.icontains(term, autoescape=True),
+                        )
+                        for term in terms
+                    ),
+                )
+                .subquery()
+            )
+
+        stmt = (
+            self._select(loading=loading)
+            .add_columns(matches.c.rank)
+            .join(matches, matches.c.id == Task.id)
+            .where(Task.owner_id == owner_id)
+        )
+        if after is not None:
+            last_rank, last_id = after
+            stmt = stmt.where(
+                or_(
+                    matches.c.rank > last_rank,
+                    and_(matches.c.rank == last_rank, Task.id > last_id),
+                )
+            )
+        result = await db.execute(stmt.order_by(matches.c.rank, Task.id).limit(limit))
+        return [(task, rank) for task, rank in result.unique().all()]
+
+    async def update(
+        self,
+        db: AsyncSession,
         *,
         db_obj: Task,
-        obj_in: TaskUpdate | dict
+        obj_in: TaskUpdate | dict,
+        commit: bool = True,
     ) -> Task:
         # 1. Daten vorbereiten (obj_in in dict umwandeln, falls es ein Pydantic-Modell ist)
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
-            update_data = obj_in
+            update_data = dict(obj_in)
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
 
         # 2. Attachment-IDs extrahieren und aus den Daten entfernen (da sie nicht im Task-Modell sind)
         new_attachment_ids = update_data.pop("new_attachment_ids", [])
 
-        # 3. Task-Objekt aktualisieren
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        # 3. Zähler fortschreiben (Erledigt-Status kann sich ändern) und Version holen
+        was_completed = bool(db_obj.is_completed)
+        is_completed = bool(update_data.get("is_completed", was_completed))
+        version = await crud_task_stats.apply(
+            db,
+            owner_id=db_obj.owner_id,
+            completed=int(is_completed) - int(was_completed),
+            changes={"task.updated": [db_obj.id]},
+        )
 
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        # 4. Task-Zeile aktualisieren
+        db_obj = await self.update_row(
+            db, db_obj, {**self.column_values(update_data), "sync_version": version}
+        )
 
-        # 4. Neue Anhänge verknüpfen (falls neue_attachment_ids übergeben wurden)
+        # 5. Neue Anhänge verknüpfen; Anhänge nur neu laden, wenn sich etwas geändert hat
         if new_attachment_ids:
-            attachments = db.query(Attachment).filter(Attachment.id.in_(new_attachment_ids)).all()
-            for attachment in attachments:
-                attachment.task_id = db_obj.id
-                db.add(attachment)
-            db.commit()
-            db.refresh(db_obj)
+            await self._link_attachments(
+                db,
+                {attachment_id: db_obj.id for attachment_id in new_attachment_ids},
+                owner_id=db_obj.owner_id,
+                version=version,
+            )
+            await self._load_attachments(db, db_obj)
+        elif "attachments" in inspect(db_obj).unloaded:
+            await self._load_attachments(db, db_obj)
 
+        await self.finish(db, commit)
         return db_obj
 
+    async def _link_attachments(
+        self, db: AsyncSession, links: Dict[int, int], *, owner_id: int, version: int
+    ) -> None:
+        # Attachment-ID -> Task-ID, in einem einzigen UPDATE; nur eigene, noch nicht
+        # verknüpfte Uploads, sonst AttachmentLinkError (ohne Commit, Aufrufer rollt zurück)
+        if not links:
+            return
+        result = await db.execute(
+            update(Attachment)
+            .where(
+                Attachment.id.in_(list(links)),
+                Attachment.uploader_id == owner_id,
+                Attachment.task_id.is_(None),
+            )
+            .values(task_id=case(links, value=Attachment.id), sync_version=version)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(links):
+            raise AttachmentLinkError()
+
+    async def _task_states(
+        self, db: AsyncSession, ids: Iterable[int]
+    ) -> Dict[int, Tuple[int, bool]]:
+        # Task-ID -> (Besitzer-ID, erledigt) für alle existierenden IDs
+        result = await db.execute(
+            select(Task.id, Task.owner_id, Task.is_completed).where(Task.id.in_(set(ids)))
+        )
+        return {task_id: (owner, bool(done)) for task_id, owner, done in result.all()}
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Union[TaskCreate, TaskImport]],
+        owner_id: int,
+        commit: bool = True,
+    ) -> List[int]:
+        """
+        Legt viele Aufgaben mit einem Bulk-INSERT an und verknüpft ihre Anhänge mit
+        einem UPDATE; alles in einer Transaktion. Liefert die IDs in Eingabereihenfolge.
+
+        Importierte Aufgaben (TaskImport) tragen keine Anhänge, dafür ihr created_at.
+        """
+        if not objs_in:
+            return []
+        version = await crud_task_stats.apply(
+            db,
+            owner_id=owner_id,
+            total=len(objs_in),
+            completed=sum(bool(obj.is_completed) for obj in objs_in),
+        )
+        rows = [
+            {
+                **self.column_values(obj.model_dump()),
+                "owner_id": owner_id,
+                "sync_version": version,
+            }
+            for obj in objs_in
+        ]
+        if db.get_bind().dialect.name == "sqlite":
+            # SQLite kennt keine Sortierspalte für RETURNING; mit sort_by_parameter_order
+            # fiele SQLAlchemy auf ein INSERT pro Zeile zurück. Die Schreibzugriffe sind
+            # serialisiert, die IDs eines Bulk-INSERTs also aufsteigend in Eingabereihenfolge
+            result = await db.execute(insert(Task).returning(Task.id), rows)
+            ids = sorted(result.scalars().all())
+        else:
+            result = await db.execute(
+                insert(Task).returning(Task.id, sort_by_parameter_order=True), rows
+            )
+            ids = list(result.scalars().all())
+        crud_task_stats.record(db, owner_id=owner_id, changes={"task.created": ids})
+
+        await self._link_attachments(
+            db,
+            {
+                attachment_id: task_id
+                for obj, task_id in zip(objs_in, ids)
+                for attachment_id in getattr(obj, "attachment_ids", ())
+            },
+            owner_id=owner_id,
+            version=version,
+        )
+        await self.finish(db, commit)
+        return ids
+
+    async def update_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[TaskBatchUpdate],
+        owner_id: int,
+        commit: bool = True,
+    ) -> Dict[int, str]:
+        """
+        Aktualisiert viele Aufgaben per Bulk-UPDATE (executemany) in einer Transaktion.
+        Liefert pro Task-ID "updated", "not_found" oder "forbidden".
+        """
+        states = await self._task_states(db, (obj.id for obj in objs_in))
+        completed = {task_id: done for task_id, (_, done) in states.items()}
+        completed_before = sum(completed.values())
+        statuses: Dict[int, str] = {}
+        rows: List[Dict[str, Any]] = []
+        links: Dict[int, int] = {}
+        for obj in objs_in:
+            if obj.id not in states:
+                statuses[obj.id] = "not_found"
+                continue
+            if states[obj.id][0] != owner_id:
+                statuses[obj.id] = "forbidden"
+                continue
+            statuses[obj.id] = "updated"
+            values = obj.model_dump(exclude_unset=True, exclude={"id", "new_attachment_ids"})
+            if values:
+                rows.append({"id": obj.id, **values})
+            if "is_completed" in values:
+                completed[obj.id] = bool(values["is_completed"])
+            links.update({attachment_id: obj.id for attachment_id in obj.new_attachment_ids})
+
+        updated = [task_id for task_id, status in statuses.items() if status == "updated"]
+        if not updated:
+            return statuses
+
+        # Fremde Aufgaben werden nie geändert, die Differenz betrifft nur den Besitzer
+        version = await crud_task_stats.apply(
+            db,
+            owner_id=owner_id,
+            completed=sum(completed.values()) - completed_before,
+            changes={"task.updated": updated},
+        )
+        # Auch Aufgaben ohne geänderte Spalten (nur neue Anhänge) gelten als geändert
+        stamped = {row["id"] for row in rows}
+        rows += [{"id": task_id} for task_id in updated if task_id not in stamped]
+        await db.execute(update(Task), [{**row, "sync_version": version} for row in rows])
+        await self._link_attachments(db, links, owner_id=owner_id, version=version)
+        await self.finish(db, commit)
+        return statuses
+
+    async def remove_many(
+        self,
+        db: AsyncSession,
+        *,
+        ids: Sequence[int],
+        owner_id: int,
+        commit: bool = True,
+    ) -> Tuple[Dict[int, str], List[str]]:
+        """
+        Löscht viele Aufgaben samt Anhängen in einer Transaktion. Liefert den Status
+        pro Task-ID und die Pfade der zum Löschen vorgemerkten Dateien.
+        """
+        states = await self._task_states(db, ids)
+        statuses = {
+            task_id: "not_found" if task_id not in states
+            else "forbidden" if states[task_id][0] != owner_id
+            else "deleted"
+            for task_id in ids
+        }
+        owned = [task_id for task_id, status in statuses.items() if status == "deleted"]
+        if not owned:
+            return statuses, []
+
+        version = await crud_task_stats.apply(
+            db,
+            owner_id=owner_id,
+            total=-len(owned),
+            completed=-sum(states[task_id][1] for task_id in owned),
+            changes={"task.deleted": owned},
+        )
+        attachments = (
+            await db.scalars(select(Attachment).where(Attachment.task_id.in_(owned)))
+        ).all()
+        await crud_tombstone.add_many(
+            db, owner_id=owner_id, entity="task", ids=owned, version=version
+        )
+        await crud_tombstone.add_many(
+            db,
+            owner_id=owner_id,
+            entity="attachment",
+            ids=[attachment.id for attachment in attachments],
+            version=version,
+        )
+        await db.execute(
+            delete(Attachment)
+            .where(Attachment.task_id.in_(owned))
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(
+            delete(Task).where(Task.id.in_(owned)).execution_options(synchronize_session=False)
+        )
+        paths = await crud_attachment.release_files(db, attachments)
+        await self.finish(db, commit)
+        return statuses, paths
+
+    async def remove(self, db: AsyncSession, *, id: int, commit: bool = True) -> Task:
+        # Wie remove_with_files (Zähler, Tombstones, Dateien); die vorgemerkten Dateien
+        # entfernt der Löschworker bei seinem nächsten Durchlauf
+        db_obj, _ = await self.remove_with_files(db, db_obj=await self.get(db, id), commit=commit)
+        return db_obj
+
+    async def remove_with_files(
+        self, db: AsyncSession, *, db_obj: Task, commit: bool = True
+    ) -> Tuple[Task, List[str]]:
+        """
+        Löscht die Aufgabe samt Anhängen und liefert die Pfade der zum Löschen
+        vorgemerkten Dateien (bei CAS erst, wenn kein anderer Anhang den Blob nutzt).
+        """
+        attachments = list(db_obj.attachments)
+        version = await crud_task_stats.apply(
+            db,
+            owner_id=db_obj.owner_id,
+            total=-1,
+            completed=-int(bool(db_obj.is_completed)),
+            changes={"task.deleted": [db_obj.id]},
+        )
+        # Tombstones für Delta-Sync-Clients (Aufgabe und mitgelöschte Anhänge)
+        await crud_tombstone.add_many(
+            db, owner_id=db_obj.owner_id, entity="task", ids=[db_obj.id], version=version
+        )
+        await crud_tombstone.add_many(
+            db,
+            owner_id=db_obj.owner_id,
+            entity="attachment",
+            ids=[attachment.id for attachment in attachments],
+            version=version,
+        )
+        await db.delete(db_obj)
+        await db.flush()
+        paths = await crud_attachment.release_files(db, attachments)
+        await self.finish(db, commit)
+        return db_obj, paths
+
 task = CRUDTask(Task)
@@ -0,0 +1,196 @@
+from typing import Any, Dict, Iterable, Optional, Tuple
+from sqlalchemy import Integer, cast, event, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from app.core.cache import task_version_cache
+from app.core.events import PENDING_CHANGES_KEY, TaskEvent, broker, record_changes
+from app.crud.base import CRUDBase
+from app.models.task import Task
+from app.models.task_stats import TaskStats
+
+# Dialekte mit INSERT ... ON CONFLICT
+UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+# Schlüssel in Session.info: Benutzer -> (Version vor, Version nach) der laufenden Transaktion
+CHANGED_OWNERS_KEY = "task_versions_changed"
+
+class CRUDTaskStats(CRUDBase[TaskStats, BaseModel, BaseModel]):
+    async def _update(
+        self, db: AsyncSession, *, owner_id: int, values: Dict[str, Any]
+    ) -> Optional[int]:
+        """
+        Setzt die Werte der Zählerzeile, erhöht die Version und liefert sie
+        (None, wenn es die Zeile nicht gibt). Das UPDATE sperrt die Zeile bis zum
+        Ende der Transaktion und ordnet so die Transaktionen eines Benutzers.
+        """
+        stmt = (
+            update(TaskStats)
+            .where(TaskStats.owner_id == owner_id)
+            .values(**values, version=TaskStats.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if self.supports_returning(db):
+            return (await db.execute(stmt.returning(TaskStats.version))).scalar()
+        result = await db.execute(stmt)
+        if not result.rowcount:
+            return None
+        return await db.scalar(select(TaskStats.version).where(TaskStats.owner_id == owner_id))
+
+    async def _recount(
+        self, db: AsyncSession, *, owner_id: int, total: int = 0, completed: int = 0
+    ) -> int:
+        """
+        Legt die fehlende Zählerzeile an, zählt die Aufgaben einmalig per COUNT(*) und
+        speichert das Ergebnis zuzüglich der Differenzen einer noch ausstehenden
+        Änderung (ohne Commit). Liefert die neue Version.
+
+        Die Zeile wird zuerst leer per INSERT ... ON CONFLICT DO NOTHING angelegt: eine
+        parallele Transaktion wartet dort auf den Commit der ersten und schreibt dann
+        nur ihre Differenzen fort, statt mit einem eigenen, veralteten Zählerstand die
+        Zeile zu überschreiben. Die Version steigt so in jedem Fall streng monoton.
+        """
+        dialect = db.get_bind().dialect.name
+        if dialect in UPSERT_INSERTS:
+            result = await db.execute(
+                UPSERT_INSERTS[dialect](TaskStats)
+                .values(owner_id=owner_id, total=0, completed=0, version=0)
+                .on_conflict_do_nothing(index_elements=[TaskStats.owner_id])
+            )
+            created = result.rowcount == 1
+        else:
+            db.add(TaskStats(owner_id=owner_id, total=0, completed=0, version=0))
+            await db.flush()
+            created = True
+
+        if not created:
+            return await self._update(
+                db,
+                owner_id=owner_id,
+                values={
+                    "total": TaskStats.total + total,
+                    "completed": TaskStats.completed + completed,
+                },
+            )
+
+        counted_total, counted_completed = (
+            await db.execute(
+                select(
+                    func.count(Task.id),
+                    func.coalesce(func.sum(cast(Task.is_completed, Integer)), 0),
+                ).where(Task.owner_id == owner_id)
+            )
+        ).one()
+        return await self._update(
+            db,
+            owner_id=owner_id,
+            values={"total": counted_total + total, "completed": counted_completed + completed},
+        )
+
+    async def get_for_owner(self, db: AsyncSession, *, owner_id: int) -> TaskStats:
+        stats = await db.get(TaskStats, owner_id)
+        if stats is None:
+            await self._recount(db, owner_id=owner_id)
+            await db.commit()
+            stats = await db.get(TaskStats, owner_id, populate_existing=True)
+        return stats
+
+    async def get_version(self, db: AsyncSession, *, owner_id: int) -> int:
+        """
+        Aktuelle Listenversion des Benutzers, bevorzugt aus dem Cache.
+        """
+        version = task_version_cache.get(owner_id)
+        if version is None:
+            version = await db.scalar(
+                select(TaskStats.version).where(TaskStats.owner_id == owner_id)
+            ) or 0
+            task_version_cache.set(owner_id, version)
+        return version
+
+    async def apply(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        total: int = 0,
+        completed: int = 0,
+        changes: Optional[Dict[str, Iterable[int]]] = None,
+    ) -> int:
+        """
+        Schreibt die Zähler um die angegebenen Differenzen fort, erhöht die Listenversion
+        und liefert die neue Version (ohne Commit). Geänderte Zeilen werden mit dieser
+        Version gestempelt (sync_version), `changes` wird nach dem Commit als Event
+        veröffentlicht (siehe app.core.events).
+
+        Muss vor der eigentlichen Änderung aufgerufen werden: fehlt die Zeile noch, wird
+        sie aus dem aktuellen Stand zuzüglich der Differenzen neu gezählt. Die Sperre auf
+        der Zählerzeile ordnet zugleich die Transaktionen eines Benutzers.
+        """
+        version = await self._update(
+            db,
+            owner_id=owner_id,
+            values={
+                "total": TaskStats.total + total,
+                "completed": TaskStats.completed + completed,
+            },
+        )
+        if version is None:
+            version = await self._recount(
+                db, owner_id=owner_id, total=total, completed=completed
+            )
+
+        changed: Dict[int, Tuple[int, int]] = db.info.setdefault(CHANGED_OWNERS_KEY, {})
+        previous = changed.get(owner_id, (version - 1, version))[0]
+        changed[owner_id] = (previous, version)
+        if changes:
+            self.record(db, owner_id=owner_id, changes=changes)
+        return version
+
+    async def touch(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        changes: Optional[Dict[str, Iterable[int]]] = None,
+    ) -> int:
+        """
+        Erhöht nur die Listenversion, z.B. bei Uploads oder gelöschten Anhängen.
+        """
+        return await self.apply(db, owner_id=owner_id, changes=changes)
+
+    @staticmethod
+    def record(db: AsyncSession, *, owner_id: int, changes: Dict[str, Iterable[int]]) -> None:
+        """
+        Merkt Änderungen für das Event nach dem Commit vor (z.B. wenn die IDs erst
+        nach dem INSERT feststehen).
+        """
+        record_changes(db.info, owner_id, changes)
+
+task_stats = CRUDTaskStats(TaskStats)
+
+
+# Gecachte Versionen erst nach dem Commit verwerfen (vorher könnte eine parallele
+# Anfrage den alten Stand erneut in den Cache laden) und die Änderungen veröffentlichen.
+@event.listens_for(Session, "after_commit")
+def _publish_versions_after_commit(session: Session) -> None:
+    pending = session.info.pop(PENDING_CHANGES_KEY, {})
+    for owner_id, (previous, version) in session.info.pop(CHANGED_OWNERS_KEY, {}).items():
+        task_version_cache.discard(owner_id)
+        broker.publish(
+            TaskEvent(
+                owner_id=owner_id,
+                version=version,
+                previous=previous,
+                changes=pending.get(owner_id, {}),
+            )
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_versions_after_rollback(session: Session) -> None:
+    session.info.pop(CHANGED_OWNERS_KEY, None)
+    session.info.pop(PENDING_CHANGES_KEY, None)
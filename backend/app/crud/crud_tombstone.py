@@ -0,0 +1,92 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+from app.crud.base import CRUDBase
+from app.models.task_stats import TaskStats
+from app.models.tombstone import Tombstone
+
+class CRUDTombstone(CRUDBase[Tombstone, BaseModel, BaseModel]):
+    async def add_many(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        entity: str,
+        ids: Iterable[int],
+        version: int,
+    ) -> None:
+        """
+        Legt Tombstones für gelöschte Zeilen an (ein INSERT, ohne Commit).
+        """
+        rows = [
+            {"owner_id": owner_id, "entity": entity, "entity_id": entity_id, "version": version}
+            for entity_id in ids
+        ]
+        if rows:
+            await db.execute(insert(Tombstone), rows)
+
+    async def get_multi_after(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        after: Optional[Tuple[int, int]],
+        until: int,
+        limit: int,
+    ) -> List[Tombstone]:
+        # Keyset über (version, id) bis einschließlich der Version `until`
+        stmt = select(Tombstone).where(Tombstone.owner_id == owner_id, Tombstone.version <= until)
+        if after is not None:
+            version, last_id = after
+            stmt = stmt.where(
+                or_(
+                    Tombstone.version > version,
+                    and_(Tombstone.version == version, Tombstone.id > last_id),
+                )
+            )
+        result = await db.scalars(stmt.order_by(Tombstone.version, Tombstone.id).limit(limit))
+        return list(result.all())
+
+    async def get_pruned_version(self, db: AsyncSession, *, owner_id: int) -> int:
+        return await db.scalar(
+            select(TaskStats.pruned_version).where(TaskStats.owner_id == owner_id)
+        ) or 0
+
+    async def prune(
+        self, db: AsyncSession, *, deleted_before: datetime, limit: int, commit: bool = True
+    ) -> int:
+        """
+        Entfernt bis zu `limit` Tombstones, die vor `deleted_before` angelegt wurden, und
+        merkt pro Besitzer die höchste entfernte Version (TaskStats.pruned_version).
+        """
+        rows = (
+            await db.execute(
+                select(Tombstone.id, Tombstone.owner_id, Tombstone.version)
+                .where(Tombstone.deleted_at < deleted_before)
+                .order_by(Tombstone.id)
+                .limit(limit)
+            )
+        ).all()
+        if not rows:
+            return 0
+        horizon: Dict[int, int] = {}
+        for _, owner_id, version in rows:
+            horizon[owner_id] = max(horizon.get(owner_id, 0), version)
+        for owner_id, version in horizon.items():
+            await db.execute(
+                update(TaskStats)
+                .where(TaskStats.owner_id == owner_id, TaskStats.pruned_version < version)
+                .values(pruned_version=version)
+                .execution_options(synchronize_session=False)
+            )
+        await db.execute(
+            delete(Tombstone)
+            .where(Tombstone.id.in_([row[0] for row in rows]))
+            .execution_options(synchronize_session=False)
+        )
+        await self.finish(db, commit)
+        return len(rows)
+
+tombstone = CRUDTombstone(Tombstone)
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import delete, func, insert, literal, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+from app.crud.base import CRUDBase
+from app.models.upload_session import UploadSession
+from app.models.user import User
+
+class CRUDUploadSession(CRUDBase[UploadSession, BaseModel, BaseModel]):
+    async def get_for_user(
+        self, db: AsyncSession, *, id: str, user_id: int
+    ) -> Optional[UploadSession]:
+        # Abgelaufene Uploads gelten als nicht vorhanden, auch bevor sie aufgeräumt sind
+        return await db.scalar(
+            select(UploadSession).where(
+                UploadSession.id == id,
+                UploadSession.user_id == user_id,
+                UploadSession.expires_at > datetime.utcnow(),
+            )
+        )
+
+    async def create_limited(
+        self, db: AsyncSession, *, values: Dict[str, Any], limit: int
+    ) -> Optional[UploadSession]:
+        """
+        Legt den Upload (ohne Commit) nur an, solange der Benutzer weniger als `limit`
+        offene Uploads hat; sonst None. Zählen und Einfügen sind eine Anweisung, die
+        Sperre auf der Benutzerzeile serialisiert parallele Anlagen desselben Benutzers
+        (SQLite ignoriert FOR UPDATE, schreibt aber ohnehin nur seriell).
+        """
+        user_id = values["user_id"]
+        await db.execute(select(User.id).where(User.id == user_id).with_for_update())
+        active = (
+            select(func.count(UploadSession.id))
+            .where(
+                UploadSession.user_id == user_id,
+                UploadSession.attachment_id.is_(None),
+                UploadSession.expires_at > datetime.utcnow(),
+            )
+            .scalar_subquery()
+        )
+        columns = UploadSession.__table__.c
+        row = select(
+            *(literal(value, type_=columns[key].type).label(key) for key, value in values.items())
+        ).where(active < limit)
+        result = await db.execute(insert(UploadSession).from_select(list(values), row))
+        if result.rowcount != 1:
+            return None
+        return await db.get(UploadSession, values["id"])
+
+    async def acquire(
+        self, db: AsyncSession, *, id: str, offset: int, lease_seconds: int, commit: bool = True
+    ) -> bool:
+        """
+        Sperrt den Upload für einen PATCH ab `offset`. Schlägt fehl, wenn der Offset
+        nicht mehr stimmt, der Upload abgeschlossen ist oder gerade geschrieben wird;
+        die Sperre eines abgebrochenen Schreibers verfällt nach `lease_seconds`.
+        """
+        now = datetime.utcnow()
+        result = await db.execute(
+            update(UploadSession)
+            .where(
+                UploadSession.id == id,
+                UploadSession.upload_offset == offset,
+                UploadSession.attachment_id.is_(None),
+                or_(UploadSession.locked_until.is_(None), UploadSession.locked_until < now),
+            )
+            .values(locked_until=now + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+        await self.finish(db, commit)
+        return result.rowcount == 1
+
+    async def renew(
+        self, db: AsyncSession, *, id: str, lease_seconds: int, commit: bool = True
+    ) -> None:
+        # Sperre eines noch laufenden PATCH verlängern
+        await db.execute(
+            update(UploadSession)
+            .where(UploadSession.id == id)
+            .values(locked_until=datetime.utcnow() + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+        await self.finish(db, commit)
+
+    async def release(
+        self,
+        db: AsyncSession,
+        *,
+        id: str,
+        offset: int,
+        expires_at: datetime,
+        attachment_id: Optional[int] = None,
+        commit: bool = True,
+    ) -> None:
+        # Neuen Offset festschreiben und die Sperre lösen
+        await db.execute(
+            update(UploadSession)
+            .where(UploadSession.id == id)
+            .values(
+                upload_offset=offset,
+                expires_at=expires_at,
+                attachment_id=attachment_id,
+                locked_until=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self.finish(db, commit)
+
+    async def remove_expired(self, db: AsyncSession, *, limit: int) -> List[str]:
+        """
+        Löscht bis zu `limit` abgelaufene, nicht gesperrte Uploads (ohne Commit) und
+        liefert ihre IDs, damit die Teildateien entfernt werden können.
+        """
+        now = datetime.utcnow()
+        expired = (
+            select(UploadSession.id)
+            .where(
+                UploadSession.expires_at <= now,
+                or_(UploadSession.locked_until.is_(None), UploadSession.locked_until < now),
+            )
+            .limit(limit)
+        )
+        stmt = delete(UploadSession).execution_options(synchronize_session=False)
+        if self.supports_returning(db):
+            result = await db.scalars(
+                stmt.where(UploadSession.id.in_(expired.scalar_subquery())).returning(UploadSession.id)
+            )
+            return list(result.all())
+
+        ids = list((await db.scalars(expired)).all())
+        if ids:
+            await db.execute(stmt.where(UploadSession.id.in_(ids)))
+        return ids
+
+upload_session = CRUDUploadSession(UploadSession)
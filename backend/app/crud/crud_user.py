@@ -1,34 +1,89 @@
-from typing import Optional
-from sqlalchemy.orm import Session
+from typing import Any, Dict, Optional, Union
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 from app.crud.base import CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.cache import invalidate_cached_user
+from app.core.security import hash_password, verify_and_update_password
+
+# Schlüssel in Session.info: IDs der in der laufenden Transaktion geänderten Benutzer
+CHANGED_USERS_KEY = "auth_cache_changed_users"
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
-    def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
-        return db.query(User).filter(User.email == email).first()
-
-    def create(self, db: Session, *, obj_in: UserCreate) -> User:
-        # Passwort hashen bevor es gespeichert wird
-        db_obj = User(
-            email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
-            is_active=obj_in.is_active,
-            is_superuser=obj_in.is_superuser,
+    async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        result = await db.scalars(select(User).where(User.email == email))
+        return result.first()
+
+    async def create(self, db: AsyncSession, *, obj_in: UserCreate, commit: bool = True) -> User:
+        # Passwort hashen bevor es gespeichert wird (im begrenzten Hashing-Pool)
+        db_obj = await self.insert_row(
+            db,
+            {
+                "email": obj_in.email,
+                "hashed_password": await hash_password(obj_in.password),
+                "is_active": obj_in.is_active,
+                "is_superuser": obj_in.is_superuser,
+            },
         )
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await self.finish(db, commit)
         return db_obj
 
-    def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: User,
+        obj_in: Union[UserUpdate, Dict[str, Any]],
+        commit: bool = True,
+    ) -> User:
+        if isinstance(obj_in, dict):
+            update_data = dict(obj_in)
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+
+        password = update_data.pop("password", None)
+        if password:
+            update_data["hashed_password"] = await hash_password(password)
+
+        # Bulk-UPDATEs lösen keine Mapper-Events aus: vor dem Commit selbst vormerken
+        db.info.setdefault(CHANGED_USERS_KEY, set()).add(db_obj.id)
+        return await super().update(db, db_obj=db_obj, obj_in=update_data, commit=commit)
+
+    async def authenticate(self, db: AsyncSession, *, email: str, password: str) -> Optional[User]:
         # Benutzer authentifizieren (Login)
-        user = self.get_by_email(db, email=email)
+        user = await self.get_by_email(db, email=email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        verified, new_hash = await verify_and_update_password(password, user.hashed_password)
+        if not verified:
             return None
+        if new_hash:
+            # Hash mit veraltetem Kostenfaktor beim Login transparent erneuern
+            user.hashed_password = new_hash
+            await db.commit()
         return user
 
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _collect_changed_user(mapper, connection, target: User) -> None:
+    # Beim Flush nur vormerken: vor dem Commit könnte eine parallele Anfrage den alten
+    # Stand sonst gleich wieder in den Cache laden
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(CHANGED_USERS_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_auth_cache(session: Session) -> None:
+    # Geänderte Benutzer (is_active, is_superuser, Passwort ...) nicht mehr aus dem Cache bedienen
+    for user_id in session.info.pop(CHANGED_USERS_KEY, ()):
+        invalidate_cached_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session: Session) -> None:
+    session.info.pop(CHANGED_USERS_KEY, None)
+
 user = CRUDUser(User)
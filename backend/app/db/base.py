@@ -2,4 +2,9 @@
 from app.db.base_class import Base  # noqa
 from app.models.user import User  # noqa
 from app.models.task import Task  # noqa
-from app.models.attachment import Attachment  # noqa
\ No newline at end of file
+from app.models.attachment import Attachment  # noqa
+from app.models.blob import Blob  # noqa
+from app.models.task_stats import TaskStats  # noqa
+from app.models.tombstone import Tombstone  # noqa
+from app.models.file_deletion import FileDeletion  # noqa
+from app.models.upload_session import UploadSession  # noqa
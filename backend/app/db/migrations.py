@@ -0,0 +1,110 @@
+import logging
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Column, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.base import Base
+
+
+logger = logging.getLogger(__name__)
+
+# Nach dem ersten Release hinzugekommene Spalten: (Tabelle, Spalte, Backfill oder None).
+# Bestehende Datenbanken erhalten sie per ALTER TABLE ... ADD COLUMN; das Statement
+# befüllt die Spalte direkt danach (nur in dem Lauf, der sie anlegt).
+ADDED_COLUMNS: List[Tuple[str, str, Optional[str]]] = [
+    (
+        "attachment",
+        "uploader_id",
+        "UPDATE attachment SET uploader_id = "
+        "(SELECT task.owner_id FROM task WHERE task.id = attachment.task_id) "
+        "WHERE uploader_id IS NULL AND task_id IS NOT NULL",
+    ),
+    ("attachment", "file_size", None),
+    ("attachment", "checksum", None),
+    ("attachment", "blob_id", None),
+    ("task", "updated_at", "UPDATE task SET updated_at = created_at WHERE updated_at IS NULL"),
+    ("task", "sync_version", None),
+    (
+        "attachment",
+        "updated_at",
+        "UPDATE attachment SET updated_at = created_at WHERE updated_at IS NULL",
+    ),
+    ("attachment", "sync_version", None),
+    ("task_stats", "pruned_version", None),
+]
+
+
+def _column_ddl(connection: Connection, column: Column) -> str:
+    # Spalte für ALTER TABLE ... ADD COLUMN; NOT NULL nur mit festem Standardwert,
+    # sonst wäre das Statement bei vorhandenen Zeilen ungültig
+    preparer = connection.dialect.identifier_preparer
+    ddl = f"{preparer.quote(column.name)} {column.type.compile(dialect=connection.dialect)}"
+    default = column.default.arg if column.default is not None and column.default.is_scalar else None
+    if isinstance(default, bool):
+        ddl += f" DEFAULT {'TRUE' if default else 'FALSE'}"
+    elif isinstance(default, (int, float)):
+        ddl += f" DEFAULT {default}"
+    elif isinstance(default, str):
+        ddl += " DEFAULT '{}'".format(default.replace("'", "''"))
+    if default is not None and not column.nullable:
+        ddl += " NOT NULL"
+    for foreign_key in column.foreign_keys:
+        target = foreign_key.column
+        ddl += f" REFERENCES {preparer.quote(target.table.name)} ({preparer.quote(target.name)})"
+    return ddl
+
+
+def upgrade_schema(connection: Connection) -> List[str]:
+    """
+    Ergänzt in bestehenden Tabellen die Spalten aus ADDED_COLUMNS und fehlende
+    Indizes der Modelle (create_all legt nur fehlende Tabellen an).
+
+    Idempotent; liefert die hinzugefügten Spalten als "tabelle.spalte".
+    """
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    tables = Base.metadata.tables
+    existing = {
+        name: {column["name"] for column in inspector.get_columns(name)}
+        for name in existing_tables
+        if name in tables
+    }
+    preparer = connection.dialect.identifier_preparer
+
+    added = []
+    for table_name, column_name, backfill in ADDED_COLUMNS:
+        if table_name not in existing or column_name in existing[table_name]:
+            continue
+        column = tables[table_name].columns[column_name]
+        ddl = _column_ddl(connection, column)
+        connection.execute(text(f"ALTER TABLE {preparer.quote(table_name)} ADD COLUMN {ddl}"))
+        if backfill:
+            connection.execute(text(backfill))
+        existing[table_name].add(column_name)
+        added.append(f"{table_name}.{column_name}")
+
+    for table_name, columns in existing.items():
+        missing = [column.name for column in tables[table_name].columns if column.name not in columns]
+        if missing:
+            logger.warning(
+                "Spalten ohne Eintrag in ADDED_COLUMNS fehlen in %s: %s",
+                table_name,
+                ", ".join(missing),
+            )
+        for index in tables[table_name].indexes:
+            if all(column.name in columns for column in index.columns):
+                index.create(connection, checkfirst=True)
+
+    if added:
+        logger.info("Schema ergänzt: %s", ", ".join(added))
+    return added
+
+
+def init_schema(engine: Engine) -> List[str]:
+    """
+    Legt fehlende Tabellen an und bringt bestehende auf den Stand der Modelle.
+    """
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        return upgrade_schema(connection)
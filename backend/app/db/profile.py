@@ -0,0 +1,91 @@
+from typing import Any, Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+
+_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def is_sqlite(uri: str) -> bool:
+    return uri.startswith("sqlite")
+
+
+def _is_sqlite_memory(uri: str) -> bool:
+    return uri.split("?", 1)[0] in {"sqlite://", "sqlite+aiosqlite://", "sqlite+pysqlite://"} or ":memory:" in uri or "mode=memory" in uri
+
+
+def engine_options(uri: str) -> Dict[str, Any]:
+    """
+    Engine-Parameter passend zum Datenbanktyp (Pool-Größen, Recycling, connect_args).
+    """
+    if is_sqlite(uri):
+        options: Dict[str, Any] = {"connect_args": {"check_same_thread": False}}
+        if not _is_sqlite_memory(uri):
+            # Dateibasiertes SQLite nutzt ebenfalls einen QueuePool (aiosqlite sonst NullPool)
+            options.update(
+                poolclass=AsyncAdaptedQueuePool if "+aiosqlite" in uri else QueuePool,
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_timeout=settings.DB_POOL_TIMEOUT,
+            )
+        return options
+
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def sqlite_pragmas(*, read_only: bool = False) -> List[str]:
+    """
+    PRAGMA-Anweisungen für neue SQLite-Verbindungen.
+
+    WAL erlaubt parallele Leser neben einem Schreiber; busy_timeout lässt Schreiber
+    warten statt sofort mit "database is locked" abzubrechen.
+    """
+    journal_mode = settings.SQLITE_JOURNAL_MODE.upper()
+    synchronous = settings.SQLITE_SYNCHRONOUS.upper()
+    if journal_mode not in _JOURNAL_MODES:
+        raise ValueError(f"Ungültiger SQLITE_JOURNAL_MODE: {journal_mode}")
+    if synchronous not in _SYNCHRONOUS_MODES:
+        raise ValueError(f"Ungültiger SQLITE_SYNCHRONOUS: {synchronous}")
+
+    pragmas = [
+        f"PRAGMA journal_mode={journal_mode}",
+        f"PRAGMA synchronous={synchronous}",
+        f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}",
+        # negativer Wert = Größe in KiB statt in Seiten
+        f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+
+def configure_engine(engine: Any, *, read_only: bool = False) -> None:
+    """
+    Registriert die SQLite-Pragmas auf einer (synchronen oder asynchronen) Engine.
+    """
+    sync_engine: Engine = getattr(engine, "sync_engine", engine)
+    if sync_engine.dialect.name != "sqlite":
+        return
+
+    pragmas = sqlite_pragmas(read_only=read_only)
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
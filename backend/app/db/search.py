@@ -0,0 +1,97 @@
+import re
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+
+# Externer FTS5-Index auf task(title, description); die Trigger halten ihn bei
+# INSERT/UPDATE/DELETE synchron – auch bei Bulk-Statements, die am ORM vorbeigehen.
+# prefix='2 3' legt zusätzliche Präfix-Indizes an, damit "abc*" ohne Scan auskommt.
+SQLITE_FTS_DDL: List[str] = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS task_fts USING fts5(
+        title, description,
+        content='task', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS task_fts_ai AFTER INSERT ON task BEGIN
+        INSERT INTO task_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS task_fts_ad AFTER DELETE ON task BEGIN
+        INSERT INTO task_fts(task_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS task_fts_au AFTER UPDATE OF title, description ON task BEGIN
+        INSERT INTO task_fts(task_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO task_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+# Postgres: generierte tsvector-Spalte mit GIN-Index (wird vom Server selbst gepflegt)
+POSTGRES_FTS_DDL: List[str] = [
+    """
+    ALTER TABLE task ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_task_search_vector ON task USING GIN (search_vector)",
+]
+
+# Obergrenze, damit eine Anfrage nicht beliebig viele Terme erzeugt
+MAX_SEARCH_TERMS = 16
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _create_search_index(connection: Connection) -> None:
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'task_fts'")
+        ).first()
+        for statement in SQLITE_FTS_DDL:
+            connection.execute(text(statement))
+        if not exists:
+            # Bestehende Aufgaben einmalig indizieren
+            connection.execute(text("INSERT INTO task_fts(task_fts) VALUES ('rebuild')"))
+    elif dialect == "postgresql":
+        for statement in POSTGRES_FTS_DDL:
+            connection.execute(text(statement))
+
+
+def init_search(engine: Engine) -> None:
+    """
+    Legt den Volltextindex für Aufgaben an (idempotent, auch für bestehende Datenbanken).
+    """
+    with engine.begin() as connection:
+        _create_search_index(connection)
+
+
+def search_terms(query: str) -> List[str]:
+    """
+    Zerlegt die Benutzereingabe in Wortterme; Operatoren und Sonderzeichen der
+    Suchsyntax werden dabei verworfen.
+    """
+    return _TERM_RE.findall(query.lower())[:MAX_SEARCH_TERMS]
+
+
+def sqlite_match_query(terms: List[str]) -> str:
+    # Jeder Term als Präfix-Suche, alle Terme müssen vorkommen
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def postgres_match_query(terms: List[str]) -> str:
+    return " & ".join(f"{term}:*" for term in terms)
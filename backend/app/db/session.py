@@ -1,13 +1,170 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional, Sequence, TypeVar
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
+from app.db.profile import configure_engine, engine_options, is_sqlite
 
 
-connect_args = {}
-if settings.SQLALCHEMY_DATABASE_URI.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
+T = TypeVar("T")
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, connect_args=connect_args)
+engine = create_engine(
+    settings.SQLALCHEMY_DATABASE_URI, **engine_options(settings.SQLALCHEMY_DATABASE_URI)
+)
+configure_engine(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Lese-Engine: explizite URL (z.B. Replica) oder bei SQLite eine schreibgeschützte
+# zweite Engine auf dieselbe Datei; sonst wird die Haupt-Engine verwendet
+read_database_uri: Optional[str] = settings.SQLALCHEMY_READ_DATABASE_URI
+if read_database_uri is None and settings.DB_READ_ENGINE_ENABLED and is_sqlite(
+    settings.SQLALCHEMY_DATABASE_URI
+):
+    read_database_uri = settings.SQLALCHEMY_DATABASE_URI
+
+read_engine = engine
+ReadSessionLocal = SessionLocal
+if read_database_uri is not None:
+    read_engine = create_engine(read_database_uri, **engine_options(read_database_uri))
+    configure_engine(read_engine, read_only=True)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Asynchroner Pfad: nur aufbauen, wenn aktiviert (benötigt aiosqlite bzw. asyncpg)
+async_engine = None
+async_read_engine = None
+AsyncSessionLocal: Optional[async_sessionmaker] = None
+AsyncReadSessionLocal: Optional[async_sessionmaker] = None
+if settings.DB_ASYNC:
+    async_engine = create_async_engine(
+        settings.async_database_uri, **engine_options(settings.async_database_uri)
+    )
+    configure_engine(async_engine)
+    # expire_on_commit=False: nach dem Commit dürfen keine impliziten Nachladevorgänge passieren
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async_read_engine = async_engine
+    AsyncReadSessionLocal = AsyncSessionLocal
+    if read_database_uri is not None:
+        async_read_uri = (
+            settings.async_database_uri
+            if read_database_uri == settings.SQLALCHEMY_DATABASE_URI
+            else settings.to_async_uri(read_database_uri)
+        )
+        async_read_engine = create_async_engine(async_read_uri, **engine_options(async_read_uri))
+        configure_engine(async_read_engine, read_only=True)
+        AsyncReadSessionLocal = async_sessionmaker(
+            async_read_engine, autoflush=False, expire_on_commit=False
+        )
+
+
+class _SyncStreamResult:
+    """
+    Synchrones Result mit der Schnittstelle von AsyncResult (für Session.stream).
+    """
+
+    def __init__(self, result: Any):
+        self._result = result
+
+    async def partitions(self, size: Optional[int] = None) -> AsyncIterator[Sequence[Any]]:
+        for partition in self._result.partitions(size):
+            yield partition
+
+    def scalars(self) -> "_SyncStreamResult":
+        return _SyncStreamResult(self._result.scalars())
+
+
+class SyncSessionAdapter:
+    """
+    Stellt eine synchrone Session mit der Schnittstelle von AsyncSession bereit.
+
+    So laufen CRUD-Schicht und Endpunkte unverändert, wenn DB_ASYNC deaktiviert ist
+    (z.B. in Tests). Die Aufrufe blockieren dabei den Event-Loop.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    @property
+    def info(self) -> dict:
+        return self.sync_session.info
+
+    def add(self, instance: Any) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances: Any) -> None:
+        self.sync_session.add_all(instances)
+
+    def expunge(self, instance: Any) -> None:
+        self.sync_session.expunge(instance)
+
+    def get_bind(self, *args: Any, **kwargs: Any) -> Any:
+        return self.sync_session.get_bind(*args, **kwargs)
+
+    async def execute(self, *args: Any, **kwargs: Any) -> Any:
+        return self.sync_session.execute(*args, **kwargs)
+
+    async def scalar(self, *args: Any, **kwargs: Any) -> Any:
+        return self.sync_session.scalar(*args, **kwargs)
+
+    async def stream(self, *args: Any, **kwargs: Any) -> _SyncStreamResult:
+        return _SyncStreamResult(self.sync_session.execute(*args, **kwargs))
+
+    async def scalars(self, *args: Any, **kwargs: Any) -> Any:
+        return self.sync_session.scalars(*args, **kwargs)
+
+    async def get(self, *args: Any, **kwargs: Any) -> Any:
+        return self.sync_session.get(*args, **kwargs)
+
+    async def delete(self, instance: Any) -> None:
+        self.sync_session.delete(instance)
+
+    async def flush(self, *args: Any, **kwargs: Any) -> None:
+        self.sync_session.flush(*args, **kwargs)
+
+    async def refresh(self, *args: Any, **kwargs: Any) -> None:
+        self.sync_session.refresh(*args, **kwargs)
+
+    @asynccontextmanager
+    async def begin_nested(self) -> AsyncIterator[Any]:
+        # Savepoint: bei einer Ausnahme wird nur bis hierher zurückgerollt
+        with self.sync_session.begin_nested() as transaction:
+            yield transaction
+
+    async def commit(self) -> None:
+        self.sync_session.commit()
+
+    async def rollback(self) -> None:
+        self.sync_session.rollback()
+
+    async def close(self) -> None:
+        self.sync_session.close()
+
+    async def run_sync(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return fn(self.sync_session, *args, **kwargs)
+
+
+def new_session(read_only: bool = False) -> AsyncSession:
+    """
+    Erstellt eine neue Sitzung passend zu DB_ASYNC (AsyncSession oder SyncSessionAdapter).
+
+    Mit read_only=True wird die Lese-Engine verwendet (falls konfiguriert).
+    """
+    if AsyncSessionLocal is not None:
+        factory = AsyncReadSessionLocal if read_only else AsyncSessionLocal
+        return factory()
+    factory = ReadSessionLocal if read_only else SessionLocal
+    return SyncSessionAdapter(factory(expire_on_commit=False))  # type: ignore[return-value]
+
+
+async def dispose_engines() -> None:
+    """
+    Gibt die Verbindungspools aller Engines frei (beim Herunterfahren).
+    """
+    for async_eng in {async_engine, async_read_engine} - {None}:
+        await async_eng.dispose()
+    for sync_eng in {engine, read_engine}:
+        sync_eng.dispose()
@@ -1,14 +1,22 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from app.api import deps, public_uploads
 from app.api.api_v1.api import apirouter
+from app.core.cache import auth_user_cache, task_version_cache
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
-from app.db.base import Base
-from app.db.session import engine
-from app.utils.storage import ensure_upload_dir
+from app.core.events import broker
+from app.core.file_deletion import file_deletion_worker
+from app.core.sweeper import upload_sweeper
+from app.db.migrations import init_schema
+from app.db.search import init_search
+from app.db.session import dispose_engines, engine
+from app.utils.responses import DefaultJSONResponse
+from app.utils.storage import ensure_upload_dir, get_storage
 
 
 @asynccontextmanager
@@ -16,14 +24,23 @@ async def lifespan(app: FastAPI):
     """
     Lifespan-Event für Datenbank-Initialisierung.
     """
-    Base.metadata.create_all(bind=engine)
+    init_schema(engine)
+    init_search(engine)
+    await broker.start()
+    await file_deletion_worker.start()
+    await upload_sweeper.start()
     yield
+    await upload_sweeper.stop()
+    await file_deletion_worker.stop()
+    await broker.stop()
+    await dispose_engines()
 
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     lifespan=lifespan,
+    default_response_class=DefaultJSONResponse,
 )
 
 app.add_middleware(
@@ -32,14 +49,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Next-Cursor",
+        "Location",
+        "Tus-Resumable",
+        "Upload-Offset",
+        "Upload-Length",
+        "Upload-Expires",
+        "X-Attachment-Id",
+        "X-Attachment-Url",
+    ],
 )
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        upload_prefix=settings.UPLOAD_PUBLIC_PREFIX,
+        excluded_extensions=settings.COMPRESSION_EXCLUDED_EXTENSIONS,
+    )
 
 ensure_upload_dir()
-app.mount(
-    settings.UPLOAD_PUBLIC_PREFIX,
-    StaticFiles(directory=str(settings.upload_dir_abs)),
-    name="uploads",
-)
+# Fehlkonfiguration (z.B. S3 ohne boto3 oder Bucket) bricht den Start hier ab
+storage = get_storage()
+if settings.UPLOAD_PUBLIC_MOUNT and storage.local:
+    app.mount(
+        settings.UPLOAD_PUBLIC_PREFIX,
+        StaticFiles(directory=str(settings.upload_dir_abs)),
+        name="uploads",
+    )
+elif settings.UPLOAD_PUBLIC_MOUNT:
+    # Objektspeicher: Weiterleitung auf vorsignierte URLs
+    app.include_router(public_uploads.router, prefix=settings.UPLOAD_PUBLIC_PREFIX.rstrip("/"))
 
 app.include_router(apirouter, prefix=settings.API_V1_STR)
 
@@ -53,3 +95,13 @@ def read_root():
 def healthcheck():
     return {"status": "ok"}
 
+
+@app.get("/metrics", dependencies=[Depends(deps.verify_metrics_token)], include_in_schema=False)
+def metrics():
+    return {
+        "auth_cache": auth_user_cache.stats(),
+        "task_version_cache": task_version_cache.stats(),
+        "events": broker.stats(),
+        "upload_sweeper": upload_sweeper.stats(),
+        "file_deletion": file_deletion_worker.stats(),
+    }
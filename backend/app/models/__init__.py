@@ -1,3 +1,8 @@
 from .user import User
 from .task import Task
 from .attachment import Attachment
+from .blob import Blob
+from .task_stats import TaskStats
+from .tombstone import Tombstone
+from .file_deletion import FileDeletion
+from .upload_session import UploadSession
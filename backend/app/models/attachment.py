@@ -1,17 +1,33 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base_class import Base
 
 class Attachment(Base):
+    __table_args__ = (
+        Index("ix_attachment_sync_id", "sync_version", "id"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, nullable=False)     # Originaler Dateiname (z.B. "bericht.pdf")
     file_path = Column(String, nullable=False)    # Pfad auf dem Server (z.B. "uploads/1_bericht.pdf")
     file_type = Column(String, nullable=True)     # MIME-Type (z.B. "application/pdf")
+    file_size = Column(Integer, nullable=True)    # Größe in Bytes
+    checksum = Column(String(64), nullable=True)  # SHA-256 des Inhalts (hex)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Listenversion des Besitzers bei der letzten Änderung (Delta-Sync, /tasks/changes)
+    sync_version = Column(Integer, nullable=False, default=0)
 
     # Fremdschlüssel zur Verknüpfung mit der Aufgabe
-    task_id = Column(Integer, ForeignKey("task.id"), nullable=True) # Nullable, falls Datei erst hochgeladen wird
+    task_id = Column(Integer, ForeignKey("task.id"), nullable=True, index=True) # Nullable, falls Datei erst hochgeladen wird
+
+    # Wer die Datei hochgeladen hat (auch für noch nicht verknüpfte Uploads)
+    uploader_id = Column(Integer, ForeignKey("user.id"), nullable=True, index=True)
+
+    # Verweis auf den inhaltsadressierten Blob (nur im Speichermodus "cas")
+    blob_id = Column(Integer, ForeignKey("blob.id"), nullable=True, index=True)
     
     # Beziehung zur Task-Entität
     task = relationship("Task", back_populates="attachments")
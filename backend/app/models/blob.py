@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.db.base_class import Base
+
+class Blob(Base):
+    # Inhaltsadressierte Datei: gleicher Inhalt wird nur einmal gespeichert
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, index=True, nullable=False)
+    size = Column(Integer, nullable=False)
+    file_path = Column(String, nullable=False)    # Öffentliche URL der Datei (z.B. "/uploads/ab/cd/<sha256>.pdf")
+
+    # Anzahl der Attachments, die auf diesen Blob verweisen; bei 0 wird die Datei entfernt
+    refcount = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
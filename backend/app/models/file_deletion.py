@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from datetime import datetime
+from app.db.base_class import Base
+
+class FileDeletion(Base):
+    # Warteschlange für Dateien, die nach dem Löschen ihrer Zeilen entfernt werden;
+    # wird in derselben Transaktion befüllt und im Hintergrund abgearbeitet
+    __table_args__ = (
+        Index("ix_filedeletion_attempts_next", "attempts", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    file_path = Column(String, nullable=False)     # Gespeicherte Angabe wie Attachment.file_path
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Frühester nächster Versuch; beim Abholen wird er als Sperrfrist nach vorn verschoben
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
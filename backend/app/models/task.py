@@ -1,14 +1,26 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Index
+from sqlalchemy.orm import query_expression, relationship
 from datetime import datetime
 from app.db.base_class import Base
 
 class Task(Base):
+    # Zusammengesetzte Indizes für die Cursor-Paginierung pro Besitzer (auch absteigend
+    # nutzbar), optional gefiltert nach Erledigt-Status
+    __table_args__ = (
+        Index("ix_task_owner_created_id", "owner_id", "created_at", "id"),
+        Index("ix_task_owner_completed_created_id", "owner_id", "is_completed", "created_at", "id"),
+        Index("ix_task_owner_sync_id", "owner_id", "sync_version", "id"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True, nullable=False)
     description = Column(String, nullable=True)
     is_completed = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Listenversion des Besitzers bei der letzten Änderung (Delta-Sync, /tasks/changes)
+    sync_version = Column(Integer, nullable=False, default=0)
 
     # Verknüpfung zum Besitzer (User)
     owner_id = Column(Integer, ForeignKey("user.id"))
@@ -17,3 +29,6 @@ class Task(Base):
     # Neue Beziehung: Eine Aufgabe hat viele Anhänge
     # cascade="all, delete-orphan" löscht Anhänge automatisch, wenn Task gelöscht wird
     attachments = relationship("Attachment", back_populates="task", cascade="all, delete-orphan")
+
+    # Anzahl der Anhänge, wird nur in der schlanken Listenansicht per with_expression() geladen
+    attachment_count = query_expression()
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from app.db.base_class import Base
+
+class TaskStats(Base):
+    # Vorberechnete Zähler pro Benutzer, werden bei jeder Task-Änderung fortgeschrieben
+    owner_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+
+    # Wird bei jeder Änderung an Aufgaben oder Anhängen des Benutzers erhöht (Listen-ETag)
+    version = Column(Integer, nullable=False, default=0)
+
+    # Höchste Version bereits entfernter Tombstones: ältere Sync-Tokens sind ungültig
+    pruned_version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from datetime import datetime
+from app.db.base_class import Base
+
+class Tombstone(Base):
+    # Merkt gelöschte Aufgaben und Anhänge, damit Delta-Sync-Clients sie entfernen können
+    __table_args__ = (
+        Index("ix_tombstone_owner_version_id", "owner_id", "version", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    entity = Column(String(20), nullable=False)    # "task" oder "attachment"
+    entity_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False)      # Listenversion des Besitzers beim Löschen
+    deleted_at = Column(DateTime, default=datetime.utcnow)
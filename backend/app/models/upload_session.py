@@ -0,0 +1,21 @@
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey, DateTime
+from datetime import datetime
+from app.db.base_class import Base
+
+class UploadSession(Base):
+    # Fortsetzbarer Upload (tus-Protokoll); die Daten liegen bis zum Abschluss unter
+    # UPLOAD_DIR/.incoming/<id>.part
+    id = Column(String(32), primary_key=True)          # Zufälliges Token, Teil der Upload-URL
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=False, index=True)
+    filename = Column(String, nullable=False)          # Bereinigter Originalname
+    stored_filename = Column(String, nullable=False)   # Speichername wie bei /upload
+    content_type = Column(String, nullable=True)
+    upload_length = Column(BigInteger, nullable=False)  # Angekündigte Gesamtgröße in Bytes
+    upload_offset = Column(BigInteger, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Verfällt ohne Aktivität; jeder PATCH verlängert die Frist
+    expires_at = Column(DateTime, nullable=False, index=True)
+    # Sperrfrist eines laufenden PATCH (ein Schreiber pro Upload, auch über Worker hinweg)
+    locked_until = Column(DateTime, nullable=True)
+    # Nach dem Abschluss: das angelegte Attachment
+    attachment_id = Column(Integer, nullable=True)
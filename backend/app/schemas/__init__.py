@@ -1,4 +1,8 @@
 from .user import User, UserCreate, UserUpdate, UserInDB
-from .token import Token, TokenPayload
-from .task import Task, TaskCreate, TaskUpdate, TaskInDBBase
-from .attachment import AttachmentOut
\ No newline at end of file
+from .token import StreamTicket, Token, TokenPayload
+from .task import (
+    Task, TaskCreate, TaskUpdate, TaskInDBBase, TaskSummary,
+    TaskBatchUpdate, TaskBatchDelete, TaskBatchResult, TaskStats, TaskChanges,
+    TaskExport, TaskImport, TaskImportError, TaskImportResult,
+)
+from .attachment import AttachmentOut, DirectUpload, DirectUploadCreate, DirectUploadComplete
@@ -1,5 +1,7 @@
 from datetime import datetime
-from pydantic import BaseModel
+from typing import Dict, Optional
+
+from pydantic import BaseModel, Field
 
 # Schema für Anhänge (Attachments)
 class AttachmentOut(BaseModel):
@@ -10,3 +12,22 @@ class AttachmentOut(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+# Direkter Upload in den Objektspeicher über eine vorsignierte URL
+class DirectUploadCreate(BaseModel):
+    filename: str
+    size: int = Field(gt=0)
+    content_type: Optional[str] = None
+
+class DirectUpload(BaseModel):
+    upload_id: str
+    url: str
+    method: str
+    # Header, die der Client genau so mitsenden muss (sind mitsigniert)
+    headers: Dict[str, str]
+    expires_in: int
+
+class DirectUploadComplete(BaseModel):
+    upload_id: str
+    content_type: Optional[str] = None
@@ -1,6 +1,6 @@
 from typing import Optional
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from .attachment import AttachmentOut
 
 # Gemeinsame Eigenschaften für alle Task-Schemas
@@ -32,19 +32,61 @@ class Task(TaskInDBBase):
     # Die Antwort enthält die vollen Attachment-Objekte
     attachments: list[AttachmentOut] = []
 
+class TaskSummary(TaskInDBBase):
+    # Schlanke Listenansicht: nur die Anzahl der Anhänge statt der vollen Objekte
+    attachment_count: int = 0
 
+# Batch-Operationen: jedes Element trägt die ID der zu ändernden Aufgabe
+class TaskBatchUpdate(TaskUpdate):
+    id: int
 
+class TaskBatchDelete(BaseModel):
+    ids: list[int]
 
+# Ergebnis pro Element einer Batch-Operation (in Reihenfolge der Anfrage)
+class TaskBatchResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: str  # "created", "updated", "deleted", "not_found" oder "forbidden"
 
+# Zähler pro Benutzer für Dashboard-Badges
+class TaskStats(BaseModel):
+    total: int
+    completed: int
+    open: int
 
+# Delta-Sync: geänderte Zeilen und Löschungen seit einem Sync-Token
+class TaskChanges(BaseModel):
+    tasks: list[Task] = []
+    attachments: list[AttachmentOut] = []
+    deleted_task_ids: list[int] = []
+    deleted_attachment_ids: list[int] = []
+    next_token: str
+    has_more: bool
 
+# Export/Import: eine Zeile pro Aufgabe (NDJSON bzw. CSV), ohne Anhänge
+class TaskExport(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    is_completed: bool = False
+    created_at: datetime
 
+    class Config:
+        from_attributes = True
 
-
-
-
-
-
-
-
-
+class TaskImport(TaskBase):
+    title: str
+    is_completed: bool = False
+    # Ohne Angabe gilt der Zeitpunkt des Imports
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class TaskImportError(BaseModel):
+    line: int
+    error: str
+
+class TaskImportResult(BaseModel):
+    imported: int
+    failed: int
+    # Nur die ersten Fehler (siehe TASK_IMPORT_MAX_ERRORS)
+    errors: list[TaskImportError] = []
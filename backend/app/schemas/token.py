@@ -9,3 +9,8 @@ class Token(BaseModel):
 # Inhalt des Tokens (Payload)
 class TokenPayload(BaseModel):
     sub: Optional[int] = None
+
+# Kurzlebiges Ticket für GET /tasks/events (EventSource kann keine Header senden)
+class StreamTicket(BaseModel):
+    ticket: str
+    expires_in: int
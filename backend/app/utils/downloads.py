@@ -0,0 +1,185 @@
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Mapping, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+
+# Downloads laufen über die Attachment-ID; SQLite kann IDs nach dem Löschen neu vergeben,
+# daher vor jeder Wiederverwendung per ETag revalidieren (unverändert: leere 304-Antwort)
+DOWNLOAD_CACHE_CONTROL = "private, no-cache"
+
+
+def sha256_file(path: Path) -> str:
+    """
+    Berechnet den SHA-256 einer Datei (blockierend, im Threadpool aufrufen).
+    """
+    hasher = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Schwacher Vergleich (RFC 9110, 13.1.2) für If-None-Match: W/-Präfix wird ignoriert.
+    """
+    if if_none_match is None:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def is_not_modified(
+    request_headers: Mapping[str, str], *, etag: str, last_modified: float
+) -> bool:
+    """
+    Prüft If-None-Match bzw. (falls nicht gesetzt) If-Modified-Since.
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+    return False
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Wertet einen Range-Header mit genau einem Bereich aus und liefert (start, ende inkl.).
+
+    None bedeutet: ganze Datei ausliefern (kein oder nicht unterstützter Header).
+    Wirft ValueError, wenn der Bereich nicht erfüllbar ist (-> 416).
+    """
+    if not range_header:
+        return None
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        # Mehrere Bereiche werden nicht unterstützt; die ganze Datei ist eine gültige Antwort
+        return None
+
+    start_s, sep, end_s = (part.strip() for part in spec.strip().partition("-"))
+    if (
+        not sep
+        or not (start_s.isdigit() or start_s == "")
+        or not (end_s.isdigit() or end_s == "")
+        or start_s == end_s == ""
+    ):
+        # Syntaktisch ungültige Angaben werden ignoriert
+        return None
+
+    if start_s == "":
+        # Suffix-Bereich: die letzten N Bytes
+        suffix = int(end_s)
+        if suffix == 0 or size == 0:
+            raise ValueError("Bereich nicht erfüllbar.")
+        return max(size - suffix, 0), size - 1
+
+    start = int(start_s)
+    if end_s and int(end_s) < start:
+        return None
+    if start >= size:
+        raise ValueError("Bereich nicht erfüllbar.")
+    end = int(end_s) if end_s else size - 1
+    return start, min(end, size - 1)
+
+
+class FileRangeResponse(Response):
+    """
+    Liefert eine Datei oder einen Byte-Bereich daraus aus.
+
+    Unterstützt der Server die ASGI-Erweiterung "http.response.zerocopysend",
+    wird per sendfile übertragen, sonst in Blöcken gelesen.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        start: int,
+        end: int,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        background: Optional[BackgroundTask] = None,
+    ) -> None:
+        self.path = path
+        self.start = start
+        self.length = end - start + 1
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = background
+        self.init_headers(headers)
+        self.headers["content-length"] = str(self.length)
+        self.headers.setdefault("accept-ranges", "bytes")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+
+        if scope.get("method") == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as f:
+                await send(
+                    {
+                        "type": "http.response.zerocopysend",
+                        "file": f,
+                        "offset": self.start,
+                        "count": self.length,
+                        "more_body": False,
+                    }
+                )
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as f:
+                await f.seek(self.start)
+                remaining = self.length
+                while remaining > 0:
+                    chunk = await f.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": chunk,
+                            "more_body": remaining > 0,
+                        }
+                    )
+                if remaining > 0:
+                    # Datei wurde während der Übertragung gekürzt
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+        if self.background is not None:
+            await self.background()
+
+
+def content_disposition(filename: str) -> str:
+    """
+    Content-Disposition für die Anzeige im Browser, mit UTF-8-Dateinamen nach RFC 6266.
+    """
+    ascii_name = filename.encode("ascii", "ignore").decode("ascii").replace('"', "") or "download"
+    return f"inline; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename)}"
@@ -0,0 +1,71 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Sequence, Tuple
+
+
+def _encode(*parts: Any) -> str:
+    """
+    Kodiert die Teile einer Position als undurchsichtigen, URL-sicheren String
+    (Base64 ohne Padding über kompaktes JSON). datetime-Werte als ISO-String.
+    """
+    values = [part.isoformat() if isinstance(part, datetime) else part for part in parts]
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode(token: str, types: Sequence[Callable[[Any], Any]]) -> Tuple[Any, ...]:
+    """
+    Gegenstück zu _encode: wandelt jeden Teil mit dem Typ an gleicher Stelle um.
+    Wirft ValueError, wenn Anzahl oder Inhalt der Teile nicht passen.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("Falsche Anzahl an Teilen.")
+        return tuple(convert(value) for convert, value in zip(types, values))
+    except Exception as exc:
+        raise ValueError("Ungültiger Cursor.") from exc
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """
+    Kodiert die Position (created_at, id) als undurchsichtigen Cursor-String.
+    """
+    return _encode(created_at, id)
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Dekodiert einen Cursor-String. Wirft ValueError bei ungültigem Cursor.
+    """
+    return _decode(cursor, (datetime.fromisoformat, int))
+
+
+def encode_search_cursor(rank: float, id: int) -> str:
+    """
+    Kodiert die Position (rank, id) einer Suchergebnisliste als Cursor-String.
+    """
+    return _encode(rank, id)
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    """
+    Dekodiert einen Such-Cursor. Wirft ValueError bei ungültigem Cursor.
+    """
+    return _decode(cursor, (float, int))
+
+
+def encode_sync_token(version: int, kind: int, id: int) -> str:
+    """
+    Kodiert eine Position im Änderungsstrom (Version, Art, ID) als Sync-Token.
+    """
+    return _encode(version, kind, id)
+
+
+def decode_sync_token(token: str) -> Tuple[int, int, int]:
+    """
+    Dekodiert ein Sync-Token. Wirft ValueError bei ungültigem Token.
+    """
+    return _decode(token, (int, int, int))
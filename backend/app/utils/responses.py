@@ -0,0 +1,49 @@
+from functools import lru_cache
+from typing import Any, Iterable, Type
+
+from fastapi import Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson ist optional
+    orjson = None
+
+
+# Standard-Antwortklasse der App: orjson, falls installiert, sonst die json-Standardbibliothek
+DefaultJSONResponse: Type[JSONResponse] = ORJSONResponse if orjson is not None else JSONResponse
+
+
+@lru_cache(maxsize=None)
+def type_adapter(type_: Any) -> TypeAdapter:
+    # TypeAdapter einmal pro Typ aufbauen (das Erzeugen des Validators ist teuer)
+    return TypeAdapter(type_)
+
+
+def dump_json(type_: Any, content: Any) -> bytes:
+    """
+    Validiert `content` (auch ORM-Objekte) gegen `type_` und serialisiert direkt
+    in pydantic-core zu JSON-Bytes – ohne jsonable_encoder und json.dumps.
+    """
+    adapter = type_adapter(type_)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+def model_response(type_: Any, content: Iterable[Any], response: Response) -> Response:
+    """
+    Fertige JSON-Antwort für Listen-Endpunkte.
+
+    Header, die der Endpunkt bereits auf die injizierte `response` gesetzt hat
+    (ETag, X-Next-Cursor), werden übernommen, da FastAPI sie bei direkt
+    zurückgegebenen Responses nicht mehr ergänzt.
+    """
+    headers = {
+        key: value for key, value in response.headers.items() if key != "content-length"
+    }
+    return Response(
+        content=dump_json(type_, content),
+        status_code=response.status_code or 200,
+        headers=headers,
+        media_type="application/json",
+    )
@@ -0,0 +1,19 @@
+import json
+from typing import Any, Optional
+
+
+def format_sse(data: Any, *, event: Optional[str] = None, id: Optional[int] = None) -> str:
+    """
+    Formatiert eine Server-Sent-Events-Nachricht (Daten als JSON in einer Zeile).
+    """
+    lines = []
+    if id is not None:
+        lines.append(f"id: {id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+# Kommentarzeile: hält die Verbindung über Proxys hinweg offen
+SSE_HEARTBEAT = ": ping\n\n"
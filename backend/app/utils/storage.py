@@ -1,11 +1,29 @@
+import hashlib
+import mimetypes
+import os
 import re
+import shutil
+from abc import ABC, abstractmethod
+from functools import lru_cache
 from pathlib import Path
+from typing import Any, Dict, Optional
 
 from app.core.config import settings
+from app.utils.downloads import content_disposition
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # pragma: no cover - nur für STORAGE_BACKEND='s3' nötig
+    boto3 = None
 
 
 _filename_re = re.compile(r"[^A-Za-z0-9._-]+")
 
+# Unterverzeichnis für noch nicht abgeschlossene Uploads
+INCOMING_DIR = ".incoming"
+
 
 def ensure_upload_dir() -> None:
     """
@@ -25,7 +43,8 @@ def sanitize_filename(filename: str) -> str:
 
 def build_public_url(stored_filename: str) -> str:
     """
-    Baut die öffentliche URL für eine gespeicherte Datei.
+    Baut die öffentliche URL für eine gespeicherte Datei, angegeben relativ zum
+    Upload-Verzeichnis (flach "<name>" oder verteilt "ab/cd/<name>").
     """
     prefix = settings.UPLOAD_PUBLIC_PREFIX.rstrip("/")
     return f"{prefix}/{stored_filename}"
@@ -34,6 +53,9 @@ def build_public_url(stored_filename: str) -> str:
 def disk_path_from_attachment_value(value: str) -> Path:
     """
     Wandelt eine gespeicherte Attachment-Angabe (URL oder relativer Pfad) in einen Disk-Pfad um.
+
+    Unterverzeichnisse (verteiltes Layout, CAS) stehen in der Angabe selbst, daher
+    werden alte und neue Layouts gleich aufgelöst.
     """
     v = (value or "").strip()
 
@@ -49,3 +71,274 @@ def disk_path_from_attachment_value(value: str) -> Path:
         v = v.lstrip("/")
 
     return (settings.upload_dir_abs.parent / v).resolve()
+
+
+def stored_relative_path(value: str) -> Optional[str]:
+    """
+    Pfad einer gespeicherten Angabe relativ zum Upload-Verzeichnis ("a/b/name"),
+    None, wenn sie außerhalb davon liegt.
+    """
+    try:
+        relative = disk_path_from_attachment_value(value).relative_to(settings.upload_dir_abs)
+    except ValueError:
+        return None
+    return relative.as_posix()
+
+
+def sharded_relative_path(stored_filename: str, depth: Optional[int] = None) -> str:
+    """
+    Relativer Pfad im verteilten Layout, z.B. "ab/cd/<name>" bei zwei Ebenen.
+
+    Die Verzeichnisse stammen aus dem SHA-256 des Namens, so dass sich die Dateien
+    gleichmäßig verteilen und der Pfad allein aus dem Namen bestimmt werden kann.
+    """
+    depth = settings.UPLOAD_SHARD_DEPTH if depth is None else depth
+    digest = hashlib.sha256(stored_filename.encode("utf-8")).hexdigest()
+    shards = [digest[2 * level : 2 * level + 2] for level in range(depth)]
+    return "/".join([*shards, stored_filename])
+
+
+def remove_stored_file(value: str) -> None:
+    """
+    Entfernt die zu einer Attachment-Angabe gehörende Datei, falls vorhanden.
+    """
+    key = stored_relative_path(value)
+    if key:
+        get_storage().delete(key)
+
+
+def incoming_dir() -> Path:
+    """
+    Verzeichnis für Uploads, deren Inhalt (SHA-256) noch nicht feststeht.
+    """
+    path = settings.upload_dir_abs / INCOMING_DIR
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def upload_part_path(upload_id: str) -> Path:
+    """
+    Teildatei eines fortsetzbaren Uploads (bis zu seinem Abschluss).
+    """
+    return incoming_dir() / f"{upload_id}.part"
+
+
+def cas_relative_path(sha256: str, ext: str = "") -> str:
+    """
+    Relativer Pfad eines Blobs im inhaltsadressierten Speicher, z.B. "ab/cd/abcd...ef.pdf".
+    """
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}{ext.lower()}"
+
+
+def store_blob_file(source: Path, relative: str, *, keep_source: bool = False) -> Path:
+    """
+    Legt eine Datei unter ihrem CAS-Pfad ab. Existiert der Blob bereits, bleibt er unverändert.
+
+    Ohne keep_source wird die Quelle verschoben (bzw. verworfen), sonst per Hardlink
+    oder Kopie übernommen.
+    """
+    target = (settings.upload_dir_abs / relative).resolve()
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    if target.exists():
+        if not keep_source:
+            source.unlink(missing_ok=True)
+        return target
+
+    if not keep_source:
+        os.replace(source, target)
+        return target
+
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+    return target
+
+
+class StorageBackend(ABC):
+    """
+    Ablage der Upload-Dateien. Schlüssel sind Pfade relativ zum Upload-Verzeichnis
+    (wie in Attachment.file_path hinter UPLOAD_PUBLIC_PREFIX), z.B. "ab/cd/<name>".
+
+    Alle Methoden blockieren und werden aus async-Code im Threadpool aufgerufen.
+    """
+
+    name = ""
+    # Dateien liegen im Upload-Verzeichnis und werden von der API selbst ausgeliefert
+    local = False
+
+    def local_path(self, key: str) -> Optional[Path]:
+        # Zielpfad, in den direkt geschrieben werden kann (None: erst lokal, dann save)
+        return None
+
+    @abstractmethod
+    def save(self, key: str, source: Path) -> None:
+        """
+        Übernimmt eine fertige lokale Datei unter `key` (die Quelle entfällt danach).
+        Existiert der Schlüssel bereits (CAS), bleibt er unverändert.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def size(self, key: str) -> Optional[int]:
+        # Größe in Bytes, None, wenn es den Schlüssel nicht gibt
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        # Fehlende Schlüssel gelten als gelöscht
+        raise NotImplementedError
+
+    @abstractmethod
+    def move(self, source_key: str, key: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def presigned_get(self, key: str, *, filename: str, content_type: Optional[str]) -> str:
+        # URL, unter der der Client die Datei ohne weitere Anmeldung abruft
+        raise NotImplementedError
+
+    @abstractmethod
+    def presigned_put(self, key: str, *, content_type: Optional[str], size: int) -> Dict[str, Any]:
+        # {"url", "method", "headers"}: vom Client unverändert zu verwendender Request
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    name = "local"
+    local = True
+
+    def local_path(self, key: str) -> Optional[Path]:
+        return (settings.upload_dir_abs / key).resolve()
+
+    def save(self, key: str, source: Path) -> None:
+        if source.resolve() != self.local_path(key):
+            store_blob_file(source, key)
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return self.local_path(key).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str) -> None:
+        path = self.local_path(key)
+        if path.is_file():
+            path.unlink(missing_ok=True)
+
+    def move(self, source_key: str, key: str) -> None:
+        store_blob_file(self.local_path(source_key), key)
+
+    def presigned_get(self, key: str, *, filename: str, content_type: Optional[str]) -> str:
+        # Öffentliche URL der Datei (ausgeliefert über UPLOAD_PUBLIC_MOUNT)
+        if not settings.UPLOAD_PUBLIC_MOUNT:
+            raise RuntimeError("Lokaler Speicher ohne UPLOAD_PUBLIC_MOUNT hat keine öffentlichen URLs.")
+        return build_public_url(key)
+
+    def presigned_put(self, key: str, *, content_type: Optional[str], size: int) -> Dict[str, Any]:
+        # Direkte Uploads nur bei entfernten Speichern; lokal laufen sie über die API
+        raise RuntimeError("Lokaler Speicher nimmt Uploads nur über die API an (POST /upload/).")
+
+
+class S3Storage(StorageBackend):
+    """
+    S3-kompatibler Objektspeicher (AWS, MinIO, ...). Downloads und direkte Uploads
+    laufen über vorsignierte URLs, ohne dass die Daten die API passieren.
+    """
+
+    name = "s3"
+
+    def __init__(self) -> None:
+        if boto3 is None:
+            raise RuntimeError(
+                "STORAGE_BACKEND='s3' erfordert das Paket boto3 "
+                "(pip install -r requirements.txt bzw. pip install boto3)."
+            )
+        if not settings.S3_BUCKET:
+            raise RuntimeError("STORAGE_BACKEND='s3' erfordert S3_BUCKET.")
+        self.bucket = settings.S3_BUCKET
+        self.prefix = settings.S3_KEY_PREFIX.strip("/")
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL or None,
+            region_name=settings.S3_REGION or None,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID or None,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY or None,
+            config=BotoConfig(
+                signature_version="s3v4",
+                s3={"addressing_style": settings.S3_ADDRESSING_STYLE},
+            ),
+        )
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def save(self, key: str, source: Path) -> None:
+        if self.size(key) is None:
+            content_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+            self.client.upload_file(
+                str(source),
+                self.bucket,
+                self._object_key(key),
+                ExtraArgs={"ContentType": content_type},
+            )
+        source.unlink(missing_ok=True)
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return head["ContentLength"]
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def move(self, source_key: str, key: str) -> None:
+        # Serverseitige Kopie (bei großen Objekten mehrteilig), danach die Quelle löschen
+        self.client.copy(
+            {"Bucket": self.bucket, "Key": self._object_key(source_key)},
+            self.bucket,
+            self._object_key(key),
+        )
+        self.delete(source_key)
+
+    def presigned_get(self, key: str, *, filename: str, content_type: Optional[str]) -> str:
+        params = {
+            "Bucket": self.bucket,
+            "Key": self._object_key(key),
+            "ResponseContentDisposition": content_disposition(filename),
+        }
+        if content_type:
+            params["ResponseContentType"] = content_type
+        return self.client.generate_presigned_url(
+            "get_object", Params=params, ExpiresIn=settings.S3_PRESIGN_EXPIRES_SECONDS
+        )
+
+    def presigned_put(self, key: str, *, content_type: Optional[str], size: int) -> Dict[str, Any]:
+        # Content-Type und -Length sind mitsigniert und müssen genau so gesendet werden
+        content_type = content_type or "application/octet-stream"
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self._object_key(key),
+                "ContentType": content_type,
+                "ContentLength": size,
+            },
+            ExpiresIn=settings.S3_PRESIGN_EXPIRES_SECONDS,
+        )
+        return {"url": url, "method": "PUT", "headers": {"Content-Type": content_type}}
+
+
+@lru_cache(maxsize=None)
+def get_storage() -> StorageBackend:
+    """
+    Konfigurierter Speicher (STORAGE_BACKEND), einmal pro Prozess erzeugt.
+    """
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage()
+    return LocalStorage()
@@ -0,0 +1,87 @@
+import csv
+import io
+from typing import Any, BinaryIO, Dict, Iterator, List, Literal, Sequence, Tuple, Union
+
+from app.schemas.task import TaskExport
+from app.utils.responses import type_adapter
+
+
+TaskFileFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+CSV_FIELDS = ["id", "title", "description", "is_completed", "created_at"]
+
+# (Zeilennummer, Datensatz) bzw. (Zeilennummer, Rohzeile) für NDJSON
+ImportRecord = Tuple[int, Union[Dict[str, Any], str]]
+
+
+def export_ndjson(rows: Sequence[Any]) -> bytes:
+    adapter = type_adapter(TaskExport)
+    return b"".join(
+        adapter.dump_json(adapter.validate_python(row, from_attributes=True)) + b"\n"
+        for row in rows
+    )
+
+
+def export_csv_header() -> bytes:
+    return (",".join(CSV_FIELDS) + "\r\n").encode("utf-8")
+
+
+def export_csv(rows: Sequence[Any]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(
+            [
+                row.id,
+                row.title,
+                row.description if row.description is not None else "",
+                "true" if row.is_completed else "false",
+                row.created_at.isoformat() if row.created_at else "",
+            ]
+        )
+    return buffer.getvalue().encode("utf-8")
+
+
+def iter_import_records(file: BinaryIO, fmt: TaskFileFormat) -> Iterator[ImportRecord]:
+    """
+    Liest die hochgeladene Datei Zeile für Zeile (ohne sie ganz einzulesen).
+
+    NDJSON liefert die Rohzeilen (Validierung per model_validate_json), CSV die
+    Datensätze mit leeren Feldern als fehlend. Leere Zeilen werden übersprungen.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for record in reader:
+                values = {
+                    key: value
+                    for key, value in record.items()
+                    if key is not None and value not in (None, "")
+                }
+                if values:
+                    yield reader.line_num, values
+        else:
+            for number, line in enumerate(text, start=1):
+                if line.strip():
+                    yield number, line
+    finally:
+        # Die Datei gehört dem UploadFile und wird dort geschlossen
+        text.detach()
+
+
+def read_batch(records: Iterator[ImportRecord], size: int) -> List[ImportRecord]:
+    """
+    Nächste `size` Datensätze (blockierend, daher im Threadpool aufrufen).
+    """
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            break
+    return batch
@@ -0,0 +1,93 @@
+"""
+Misst die Serialisierungszeit einer Taskliste pro 1000 Aufgaben.
+
+Aufruf (im backend-Verzeichnis):
+    python -m benchmarks.serialize_tasks [--tasks 1000] [--attachments 2] [--repeat 20]
+
+Verglichen werden der bisherige Weg über response_model (Validierung,
+jsonable_encoder, json.dumps), derselbe Weg mit ORJSONResponse und der direkte
+Weg über TypeAdapter.dump_json (app.utils.responses).
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app import schemas
+from app.models.attachment import Attachment
+from app.models.task import Task
+from app.utils.responses import dump_json
+
+
+def _build_tasks(count: int, attachments: int) -> List[Task]:
+    # Transiente ORM-Objekte, wie sie die CRUD-Schicht liefert
+    start = datetime(2024, 1, 1)
+    tasks = []
+    for i in range(count):
+        task = Task(
+            id=i + 1,
+            title=f"Aufgabe {i}",
+            description="Beschreibung " * 8,
+            is_completed=i % 3 == 0,
+            owner_id=1,
+            created_at=start + timedelta(seconds=i),
+        )
+        task.attachments = [
+            Attachment(
+                id=i * attachments + j + 1,
+                filename=f"datei_{j}.pdf",
+                file_path=f"/uploads/{i}_{j}.pdf",
+                created_at=start + timedelta(seconds=i),
+            )
+            for j in range(attachments)
+        ]
+        tasks.append(task)
+    return tasks
+
+
+def _measure(label: str, func: Callable[[], bytes], repeat: int, per: float) -> float:
+    func()  # Aufwärmen (Validatoren, Caches)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    best = min(timings) * 1000 / per
+    print(f"{label:<40} {best:8.2f} ms / 1000 Tasks")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--attachments", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    tasks = _build_tasks(args.tasks, args.attachments)
+    field = create_response_field(name="Response_read_tasks", type_=List[schemas.Task])
+    per = args.tasks / 1000
+    loop = asyncio.new_event_loop()
+
+    def via_response_model(response_class: Any) -> Callable[[], bytes]:
+        def run() -> bytes:
+            content = loop.run_until_complete(
+                serialize_response(field=field, response_content=tasks)
+            )
+            return response_class(content).body
+        return run
+
+    baseline = _measure("response_model + JSONResponse", via_response_model(JSONResponse), args.repeat, per)
+    _measure("response_model + ORJSONResponse", via_response_model(ORJSONResponse), args.repeat, per)
+    fast = _measure("TypeAdapter.dump_json", lambda: dump_json(List[schemas.Task], tasks), args.repeat, per)
+    print(f"Faktor: {baseline / fast:.1f}x")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
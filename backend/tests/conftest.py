@@ -0,0 +1,97 @@
+import os
+import tempfile
+import uuid
+
+# Eigene Datenbank und eigenes Upload-Verzeichnis, bevor die App die Einstellungen lädt
+_TMP_DIR = tempfile.mkdtemp(prefix="taskapi-tests-")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{_TMP_DIR}/test.db"
+os.environ.pop("SQLALCHEMY_ASYNC_DATABASE_URI", None)
+os.environ["UPLOAD_DIR"] = f"{_TMP_DIR}/uploads"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["UPLOAD_SWEEP_INTERVAL_SECONDS"] = "0"
+# Löschworker nur auf Anstoß (wake), damit Tests die Warteschlange gezielt abarbeiten
+os.environ["FILE_DELETION_POLL_SECONDS"] = "3600"
+os.environ["STORAGE_BACKEND"] = "local"
+
+from typing import Callable, Dict, Iterator, List  # noqa: E402
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.db import session as db_session  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[TestClient]:
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def make_user(client: TestClient) -> Callable[[], Dict[str, str]]:
+    """
+    Legt einen neuen Benutzer an und liefert seine Authorization-Header.
+    """
+
+    def create() -> Dict[str, str]:
+        email = f"{uuid.uuid4().hex[:12]}@example.com"
+        response = client.post("/api/v1/users/", json={"email": email, "password": "pw"})
+        assert response.status_code == 200, response.text
+        response = client.post(
+            "/api/v1/login/access-token", data={"username": email, "password": "pw"}
+        )
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return create
+
+
+@pytest.fixture
+def auth_headers(make_user: Callable[[], Dict[str, str]]) -> Dict[str, str]:
+    # Jeder Test bekommt einen eigenen Benutzer und damit eigene Listen und Versionen
+    return make_user()
+
+
+@pytest.fixture
+def upload(client: TestClient) -> Callable[..., dict]:
+    """
+    Lädt eine Datei über POST /upload/ hoch und liefert das Attachment als dict.
+    """
+
+    def create(
+        headers: Dict[str, str],
+        content: bytes = b"inhalt",
+        filename: str = "datei.txt",
+        content_type: str = "text/plain",
+    ) -> dict:
+        response = client.post(
+            "/api/v1/upload/", files={"file": (filename, content, content_type)}, headers=headers
+        )
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return create
+
+
+@pytest.fixture
+def statements() -> Iterator[List[str]]:
+    """
+    Zeichnet die SQL-Befehle (erstes Schlüsselwort) auf, die über die Schreib-Engine laufen.
+    """
+    engine = (
+        db_session.async_engine.sync_engine
+        if db_session.async_engine is not None
+        else db_session.engine
+    )
+    recorded: List[str] = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        recorded.append(statement.split()[0].upper())
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield recorded
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
@@ -0,0 +1,70 @@
+import asyncio
+import uuid
+from typing import Any, List
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.core.config import settings
+from app.db.session import SyncSessionAdapter, new_session
+from app.main import app
+
+API = "/api/v1"
+
+
+def test_endpoints_run_on_configured_session(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    sessions: List[Any] = []
+
+    def recording_session(read_only: bool = False) -> Any:
+        db = new_session(read_only=read_only)
+        sessions.append(db)
+        return db
+
+    monkeypatch.setattr(deps, "new_session", recording_session)
+
+    async def smoke() -> None:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://testserver"
+        ) as api:
+            email = f"{uuid.uuid4().hex[:12]}@example.com"
+            response = await api.post(f"{API}/users/", json={"email": email, "password": "pw"})
+            assert response.status_code == 200, response.text
+            response = await api.post(
+                f"{API}/login/access-token", data={"username": email, "password": "pw"}
+            )
+            assert response.status_code == 200, response.text
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            assert (await api.get(f"{API}/users/me", headers=headers)).json()["email"] == email
+
+            # Parallele Anfragen teilen sich den Event-Loop, jede mit eigener Sitzung
+            created = await asyncio.gather(
+                *(api.post(f"{API}/tasks/", json={"title": f"t{i}"}, headers=headers) for i in range(5))
+            )
+            assert all(response.status_code == 200 for response in created)
+            task_id = created[0].json()["id"]
+            response = await api.put(
+                f"{API}/tasks/{task_id}", json={"is_completed": True}, headers=headers
+            )
+            assert response.status_code == 200 and response.json()["is_completed"]
+            assert len((await api.get(f"{API}/tasks/", headers=headers)).json()) == 5
+            assert (await api.get(f"{API}/tasks/stats", headers=headers)).json()["completed"] == 1
+
+            response = await api.post(
+                f"{API}/upload/", files={"file": ("datei.txt", b"inhalt", "text/plain")}, headers=headers
+            )
+            assert response.status_code == 200, response.text
+            attachment_id = response.json()["id"]
+            response = await api.get(f"{API}/attachments/{attachment_id}/download", headers=headers)
+            assert response.content == b"inhalt"
+            response = await api.delete(f"{API}/attachments/{attachment_id}", headers=headers)
+            assert response.status_code == 200
+            assert (await api.delete(f"{API}/tasks/{task_id}", headers=headers)).status_code == 200
+
+    client.portal.call(smoke)
+
+    expected = AsyncSession if settings.DB_ASYNC else SyncSessionAdapter
+    assert len(sessions) >= 10
+    assert all(isinstance(db, expected) for db in sessions)
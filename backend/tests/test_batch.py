@@ -0,0 +1,48 @@
+from typing import Callable, Dict
+
+from fastapi.testclient import TestClient
+
+API = "/api/v1/tasks"
+
+
+def test_batch_crud(client: TestClient, auth_headers: Dict[str, str]):
+    response = client.post(
+        f"{API}/batch", json=[{"title": f"t{i}"} for i in range(3)], headers=auth_headers
+    )
+    assert response.status_code == 200, response.text
+    ids = [item["id"] for item in response.json()]
+    assert [item["status"] for item in response.json()] == ["created"] * 3
+
+    response = client.patch(
+        f"{API}/batch",
+        json=[{"id": ids[0], "title": "T0", "is_completed": True}, {"id": 999999, "title": "x"}],
+        headers=auth_headers,
+    )
+    assert [item["status"] for item in response.json()] == ["updated", "not_found"]
+
+    tasks = {task["id"]: task for task in client.get(f"{API}/", headers=auth_headers).json()}
+    assert tasks[ids[0]]["title"] == "T0" and tasks[ids[0]]["is_completed"]
+    assert tasks[ids[1]]["title"] == "t1"
+
+    response = client.request(
+        "DELETE", f"{API}/batch", json={"ids": ids[:2] + [999999]}, headers=auth_headers
+    )
+    assert [item["status"] for item in response.json()] == ["deleted", "deleted", "not_found"]
+    assert [task["id"] for task in client.get(f"{API}/", headers=auth_headers).json()] == [ids[2]]
+
+
+def test_foreign_attachment_cannot_be_linked(
+    client: TestClient,
+    auth_headers: Dict[str, str],
+    make_user: Callable[[], Dict[str, str]],
+    upload: Callable[..., dict],
+):
+    attachment_id = upload(auth_headers)["id"]
+    other = make_user()
+
+    response = client.post(
+        f"{API}/", json={"title": "x", "attachment_ids": [attachment_id]}, headers=other
+    )
+    assert response.status_code == 400
+    assert client.get(f"{API}/", headers=other).json() == []
+    assert client.delete(f"/api/v1/attachments/{attachment_id}", headers=other).status_code in (400, 404)
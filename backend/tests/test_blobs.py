@@ -0,0 +1,83 @@
+import uuid
+from typing import Callable, Dict
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select
+
+from app import crud
+from app.commands.migrate_to_cas import bump_owner_versions
+from app.db.session import SessionLocal, new_session
+from app.models.attachment import Attachment
+from app.models.blob import Blob
+from app.models.task_stats import TaskStats
+
+
+def test_acquire_race_keeps_staged_rows(client: TestClient, monkeypatch):
+    sha256 = uuid.uuid4().hex * 2
+    filename = f"{uuid.uuid4().hex}.txt"
+    with SessionLocal() as db:
+        db.add(Blob(sha256=sha256, size=1, file_path="/uploads/x.txt", refcount=1))
+        db.commit()
+
+    # Erster Lookup übersieht den parallel angelegten Blob -> IntegrityError beim Anlegen
+    lookup = crud.blob.get_by_sha256
+    misses = iter([True])
+
+    async def racing_lookup(db, *, sha256):
+        if next(misses, False):
+            return None
+        return await lookup(db, sha256=sha256)
+
+    monkeypatch.setattr(crud.blob, "get_by_sha256", racing_lookup)
+
+    async def acquire() -> bool:
+        db = new_session()
+        try:
+            db.add(Attachment(filename=filename, file_path="/uploads/y.txt"))
+            await db.flush()
+            _, created = await crud.blob.acquire(
+                db, sha256=sha256, size=1, file_path="/uploads/x.txt"
+            )
+            await db.commit()
+            return created
+        finally:
+            await db.close()
+
+    assert client.portal.call(acquire) is False
+    with SessionLocal() as db:
+        # Nur der Savepoint wurde zurückgesetzt: das Attachment des Aufrufers bleibt
+        assert db.scalar(select(Attachment).where(Attachment.filename == filename)) is not None
+        assert db.scalar(select(Blob.refcount).where(Blob.sha256 == sha256)) == 2
+        db.execute(delete(Attachment).where(Attachment.filename == filename))
+        db.execute(delete(Blob).where(Blob.sha256 == sha256))
+        db.commit()
+
+
+def test_bump_owner_versions_only_touches_owners(
+    client: TestClient,
+    make_user: Callable[[], Dict[str, str]],
+    upload: Callable[..., dict],
+):
+    owner, other = make_user(), make_user()
+    owner_id = client.get("/api/v1/users/me", headers=owner).json()["id"]
+    other_id = client.get("/api/v1/users/me", headers=other).json()["id"]
+    attachment = upload(owner)
+    upload(other)
+
+    with SessionLocal() as db:
+        before = {
+            row.owner_id: row.version
+            for row in db.scalars(
+                select(TaskStats).where(TaskStats.owner_id.in_([owner_id, other_id]))
+            )
+        }
+        bump_owner_versions(db, [attachment["id"]])
+        db.commit()
+        after = {
+            row.owner_id: row.version
+            for row in db.scalars(
+                select(TaskStats).where(TaskStats.owner_id.in_([owner_id, other_id]))
+            )
+        }
+    assert after[owner_id] == before[owner_id] + 1
+    assert after[other_id] == before[other_id]
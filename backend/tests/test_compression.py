@@ -0,0 +1,112 @@
+import gzip
+from typing import List
+
+import anyio
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware
+
+TEXT = "Zeile mit etwas Text\n" * 200
+
+
+def _text(request):
+    return PlainTextResponse(TEXT, headers={"ETag": '"v1"'})
+
+
+def _small(request):
+    return PlainTextResponse("kurz")
+
+
+def _partial(request):
+    return PlainTextResponse(
+        TEXT[:100], status_code=206, headers={"Content-Range": f"bytes 0-99/{len(TEXT)}"}
+    )
+
+
+def _encoded(request):
+    return Response(
+        gzip.compress(TEXT.encode()),
+        media_type="text/plain",
+        headers={"Content-Encoding": "gzip"},
+    )
+
+
+@pytest.fixture(scope="module")
+def compressed_client() -> TestClient:
+    app = Starlette(
+        routes=[
+            Route("/text", _text),
+            Route("/small", _small),
+            Route("/partial", _partial),
+            Route("/encoded", _encoded),
+        ]
+    )
+    return TestClient(CompressionMiddleware(app, minimum_size=500))
+
+
+def test_gzip(compressed_client: TestClient):
+    response = compressed_client.get("/text", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    # Komprimierte Darstellung: nur noch schwacher ETag
+    assert response.headers["etag"] == 'W/"v1"'
+    assert int(response.headers["content-length"]) < len(TEXT)
+    assert response.text == TEXT
+
+
+def test_brotli(compressed_client: TestClient):
+    pytest.importorskip("brotli")
+    response = compressed_client.get("/text", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.text == TEXT
+
+
+@pytest.mark.parametrize(
+    "path, accept_encoding",
+    [("/small", "gzip"), ("/partial", "gzip"), ("/text", "identity")],
+)
+def test_passthrough_keeps_vary(compressed_client: TestClient, path: str, accept_encoding: str):
+    response = compressed_client.get(path, headers={"Accept-Encoding": accept_encoding})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_already_encoded_is_untouched(compressed_client: TestClient):
+    response = compressed_client.get("/encoded", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "vary" not in response.headers
+    assert response.text == TEXT
+
+
+def test_start_is_flushed_before_zerocopysend():
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/plain")],
+            }
+        )
+        await send({"type": "http.response.zerocopysend", "file": 3})
+
+    sent: List[dict] = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/datei.txt",
+        "headers": [(b"accept-encoding", b"gzip")],
+    }
+    anyio.run(CompressionMiddleware(app), scope, None, send)
+    assert [message["type"] for message in sent] == [
+        "http.response.start",
+        "http.response.zerocopysend",
+    ]
+    assert (b"vary", b"Accept-Encoding") in sent[0]["headers"]
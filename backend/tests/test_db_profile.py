@@ -0,0 +1,66 @@
+from pathlib import Path
+from typing import Dict
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.db import session as db_session
+from app.db.profile import configure_engine, sqlite_pragmas
+
+_SYNCHRONOUS = {"OFF": 0, "NORMAL": 1, "FULL": 2, "EXTRA": 3}
+
+
+def _expected() -> Dict[str, object]:
+    return {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE.lower(),
+        "synchronous": _SYNCHRONOUS[settings.SQLITE_SYNCHRONOUS.upper()],
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KB,
+        "query_only": 0,
+    }
+
+
+def _read_pragmas(connection) -> Dict[str, object]:
+    return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in _expected()}
+
+
+def test_app_engines_apply_pragmas_on_connect(client: TestClient):
+    # Frische Verbindung erzwingen, damit der connect-Hook sicher läuft
+    db_session.engine.dispose()
+    with db_session.engine.connect() as connection:
+        assert _read_pragmas(connection) == _expected()
+
+    if db_session.async_engine is not None:
+
+        async def read_async() -> Dict[str, object]:
+            async with db_session.async_engine.connect() as connection:
+                return await connection.run_sync(_read_pragmas)
+
+        assert client.portal.call(read_async) == _expected()
+
+
+def test_read_only_engine_rejects_writes(tmp_path: Path):
+    uri = f"sqlite:///{tmp_path}/profile.db"
+    writer = create_engine(uri)
+    configure_engine(writer)
+    with writer.begin() as connection:
+        connection.execute(text("CREATE TABLE t (x INTEGER)"))
+
+    reader = create_engine(uri)
+    configure_engine(reader, read_only=True)
+    with reader.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA query_only").scalar() == 1
+        assert connection.execute(text("SELECT count(*) FROM t")).scalar() == 0
+        with pytest.raises(OperationalError):
+            connection.execute(text("INSERT INTO t VALUES (1)"))
+    writer.dispose()
+    reader.dispose()
+
+
+def test_invalid_pragma_settings_are_rejected(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "SQLITE_JOURNAL_MODE", "wal; DROP TABLE user")
+    with pytest.raises(ValueError):
+        sqlite_pragmas()
@@ -0,0 +1,79 @@
+from typing import Callable, Dict, List
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.db.session import SessionLocal
+from app.models.attachment import Attachment
+
+CONTENT = bytes(range(256)) * 4
+
+
+def test_download_conditional_and_range(
+    client: TestClient, auth_headers: Dict[str, str], upload: Callable[..., dict]
+):
+    attachment = upload(auth_headers, CONTENT, "daten.pdf", "application/pdf")
+    url = f"/api/v1/attachments/{attachment['id']}/download"
+
+    response = client.get(url, headers=auth_headers)
+    assert response.status_code == 200 and response.content == CONTENT
+    etag = response.headers["etag"]
+    assert client.get(url, headers={**auth_headers, "If-None-Match": etag}).status_code == 304
+
+    response = client.get(url, headers={**auth_headers, "Range": "bytes=10-19"})
+    assert response.status_code == 206 and response.content == CONTENT[10:20]
+    assert response.headers["content-range"] == "bytes 10-19/1024"
+    assert client.get(url, headers={**auth_headers, "Range": "bytes=5000-"}).status_code == 416
+
+
+def test_download_is_revalidated_not_immutable(
+    client: TestClient, auth_headers: Dict[str, str], upload: Callable[..., dict]
+):
+    # IDs können nach dem Löschen neu vergeben werden: keine dauerhafte Zwischenspeicherung
+    attachment = upload(auth_headers, CONTENT, "daten.pdf", "application/pdf")
+    response = client.get(f"/api/v1/attachments/{attachment['id']}/download", headers=auth_headers)
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert response.headers["etag"].startswith('"')
+
+
+def test_download_without_checksum_does_not_write(
+    client: TestClient, auth_headers: Dict[str, str], upload: Callable[..., dict]
+):
+    attachment = upload(auth_headers, CONTENT, "daten.pdf", "application/pdf")
+    with SessionLocal() as db:
+        db.execute(update(Attachment).where(Attachment.id == attachment["id"]).values(checksum=None))
+        db.commit()
+    url = f"/api/v1/attachments/{attachment['id']}/download"
+
+    response = client.get(url, headers=auth_headers)
+    etag = response.headers["etag"]
+    assert response.status_code == 200 and etag.startswith('W/"')
+    assert client.get(url, headers={**auth_headers, "If-None-Match": etag}).status_code == 304
+    # Schwaches ETag gilt nicht für If-Range: ganze Datei statt Teilbereich
+    response = client.get(url, headers={**auth_headers, "Range": "bytes=0-9", "If-Range": etag})
+    assert response.status_code == 200
+    with SessionLocal() as db:
+        assert db.get(Attachment, attachment["id"]).checksum is None
+
+
+def test_download_checks_owner_in_one_query(
+    client: TestClient,
+    auth_headers: Dict[str, str],
+    make_user: Callable[[], Dict[str, str]],
+    upload: Callable[..., dict],
+    statements: List[str],
+):
+    attachment = upload(auth_headers, CONTENT)
+    client.post(
+        "/api/v1/tasks/",
+        json={"title": "mit Datei", "attachment_ids": [attachment["id"]]},
+        headers=auth_headers,
+    )
+    url = f"/api/v1/attachments/{attachment['id']}/download"
+    client.get(url, headers=auth_headers)
+    statements.clear()
+
+    assert client.get(url, headers=auth_headers).status_code == 200
+    assert statements == ["SELECT"], statements
+    assert client.get(url, headers=make_user()).status_code == 400
+    assert client.get("/api/v1/attachments/999999/download", headers=auth_headers).status_code == 404
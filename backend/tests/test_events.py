@@ -0,0 +1,104 @@
+import asyncio
+import json
+import random
+from typing import Dict, List, Tuple
+
+import httpx
+from fastapi.testclient import TestClient
+from starlette.concurrency import run_in_threadpool
+
+from app.core.events import TaskEvent, broker
+from app.main import app
+
+API = "/api/v1/tasks"
+
+
+def _ticket(client: TestClient, headers: Dict[str, str]) -> str:
+    response = client.post(f"{API}/events/ticket", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["ticket"]
+
+
+def test_publish_from_thread_is_delivered(client: TestClient):
+    owner_id = random.randint(10**8, 10**9)
+
+    async def publish_from_thread() -> TaskEvent:
+        subscription = broker.subscribe(owner_id)
+        try:
+            # Commit im Threadpool (sync Session, Abgleich): kein laufender Event-Loop
+            await run_in_threadpool(
+                broker.publish, TaskEvent(owner_id=owner_id, version=1, previous=0)
+            )
+            return await subscription.next(timeout=5)
+        finally:
+            broker.unsubscribe(subscription)
+
+    event = client.portal.call(publish_from_thread)
+    assert event is not None and event.version == 1
+
+
+def test_stream_ticket_is_scoped(client: TestClient, auth_headers: Dict[str, str]):
+    access_token = auth_headers["Authorization"].split()[1]
+    # Das Access Token gehört nicht in die URL
+    assert client.get(f"{API}/events", params={"access_token": access_token}).status_code == 401
+    # Ein Ticket gilt nur für den Stream, nicht als Access Token
+    ticket = _ticket(client, auth_headers)
+    response = client.get(API, headers={"Authorization": f"Bearer {ticket}"})
+    assert response.status_code == 403
+
+
+def test_events_stream_delivers_changes(client: TestClient, auth_headers: Dict[str, str]):
+    ticket = _ticket(client, auth_headers)
+
+    async def stream() -> Tuple[int, List[str]]:
+        # Der Stream endet nie: die App direkt per ASGI aufrufen und nach dem ersten
+        # Änderungs-Event die Verbindung trennen (LocalBackend als Broker-Stellvertreter)
+        chunks: "asyncio.Queue[str]" = asyncio.Queue()
+        disconnected = asyncio.Event()
+
+        async def receive() -> dict:
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            if message["type"] == "http.response.body" and message.get("body"):
+                await chunks.put(message["body"].decode())
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": f"{API}/events",
+            "raw_path": f"{API}/events".encode(),
+            "root_path": "",
+            "query_string": f"ticket={ticket}".encode(),
+            "headers": [(b"host", b"testserver")],
+            "client": ("127.0.0.1", 1234),
+            "server": ("testserver", 80),
+        }
+        request = asyncio.create_task(app(scope, receive, send))
+        received: List[str] = []
+        try:
+            async def read_until(marker: str) -> None:
+                while not any(marker in chunk for chunk in received):
+                    received.append(await asyncio.wait_for(chunks.get(), 5))
+
+            await read_until("event: ready")
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://testserver"
+            ) as api:
+                response = await api.post(f"{API}/", json={"title": "live"}, headers=auth_headers)
+                assert response.status_code == 200, response.text
+                task_id = response.json()["id"]
+            await read_until("event: changes")
+        finally:
+            disconnected.set()
+            await asyncio.wait_for(request, 5)
+        return task_id, received
+
+    task_id, received = client.portal.call(stream)
+    message = next(chunk for chunk in received if "event: changes" in chunk)
+    data = json.loads(next(line for line in message.splitlines() if line.startswith("data: "))[6:])
+    assert task_id in data["changes"]["task.created"]
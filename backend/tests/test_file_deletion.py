@@ -0,0 +1,30 @@
+import time
+from typing import Callable, Dict
+
+from fastapi.testclient import TestClient
+
+from app.core.file_deletion import drain_file_deletions
+from app.utils.storage import disk_path_from_attachment_value
+
+
+def test_deleting_task_queues_file_removal(
+    client: TestClient, auth_headers: Dict[str, str], upload: Callable[..., dict]
+):
+    attachment = upload(auth_headers)
+    path = disk_path_from_attachment_value(attachment["url"])
+    task_id = client.post(
+        "/api/v1/tasks/",
+        json={"title": "mit Datei", "attachment_ids": [attachment["id"]]},
+        headers=auth_headers,
+    ).json()["id"]
+    assert path.is_file()
+
+    assert client.delete(f"/api/v1/tasks/{task_id}", headers=auth_headers).status_code == 200
+    # Der Hintergrund-Worker räumt normalerweise selbst auf; notfalls die Warteschlange leeren
+    for _ in range(20):
+        if not path.exists():
+            break
+        time.sleep(0.05)
+    else:
+        client.portal.call(drain_file_deletions)
+    assert not path.exists()
@@ -0,0 +1,76 @@
+from typing import Callable, Dict, List
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud
+from app.core.config import settings
+from app.main import app
+
+API = "/api/v1/tasks"
+
+
+def _tasks(client: TestClient, headers: Dict[str, str]) -> List[dict]:
+    return client.get(API, params={"limit": 1000}, headers=headers).json()
+
+
+def _fields(tasks: List[dict]) -> List[tuple]:
+    return sorted(
+        (task["title"], task["description"], task["is_completed"], task["created_at"])
+        for task in tasks
+    )
+
+
+@pytest.mark.parametrize("file_format", ["ndjson", "csv"])
+def test_export_import_round_trip(
+    client: TestClient, make_user: Callable[[], Dict[str, str]], file_format: str
+):
+    source, target = make_user(), make_user()
+    for title, description, done in [
+        ("Erste", "mit, Komma", False),
+        ("Zweite", 'mit "Anführungszeichen"\nund Umbruch', True),
+        ("Dritte", None, False),
+    ]:
+        task = {"title": title, "description": description, "is_completed": done}
+        assert client.post(f"{API}/", json=task, headers=source).status_code == 200
+
+    exported = client.get(f"{API}/export", params={"format": file_format}, headers=source)
+    assert exported.status_code == 200
+    response = client.post(
+        f"{API}/import",
+        params={"format": file_format},
+        files={"file": (f"tasks.{file_format}", exported.content)},
+        headers=target,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["imported"] == 3 and response.json()["failed"] == 0
+
+    assert _fields(_tasks(client, target)) == _fields(_tasks(client, source))
+    stats = client.get(f"{API}/stats", headers=target).json()
+    assert stats == {"total": 3, "completed": 1, "open": 2}
+
+
+def test_import_rolls_back_on_error(
+    client: TestClient, auth_headers: Dict[str, str], monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "TASK_IMPORT_BATCH_SIZE", 2)
+    create_many = crud.task.create_many
+    calls = []
+
+    async def failing_create_many(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("Datenbank weg")
+        return await create_many(*args, **kwargs)
+
+    monkeypatch.setattr(crud.task, "create_many", failing_create_many)
+    lines = b"\n".join(b'{"title": "t%d"}' % i for i in range(5))
+    response = TestClient(app, raise_server_exceptions=False).post(
+        f"{API}/import", files={"file": ("tasks.ndjson", lines)}, headers=auth_headers
+    )
+    assert response.status_code == 500
+    assert len(calls) == 2
+
+    # Der erste, bereits geschriebene Block ist nicht übernommen
+    assert _tasks(client, auth_headers) == []
+    assert client.get(f"{API}/stats", headers=auth_headers).json()["total"] == 0
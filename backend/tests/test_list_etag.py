@@ -0,0 +1,17 @@
+from typing import Dict
+
+from fastapi.testclient import TestClient
+
+API = "/api/v1/tasks"
+
+
+def test_list_etag(client: TestClient, auth_headers: Dict[str, str]):
+    client.post(f"{API}/", json={"title": "a"}, headers=auth_headers)
+    etag = client.get(f"{API}/", headers=auth_headers).headers["etag"]
+
+    response = client.get(f"{API}/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304 and response.content == b""
+
+    client.post(f"{API}/", json={"title": "b"}, headers=auth_headers)
+    response = client.get(f"{API}/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["etag"] != etag
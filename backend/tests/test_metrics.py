@@ -0,0 +1,70 @@
+from typing import Dict, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud
+from app.core.cache import TTLCache, auth_user_cache
+from app.core.config import settings
+from app.db.session import new_session
+
+
+def test_metrics_disabled_without_token(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_require_token(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "geheim")
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer falsch"}).status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer geheim"})
+    assert response.status_code == 200 and "file_deletion" in response.json()
+
+
+def test_auth_cache_counts_hits_and_misses(
+    client: TestClient, auth_headers: Dict[str, str], monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "geheim")
+    before = auth_user_cache.stats()
+    assert client.get("/api/v1/users/me", headers=auth_headers).status_code == 200
+    assert client.get("/api/v1/users/me", headers=auth_headers).status_code == 200
+
+    stats = client.get("/metrics", headers={"Authorization": "Bearer geheim"}).json()["auth_cache"]
+    assert stats["misses"] == before["misses"] + 1
+    assert stats["hits"] == before["hits"] + 1
+
+
+def test_user_update_invalidates_cache_after_commit(
+    client: TestClient, auth_headers: Dict[str, str]
+):
+    token = auth_headers["Authorization"].split()[1]
+    user_id = client.get("/api/v1/users/me", headers=auth_headers).json()["id"]
+
+    async def update_user() -> Tuple[bool, bool]:
+        db = new_session()
+        try:
+            user = await crud.user.get(db, user_id)
+            await crud.user.update(db, db_obj=user, obj_in={"is_active": True}, commit=False)
+            # Geflusht, aber nicht committet: der Cache bleibt noch gültig
+            cached_before_commit = auth_user_cache.get(token) is not None
+            await db.commit()
+            return cached_before_commit, auth_user_cache.get(token) is not None
+        finally:
+            await db.close()
+
+    assert client.portal.call(update_user) == (True, False)
+
+
+def test_discard_group_removes_only_that_group():
+    cache = TTLCache(maxsize=3, ttl=60, group=lambda value: value["user"])
+    cache.set("a", {"user": 1})
+    cache.set("b", {"user": 1})
+    cache.set("c", {"user": 2})
+    cache.set("d", {"user": 2})  # verdrängt "a"
+
+    assert cache.discard_group(1) == 1
+    assert cache.get("b") is None and cache.get("c") is not None
+    assert cache.discard_group(2) == 2
+    assert cache.stats()["size"] == 0
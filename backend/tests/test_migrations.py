@@ -0,0 +1,63 @@
+from pathlib import Path
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.db.migrations import init_schema
+
+# Schema vor den nachträglich hinzugefügten Spalten (Stand des ersten Releases)
+BASELINE_DDL = [
+    """
+    CREATE TABLE user (
+        id INTEGER PRIMARY KEY, email VARCHAR NOT NULL, hashed_password VARCHAR NOT NULL,
+        is_active BOOLEAN, is_superuser BOOLEAN
+    )
+    """,
+    """
+    CREATE TABLE task (
+        id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, description VARCHAR,
+        is_completed BOOLEAN, created_at DATETIME, owner_id INTEGER REFERENCES user (id)
+    )
+    """,
+    """
+    CREATE TABLE attachment (
+        id INTEGER PRIMARY KEY, filename VARCHAR NOT NULL, file_path VARCHAR NOT NULL,
+        file_type VARCHAR, created_at DATETIME, task_id INTEGER REFERENCES task (id)
+    )
+    """,
+    "INSERT INTO user (id, email, hashed_password, is_active) VALUES (7, 'alt@example.com', 'x', 1)",
+    "INSERT INTO task (id, title, created_at, owner_id) VALUES (3, 'alt', '2020-01-01 00:00:00', 7)",
+    "INSERT INTO attachment (id, filename, file_path, created_at, task_id) "
+    "VALUES (5, 'a.txt', '/uploads/a.txt', '2020-01-01 00:00:00', 3)",
+]
+
+
+def _baseline_engine(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'alt.db'}")
+    with engine.begin() as connection:
+        for statement in BASELINE_DDL:
+            connection.execute(text(statement))
+    return engine
+
+
+def test_upgrade_adds_and_backfills_columns(tmp_path: Path):
+    engine = _baseline_engine(tmp_path)
+
+    added = init_schema(engine)
+
+    assert "attachment.uploader_id" in added
+    assert {"attachment.file_size", "attachment.checksum"} <= set(added)
+    assert "attachment.blob_id" in added
+    assert "ix_attachment_blob_id" in {index["name"] for index in inspect(engine).get_indexes("attachment")}
+    assert {"task.updated_at", "task.sync_version", "attachment.sync_version"} <= set(added)
+    with engine.connect() as connection:
+        row = connection.execute(
+            text("SELECT uploader_id, updated_at, sync_version FROM attachment WHERE id = 5")
+        ).one()
+        task = connection.execute(text("SELECT updated_at, sync_version FROM task WHERE id = 3")).one()
+    assert row.uploader_id == 7
+    # Bestehende Zeilen: geändert zum Anlegezeitpunkt, Version 0 (vor jedem Sync-Token)
+    assert row.updated_at == task.updated_at == "2020-01-01 00:00:00"
+    assert row.sync_version == task.sync_version == 0
+    assert "ix_attachment_task_id" in {index["name"] for index in inspect(engine).get_indexes("attachment")}
+    # Zweiter Lauf ändert nichts mehr
+    assert init_schema(engine) == []
@@ -0,0 +1,31 @@
+from typing import Callable, Dict
+
+from fastapi.testclient import TestClient
+
+API = "/api/v1/attachments/my-files/"
+
+
+def test_my_files_keyset_pagination(
+    client: TestClient,
+    auth_headers: Dict[str, str],
+    make_user: Callable[[], Dict[str, str]],
+    upload: Callable[..., dict],
+):
+    upload(make_user())
+    own = {upload(auth_headers, filename=f"f{i}.txt")["id"] for i in range(5)}
+
+    seen = []
+    url = f"{API}?limit=2"
+    while url:
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        seen += [attachment["id"] for attachment in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        url = f"{API}?limit=2&cursor={cursor}" if cursor else None
+
+    assert len(seen) == len(set(seen)) and set(seen) == own
+
+
+def test_my_files_limit_is_validated(client: TestClient, auth_headers: Dict[str, str]):
+    for query in ("limit=0", "limit=1001"):
+        assert client.get(f"{API}?{query}", headers=auth_headers).status_code == 422, query
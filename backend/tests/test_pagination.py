@@ -0,0 +1,27 @@
+from typing import Dict
+
+from fastapi.testclient import TestClient
+
+API = "/api/v1/tasks"
+
+
+def test_cursor_pagination(client: TestClient, auth_headers: Dict[str, str]):
+    client.post(f"{API}/batch", json=[{"title": f"p{i}"} for i in range(7)], headers=auth_headers)
+
+    seen = []
+    url = f"{API}/?limit=3"
+    while url:
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        seen += [task["id"] for task in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        url = f"{API}/?limit=3&cursor={cursor}" if cursor else None
+
+    assert len(seen) == 7 == len(set(seen))
+    assert client.get(f"{API}/?cursor=kaputt", headers=auth_headers).status_code == 400
+
+
+def test_list_limits_are_validated(client: TestClient, auth_headers: Dict[str, str]):
+    for query in ("limit=0", "limit=1001", "skip=-1"):
+        assert client.get(f"{API}/?{query}", headers=auth_headers).status_code == 422, query
+        assert client.get(f"{API}/summary?{query}", headers=auth_headers).status_code == 422, query
@@ -0,0 +1,81 @@
+from typing import Dict, List
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app import crud, schemas
+from app.db.session import new_session
+from app.models.task import Task
+
+API = "/api/v1/tasks"
+
+
+def _writes(statements: List[str]) -> List[str]:
+    return [statement for statement in statements if statement in ("INSERT", "UPDATE", "DELETE")]
+
+
+def test_create_needs_no_select(client: TestClient, auth_headers: Dict[str, str], statements: List[str]):
+    # Erster Aufruf legt die Statistikzeile an; danach zählt nur der eingeschwungene Pfad
+    client.post(f"{API}/", json={"title": "warm"}, headers=auth_headers)
+    statements.clear()
+
+    response = client.post(f"{API}/", json={"title": "zählen"}, headers=auth_headers)
+
+    assert response.status_code == 200, response.text
+    assert "SELECT" not in statements, statements
+    assert len(statements) <= 2, statements
+
+
+def test_update_statement_count(client: TestClient, auth_headers: Dict[str, str], statements: List[str]):
+    task_id = client.post(f"{API}/", json={"title": "alt"}, headers=auth_headers).json()["id"]
+    statements.clear()
+
+    response = client.put(f"{API}/{task_id}", json={"title": "neu"}, headers=auth_headers)
+
+    assert response.status_code == 200 and response.json()["title"] == "neu", response.text
+    assert len(statements) <= 4, statements
+    assert len(_writes(statements)) <= 2, statements
+
+
+def test_batch_statement_count_independent_of_size(
+    client: TestClient, auth_headers: Dict[str, str], statements: List[str]
+):
+    client.post(f"{API}/", json={"title": "warm"}, headers=auth_headers)
+    counts = {}
+    for size in (5, 50):
+        statements.clear()
+        response = client.post(
+            f"{API}/batch", json=[{"title": f"b{i}"} for i in range(size)], headers=auth_headers
+        )
+        assert response.status_code == 200 and len(response.json()) == size, response.text
+        created = len(statements)
+
+        statements.clear()
+        response = client.patch(
+            f"{API}/batch",
+            json=[{"id": item["id"], "is_completed": True} for item in response.json()],
+            headers=auth_headers,
+        )
+        assert response.status_code == 200, response.text
+        assert {item["status"] for item in response.json()} == {"updated"}
+        counts[size] = (created, len(statements))
+
+    assert counts[5] == counts[50], counts
+
+
+def test_create_without_commit_rolls_back(client: TestClient, auth_headers: Dict[str, str]):
+    owner_id = client.get("/api/v1/users/me", headers=auth_headers).json()["id"]
+
+    async def create_and_rollback() -> int:
+        db = new_session()
+        try:
+            await crud.task.create_with_owner(
+                db, obj_in=schemas.TaskCreate(title="verworfen"), owner_id=owner_id, commit=False
+            )
+            await db.rollback()
+            return await db.scalar(select(func.count(Task.id)).where(Task.owner_id == owner_id))
+        finally:
+            await db.close()
+
+    assert client.portal.call(create_and_rollback) == 0
+    assert client.get(f"{API}/", headers=auth_headers).json() == []
@@ -0,0 +1,145 @@
+import asyncio
+import base64
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Dict, List
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.core.sweeper import expire_upload_sessions
+from app.db.session import SessionLocal
+from app.main import app
+from app.models.upload_session import UploadSession
+from app.utils.storage import upload_part_path
+
+API = "/api/v1/upload/resumable"
+CONTENT = bytes(range(256)) * 8
+PATCH_TYPE = "application/offset+octet-stream"
+METADATA = "filename " + base64.b64encode(b"gross.txt").decode()
+
+
+def _create(client: TestClient, headers: Dict[str, str], length: int = len(CONTENT)) -> str:
+    response = client.post(
+        API, headers={**headers, "Upload-Length": str(length), "Upload-Metadata": METADATA}
+    )
+    assert response.status_code == 201, response.text
+    return response.headers["location"].rsplit("/", 1)[1]
+
+
+def _patch(
+    client: TestClient, headers: Dict[str, str], upload_id: str, offset: int, data: bytes
+) -> httpx.Response:
+    return client.patch(
+        f"{API}/{upload_id}",
+        content=data,
+        headers={**headers, "Upload-Offset": str(offset), "Content-Type": PATCH_TYPE},
+    )
+
+
+def _offset(client: TestClient, headers: Dict[str, str], upload_id: str) -> int:
+    response = client.head(f"{API}/{upload_id}", headers=headers)
+    assert response.status_code == 200
+    return int(response.headers["upload-offset"])
+
+
+def test_offset_mismatch_is_rejected(client: TestClient, auth_headers: Dict[str, str]):
+    upload_id = _create(client, auth_headers)
+    assert _patch(client, auth_headers, upload_id, 0, CONTENT[:100]).status_code == 204
+
+    for offset in (0, 50, 200):
+        response = _patch(client, auth_headers, upload_id, offset, CONTENT[offset:])
+        assert response.status_code == 409
+        assert response.headers["upload-offset"] == "100"
+    assert _offset(client, auth_headers, upload_id) == 100
+
+
+def test_resume_after_interrupted_patch(client: TestClient, auth_headers: Dict[str, str]):
+    upload_id = _create(client, auth_headers)
+
+    async def interrupted_patch() -> None:
+        # Der Client bricht nach dem ersten Teil ab: die App direkt per ASGI aufrufen
+        messages: List[dict] = [
+            {"type": "http.request", "body": CONTENT[:300], "more_body": True},
+            {"type": "http.disconnect"},
+        ]
+
+        async def receive() -> dict:
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            pass
+
+        headers = {**auth_headers, "Upload-Offset": "0", "Content-Type": PATCH_TYPE}
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "PATCH",
+            "scheme": "http",
+            "path": f"{API}/{upload_id}",
+            "raw_path": f"{API}/{upload_id}".encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"testserver")]
+            + [(key.lower().encode(), value.encode()) for key, value in headers.items()],
+            "client": ("127.0.0.1", 1234),
+            "server": ("testserver", 80),
+        }
+        await asyncio.wait_for(app(scope, receive, send), 5)
+
+    client.portal.call(interrupted_patch)
+    # Die bis zum Abbruch empfangenen Bytes bleiben erhalten
+    assert _offset(client, auth_headers, upload_id) == 300
+
+    response = _patch(client, auth_headers, upload_id, 300, CONTENT[300:])
+    assert response.status_code == 204, response.text
+    attachment_id = response.headers["x-attachment-id"]
+    download = client.get(f"/api/v1/attachments/{attachment_id}/download", headers=auth_headers)
+    assert download.status_code == 200 and download.content == CONTENT
+    assert not upload_part_path(upload_id).exists()
+
+
+def test_expired_upload_is_swept(client: TestClient, auth_headers: Dict[str, str]):
+    upload_id = _create(client, auth_headers)
+    assert _patch(client, auth_headers, upload_id, 0, CONTENT[:100]).status_code == 204
+    assert upload_part_path(upload_id).is_file()
+
+    with SessionLocal() as db:
+        db.execute(
+            update(UploadSession)
+            .where(UploadSession.id == upload_id)
+            .values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+        )
+        db.commit()
+    # Abgelaufen gilt der Upload sofort als nicht vorhanden
+    assert client.head(f"{API}/{upload_id}", headers=auth_headers).status_code == 404
+
+    assert client.portal.call(partial(expire_upload_sessions, batch_size=100)) >= 1
+    assert not upload_part_path(upload_id).exists()
+    with SessionLocal() as db:
+        assert db.get(UploadSession, upload_id) is None
+
+
+def test_open_upload_limit_holds_under_concurrency(
+    client: TestClient, auth_headers: Dict[str, str], monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "UPLOAD_RESUMABLE_MAX_SESSIONS", 3)
+
+    headers = {**auth_headers, "Upload-Length": "10", "Upload-Metadata": METADATA}
+
+    async def create_many() -> List[int]:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://testserver"
+        ) as api:
+            responses = await asyncio.gather(
+                *(api.post(API, headers=headers) for _ in range(8))
+            )
+        return [response.status_code for response in responses]
+
+    statuses = client.portal.call(create_many)
+    assert sorted(statuses) == [201] * 3 + [429] * 5
+    assert client.post(API, headers=headers).status_code == 429
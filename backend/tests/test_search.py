@@ -0,0 +1,27 @@
+from typing import Callable, Dict
+
+from fastapi.testclient import TestClient
+
+API = "/api/v1/tasks"
+
+
+def test_search_only_own_tasks(
+    client: TestClient, auth_headers: Dict[str, str], make_user: Callable[[], Dict[str, str]]
+):
+    other = make_user()
+    client.post(f"{API}/batch", json=[{"title": f"Einkaufen {i}"} for i in range(3)], headers=other)
+    client.post(
+        f"{API}/batch", json=[{"title": f"Einkaufen {i}"} for i in range(3)], headers=auth_headers
+    )
+    own = {task["id"] for task in client.get(f"{API}/", headers=auth_headers).json()}
+
+    found = []
+    url = f"{API}/search?q=einkauf&limit=2"
+    while url:
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        found += [task["id"] for task in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        url = f"{API}/search?q=einkauf&limit=2&cursor={cursor}" if cursor else None
+
+    assert sorted(found) == sorted(own)
@@ -0,0 +1,72 @@
+import threading
+import uuid
+from typing import Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.hash import bcrypt
+from sqlalchemy import select, update
+
+from app.core import security
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.user import User
+
+
+def _register(client: TestClient) -> Tuple[str, str]:
+    email = f"{uuid.uuid4().hex[:12]}@example.com"
+    response = client.post("/api/v1/users/", json={"email": email, "password": "pw"})
+    assert response.status_code == 200, response.text
+    return email, "pw"
+
+
+def _stored_hash(email: str) -> str:
+    with SessionLocal() as db:
+        return db.execute(select(User.hashed_password).where(User.email == email)).scalar_one()
+
+
+def test_full_hashing_pool_returns_503(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    email, password = _register(client)
+    # Alle Slots belegt: Pool und Warteschlange sind ausgelastet
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()
+    monkeypatch.setattr(security, "_hash_slots", slots)
+
+    response = client.post(
+        "/api/v1/login/access-token", data={"username": email, "password": password}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    response = client.post(
+        "/api/v1/users/", json={"email": f"x{uuid.uuid4().hex[:8]}@example.com", "password": "pw"}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    # Nach Freigabe geht es normal weiter
+    slots.release()
+    response = client.post(
+        "/api/v1/login/access-token", data={"username": email, "password": password}
+    )
+    assert response.status_code == 200
+
+
+def test_login_rehashes_outdated_cost_factor(client: TestClient):
+    email, password = _register(client)
+    outdated = bcrypt.using(rounds=settings.BCRYPT_ROUNDS + 1).hash(password)
+    with SessionLocal() as db:
+        db.execute(update(User).where(User.email == email).values(hashed_password=outdated))
+        db.commit()
+
+    response = client.post(
+        "/api/v1/login/access-token", data={"username": email, "password": password}
+    )
+    assert response.status_code == 200, response.text
+    renewed = _stored_hash(email)
+    assert renewed != outdated
+    assert bcrypt.from_string(renewed).rounds == settings.BCRYPT_ROUNDS
+    assert bcrypt.verify(password, renewed)
+
+    # Aktueller Hash bleibt beim nächsten Login unverändert
+    client.post("/api/v1/login/access-token", data={"username": email, "password": password})
+    assert _stored_hash(email) == renewed
@@ -0,0 +1,54 @@
+import uuid
+from typing import Callable, Dict
+
+from fastapi.testclient import TestClient
+
+from app.commands.shard_uploads import migrate
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.attachment import Attachment
+from app.models.task_stats import TaskStats
+from app.utils.storage import build_public_url, sharded_relative_path
+
+
+def test_migrate_shards_rewrites_path_and_is_idempotent(
+    client: TestClient,
+    make_user: Callable[[], Dict[str, str]],
+    upload: Callable[..., dict],
+):
+    owner, other = make_user(), make_user()
+    owner_id = client.get("/api/v1/users/me", headers=owner).json()["id"]
+    other_id = client.get("/api/v1/users/me", headers=other).json()["id"]
+    upload(other)
+
+    # Altbestand im flachen Layout
+    name = f"{uuid.uuid4().hex}_alt.txt"
+    source = settings.upload_dir_abs / name
+    source.write_bytes(b"alt")
+    with SessionLocal() as db:
+        attachment = Attachment(
+            filename="alt.txt", file_path=build_public_url(name), uploader_id=owner_id
+        )
+        db.add(attachment)
+        db.add(TaskStats(owner_id=owner_id))
+        db.commit()
+        attachment_id = attachment.id
+        versions = {
+            owner_id: db.get(TaskStats, owner_id).version,
+            other_id: db.get(TaskStats, other_id).version,
+        }
+
+    assert migrate()["migrated"] >= 1
+
+    target_relative = sharded_relative_path(name)
+    with SessionLocal() as db:
+        assert db.get(Attachment, attachment_id).file_path == build_public_url(target_relative)
+        assert db.get(TaskStats, owner_id).version == versions[owner_id] + 1
+        assert db.get(TaskStats, other_id).version == versions[other_id]
+    assert (settings.upload_dir_abs / target_relative).read_bytes() == b"alt"
+    assert not source.exists()
+
+    # Zweiter Lauf: nichts mehr zu verteilen, Pfad bleibt
+    assert "migrated" not in migrate()
+    with SessionLocal() as db:
+        assert db.get(Attachment, attachment_id).file_path == build_public_url(target_relative)
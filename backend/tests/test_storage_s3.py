@@ -0,0 +1,81 @@
+from pathlib import Path
+from typing import Callable, Dict, Iterator
+from urllib.parse import urlsplit
+
+import boto3
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from moto import mock_aws
+
+from app.api import public_uploads
+from app.core.config import settings
+from app.utils.storage import S3Storage, stored_relative_path
+
+
+@pytest.fixture
+def s3_storage(monkeypatch) -> Iterator[S3Storage]:
+    with mock_aws():
+        for name, value in {
+            "S3_BUCKET": "anhaenge",
+            "S3_REGION": "us-east-1",
+            "S3_ACCESS_KEY_ID": "test",
+            "S3_SECRET_ACCESS_KEY": "test",
+            "S3_KEY_PREFIX": "pfx",
+        }.items():
+            monkeypatch.setattr(settings, name, value)
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="anhaenge")
+        yield S3Storage()
+
+
+def test_s3_save_move_delete(s3_storage: S3Storage, tmp_path: Path):
+    source = tmp_path / "quelle.txt"
+    source.write_bytes(b"inhalt")
+
+    s3_storage.save(".incoming/u1", source)
+    assert not source.exists()
+    assert s3_storage.size(".incoming/u1") == 6
+
+    s3_storage.move(".incoming/u1", "ab/cd/datei.txt")
+    assert s3_storage.size(".incoming/u1") is None
+    assert s3_storage.size("ab/cd/datei.txt") == 6
+    body = s3_storage.client.get_object(Bucket="anhaenge", Key="pfx/ab/cd/datei.txt")["Body"]
+    assert body.read() == b"inhalt"
+
+    s3_storage.delete("ab/cd/datei.txt")
+    assert s3_storage.size("ab/cd/datei.txt") is None
+
+
+def test_s3_presigned_urls(s3_storage: S3Storage):
+    url = s3_storage.presigned_get("ab/cd/datei.txt", filename="bericht.txt", content_type="text/plain")
+    assert urlsplit(url).path.endswith("/pfx/ab/cd/datei.txt")
+    assert "X-Amz-Signature=" in url and "bericht.txt" in url
+
+    request = s3_storage.presigned_put(".incoming/u2", content_type=None, size=7)
+    assert request["method"] == "PUT"
+    assert request["headers"] == {"Content-Type": "application/octet-stream"}
+    assert "X-Amz-Signature=" in request["url"]
+
+
+def test_public_upload_only_redirects_stored_files(
+    client: TestClient,
+    s3_storage: S3Storage,
+    auth_headers: Dict[str, str],
+    upload: Callable[..., dict],
+    monkeypatch,
+):
+    monkeypatch.setattr(public_uploads, "get_storage", lambda: s3_storage)
+    app = FastAPI()
+    app.include_router(public_uploads.router, prefix=settings.UPLOAD_PUBLIC_PREFIX.rstrip("/"))
+    prefix = settings.UPLOAD_PUBLIC_PREFIX.rstrip("/")
+    key = stored_relative_path(upload(auth_headers, filename="bericht.txt")["url"])
+
+    with TestClient(app) as public:
+        response = public.get(f"{prefix}/{key}", follow_redirects=False)
+        assert response.status_code == 307
+        assert urlsplit(response.headers["location"]).path.endswith(f"/pfx/{key}")
+        assert "bericht.txt" in response.headers["location"]
+
+        # Laufende Uploads und Objekte ohne Attachment bzw. Blob bleiben unerreichbar
+        for other in (".incoming/u1", "ab/cd/fremd.txt", f"{key}.alt"):
+            assert public.get(f"{prefix}/{other}", follow_redirects=False).status_code == 404
@@ -0,0 +1,58 @@
+import os
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.file_deletion import drain_file_deletions
+from app.core.sweeper import RECONCILE_CURSOR_FILE, reconcile
+from app.db.session import SessionLocal
+from app.models.blob import Blob
+from app.utils.storage import build_public_url
+
+
+def test_reconcile_keeps_files_referenced_before_deletion(client: TestClient):
+    stray = settings.upload_dir_abs / "reconcile_stray.bin"
+    stray.write_bytes(b"stray")
+    os.utime(stray, (1, 1))
+
+    result = reconcile(batch_size=100, max_seconds=60, grace_seconds=60, delete_files=True)
+    assert result["unreferenced_queued"] == 1, result
+    # Bereits vorgemerkte Dateien werden nicht erneut eingereiht
+    assert reconcile(batch_size=100, max_seconds=60, grace_seconds=60, delete_files=True)[
+        "unreferenced_queued"
+    ] == 0
+
+    # Zwischen Abgleich und Löschen verweist ein neuer Blob auf die Datei
+    with SessionLocal() as db:
+        db.add(Blob(sha256="0" * 64, size=5, file_path=build_public_url(stray.name), refcount=1))
+        db.commit()
+
+    assert client.portal.call(drain_file_deletions)["skipped"] == 1
+    assert stray.is_file()
+
+
+def test_reconcile_resumes_after_time_budget(client: TestClient):
+    root = settings.upload_dir_abs
+    for name in ("resume_a.bin", "resume_b.bin"):
+        (root / name).write_bytes(b"x")
+    expected = sum(
+        1
+        for path in root.rglob("*")
+        if path.is_file() and not any(part.startswith(".") for part in path.relative_to(root).parts)
+    )
+    cursor = root / RECONCILE_CURSOR_FILE
+
+    # Ohne Zeitbudget schafft jeder Lauf genau einen Batch und merkt sich die Position
+    runs = []
+    while not runs or not runs[-1]["complete"]:
+        runs.append(reconcile(batch_size=1, max_seconds=0, grace_seconds=60))
+        assert runs[-1]["complete"] or cursor.is_file()
+        assert len(runs) < 10_000
+    assert not runs[0]["resumed"] and all(run["resumed"] for run in runs[1:])
+    assert sum(run["files_scanned"] for run in runs) == expected
+    assert not cursor.exists()
+
+    # Danach beginnt der nächste Lauf wieder von vorn
+    fresh = reconcile(batch_size=1000, max_seconds=60, grace_seconds=60)
+    assert fresh["complete"] and not fresh["resumed"]
+    assert fresh["files_scanned"] == expected
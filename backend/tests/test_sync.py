@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Callable, Dict, Optional
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app import crud
+from app.core.sweeper import prune_tombstones
+from app.db.session import SessionLocal, new_session
+from app.models.tombstone import Tombstone
+
+API = "/api/v1/tasks"
+
+
+def _sync(client: TestClient, headers: Dict[str, str], since: Optional[str], limit: int = 2) -> dict:
+    # Alle Seiten ab `since` lesen und zusammenfassen
+    merged = {"tasks": [], "attachments": [], "deleted_task_ids": [], "deleted_attachment_ids": []}
+    while True:
+        params = {"limit": limit, **({"since": since} if since else {})}
+        response = client.get(f"{API}/changes", params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        for key in merged:
+            merged[key] += page[key]
+        since = page["next_token"]
+        if not page["has_more"]:
+            return {**merged, "next_token": since}
+
+
+def test_delta_sync_reports_changes_and_deletions(
+    client: TestClient, auth_headers: Dict[str, str], upload: Callable[..., dict]
+):
+    kept, changed, deleted = (
+        client.post(f"{API}/", json={"title": title}, headers=auth_headers).json()
+        for title in ("bleibt", "ändert sich", "wird gelöscht")
+    )
+    attachment = upload(auth_headers)
+    full = _sync(client, auth_headers, None)
+    assert {task["id"] for task in full["tasks"]} == {kept["id"], changed["id"], deleted["id"]}
+    assert [a["id"] for a in full["attachments"]] == [attachment["id"]]
+
+    client.put(f"{API}/{changed['id']}", json={"title": "geändert"}, headers=auth_headers)
+    client.delete(f"{API}/{deleted['id']}", headers=auth_headers)
+    client.delete(f"/api/v1/attachments/{attachment['id']}", headers=auth_headers)
+
+    delta = _sync(client, auth_headers, full["next_token"])
+    assert [task["title"] for task in delta["tasks"]] == ["geändert"]
+    assert delta["deleted_task_ids"] == [deleted["id"]]
+    assert delta["deleted_attachment_ids"] == [attachment["id"]]
+
+    # Ohne weitere Änderungen bleibt das Token gleich
+    assert _sync(client, auth_headers, delta["next_token"])["next_token"] == delta["next_token"]
+
+
+def test_generic_remove_writes_tombstone(client: TestClient, auth_headers: Dict[str, str]):
+    task = client.post(f"{API}/", json={"title": "generisch"}, headers=auth_headers).json()
+    token = _sync(client, auth_headers, None)["next_token"]
+
+    async def remove() -> None:
+        db = new_session()
+        try:
+            await crud.task.remove(db, id=task["id"])
+        finally:
+            await db.close()
+
+    client.portal.call(remove)
+    assert _sync(client, auth_headers, token)["deleted_task_ids"] == [task["id"]]
+
+
+def test_pruned_tombstones_require_full_resync(client: TestClient, auth_headers: Dict[str, str]):
+    task = client.post(f"{API}/", json={"title": "alt"}, headers=auth_headers).json()
+    token = _sync(client, auth_headers, None)["next_token"]
+    client.delete(f"{API}/{task['id']}", headers=auth_headers)
+
+    with SessionLocal() as db:
+        db.execute(
+            update(Tombstone)
+            .where(Tombstone.entity == "task", Tombstone.entity_id == task["id"])
+            .values(deleted_at=datetime.utcnow() - timedelta(days=31))
+        )
+        db.commit()
+    assert client.portal.call(partial(prune_tombstones, ttl_days=30, batch_size=100)) >= 1
+
+    # Die Löschung ist nicht mehr nachvollziehbar: Token zu alt
+    response = client.get(f"{API}/changes", params={"since": token}, headers=auth_headers)
+    assert response.status_code == 410
+    # Neu synchronisieren liefert ein wieder gültiges Token
+    fresh = _sync(client, auth_headers, None)
+    assert task["id"] not in {t["id"] for t in fresh["tasks"]}
+    assert _sync(client, auth_headers, fresh["next_token"])["next_token"] == fresh["next_token"]
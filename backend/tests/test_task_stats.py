@@ -0,0 +1,42 @@
+from typing import Dict
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app import crud
+from app.db.session import SessionLocal, new_session
+from app.models.task_stats import TaskStats
+
+API = "/api/v1/tasks"
+
+
+def test_stats_recount_keeps_version_monotonic(client: TestClient, auth_headers: Dict[str, str]):
+    owner_id = client.get("/api/v1/users/me", headers=auth_headers).json()["id"]
+    client.post(
+        f"{API}/batch",
+        json=[{"title": f"s{i}", "is_completed": i == 0} for i in range(3)],
+        headers=auth_headers,
+    )
+    with SessionLocal() as db:
+        db.execute(delete(TaskStats).where(TaskStats.owner_id == owner_id))
+        db.commit()
+
+    # Fehlende Zeile: aus dem Bestand neu zählen
+    response = client.get(f"{API}/stats", headers=auth_headers)
+    assert response.json() == {"total": 3, "completed": 1, "open": 2}
+
+    async def recount_existing() -> int:
+        db = new_session()
+        try:
+            # Zeile existiert bereits (parallele Transaktion war schneller): nur Differenzen
+            version = await crud.task_stats._recount(db, owner_id=owner_id, total=1)
+            await db.commit()
+            return version
+        finally:
+            await db.close()
+
+    with SessionLocal() as db:
+        before = db.get(TaskStats, owner_id).version
+    assert client.portal.call(recount_existing) == before + 1
+    with SessionLocal() as db:
+        assert db.get(TaskStats, owner_id).total == 4
@@ -0,0 +1,43 @@
+from typing import Dict, Iterator, Set
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.api_v1.endpoints import upload
+from app.core.config import settings
+
+API = "/api/v1/upload/stream"
+
+
+def _stored_files() -> Set[str]:
+    root = settings.upload_dir_abs
+    return {str(path.relative_to(root)) for path in root.rglob("*") if path.is_file()}
+
+
+def test_stream_size_limit_leaves_no_partial_file(
+    client: TestClient, auth_headers: Dict[str, str], monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_SIZE_MB", 0.01)
+    # Kleiner Schreibpuffer: vor dem Abbruch liegen schon Daten in der Zieldatei
+    monkeypatch.setattr(upload, "WRITE_BUFFER_SIZE", 4096)
+    before = _stored_files()
+
+    def body() -> Iterator[bytes]:
+        # Ohne Content-Length (chunked): das Limit greift erst beim Lesen des Streams
+        for _ in range(64):
+            yield b"x" * 1024
+
+    response = client.post(
+        API, params={"filename": "gross.txt"}, content=body(), headers=auth_headers
+    )
+    assert response.status_code == 413
+    assert _stored_files() == before
+
+    # Mit angekündigter Größe wird gar nicht erst geschrieben
+    response = client.post(
+        API, params={"filename": "gross.txt"}, content=b"x" * 65536, headers=auth_headers
+    )
+    assert response.status_code == 413
+    assert _stored_files() == before
+
+    assert client.get("/api/v1/attachments/my-files/", headers=auth_headers).json() == []